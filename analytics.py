@@ -0,0 +1,258 @@
+"""
+Módulo de análise de dados com pandas
+Mantém uma visão colunar dos registros para filtros e agregações vetorizadas
+"""
+
+import threading
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from record import photo_count
+
+# Colunas da visão colunar e seus tipos
+COLUMNS = ['id', 'data', 'promotor', 'pdv', 'valor_deslocamento', 'num_entradas', 'num_fotos']
+CATEGORY_COLUMNS = ['promotor', 'pdv']
+
+# Agregações padrão usadas nos relatórios e no painel
+AGGREGATIONS = {
+    'visitas': ('id', 'size'),
+    'total_deslocamento': ('valor_deslocamento', 'sum'),
+    'total_entradas': ('num_entradas', 'sum'),
+    'total_fotos': ('num_fotos', 'sum')
+}
+
+
+def records_to_frame(records):
+    """
+    Converte registros em DataFrame com colunas tipadas
+
+    Args:
+        records: Iterável de registros (dicionários)
+
+    Returns:
+        DataFrame com as colunas de COLUMNS
+    """
+    rows = [
+        (
+            r.get('id', ''),
+            r.get('data', ''),
+            r.get('promotor', ''),
+            r.get('pdv', ''),
+            r.get('valor_deslocamento', 0),
+            r.get('num_entradas', 1),
+            photo_count(r)
+        )
+        for r in records
+    ]
+    frame = pd.DataFrame.from_records(rows, columns=COLUMNS)
+
+    frame['data'] = pd.to_datetime(frame['data'], format='%Y-%m-%d', errors='coerce')
+    # Valores ausentes (None) assumem os mesmos padrões da validação
+    frame['valor_deslocamento'] = pd.to_numeric(
+        frame['valor_deslocamento'], errors='coerce'
+    ).fillna(0).astype(np.float64)
+    frame['num_entradas'] = pd.to_numeric(frame['num_entradas'], errors='coerce').fillna(1).astype(np.int64)
+    frame['num_fotos'] = frame['num_fotos'].astype(np.int64)
+    for column in CATEGORY_COLUMNS:
+        frame[column] = frame[column].astype('category')
+
+    return frame
+
+
+class RecordFrame:
+    """
+    Visão colunar dos registros de um Database, atualizada a cada inserção e alteração
+
+    As inserções viram blocos pequenos no fim da visão; um bloco só é unido
+    ao anterior quando fica do mesmo tamanho (como num contador binário), de
+    modo que cada linha é copiada O(log n) vezes e os filtros e totais
+    percorrem poucos blocos sem juntar a visão inteira.
+    """
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Instância de Database a acompanhar
+        """
+        self.db = db
+        self._chunks = []
+        self._starts = []
+        self._pending = []
+        self._updated = {}
+        self._positions = {}
+        self._stale = True
+        self._lock = threading.Lock()
+        db.subscribe(self._on_change)
+
+    def _on_change(self, event, record):
+        """Recebe as alterações do Database"""
+        with self._lock:
+            if self._stale:
+                return
+            if event == 'add':
+                self._pending.append(record)
+            elif event == 'update':
+                # Registros ainda pendentes são lidos já atualizados ao serem anexados
+                self._updated[record.get('id')] = record
+            else:
+                # Remoções exigem reconstrução (feita sob demanda)
+                self._stale = True
+                self._pending = []
+                self._updated = {}
+
+    def _align_categories(self, new):
+        """Une as categorias de um DataFrame novo às dos blocos atuais"""
+        base = self._chunks[0]
+        for column in CATEGORY_COLUMNS:
+            current = base[column].cat.categories
+            missing = new[column].cat.categories.difference(current)
+            if len(missing):
+                # Raro (promotor ou PDV novo): todos os blocos recebem a categoria
+                for chunk in self._chunks:
+                    chunk[column] = chunk[column].cat.add_categories(missing)
+            new[column] = new[column].cat.set_categories(base[column].cat.categories)
+
+    def _append_pending(self):
+        """Anexa os registros pendentes como um novo bloco"""
+        new = records_to_frame(self._pending)
+        self._pending = []
+        self._align_categories(new)
+
+        start = self._starts[-1] + len(self._chunks[-1])
+        self._chunks.append(new)
+        self._starts.append(start)
+        self._positions.update(zip(new['id'], range(start, start + len(new))))
+
+        while len(self._chunks) > 1 and len(self._chunks[-2]) <= len(self._chunks[-1]):
+            self._merge_last()
+
+    def _merge_last(self):
+        """Une os dois últimos blocos"""
+        last = self._chunks.pop()
+        self._starts.pop()
+        self._chunks[-1] = pd.concat([self._chunks[-1], last], ignore_index=True)
+
+    def _apply_updates(self):
+        """Reescreve no lugar as linhas dos registros atualizados"""
+        updated = self._updated
+        self._updated = {}
+        positions = [self._positions.get(record_id) for record_id in updated]
+        if None in positions:
+            # Registro fora da visão (ex.: ID alterado): reconstrói
+            return False
+
+        new = records_to_frame(updated.values())
+        self._align_categories(new)
+
+        # Linhas agrupadas por bloco: (linhas no bloco, linhas em `new`)
+        by_chunk = {}
+        for i, position in enumerate(positions):
+            c = bisect_right(self._starts, position) - 1
+            rows, sources = by_chunk.setdefault(c, ([], []))
+            rows.append(position - self._starts[c])
+            sources.append(i)
+
+        for c, (rows, sources) in by_chunk.items():
+            chunk = self._chunks[c]
+            for j, column in enumerate(COLUMNS):
+                chunk.iloc[rows, j] = new[column].array[sources]
+        return True
+
+    def _refresh(self):
+        """Aplica as alterações recebidas (chamado com a trava)"""
+        if not self._stale and self._pending:
+            self._append_pending()
+        if not self._stale and self._updated and not self._apply_updates():
+            self._stale = True
+        if self._stale:
+            frame = records_to_frame(self.db.records)
+            self._chunks = [frame]
+            self._starts = [0]
+            self._positions = dict(zip(frame['id'], range(len(frame))))
+            self._pending = []
+            self._updated = {}
+            self._stale = False
+        return list(self._chunks)
+
+    @property
+    def frame(self):
+        """DataFrame atualizado com todos os registros (une os blocos)"""
+        with self._lock:
+            self._refresh()
+            while len(self._chunks) > 1:
+                self._merge_last()
+            return self._chunks[0]
+
+    def filter(self, data=None, promotor=None, pdv=None, start_date=None, end_date=None):
+        """
+        Filtra os registros de forma vetorizada
+
+        Args:
+            data: Data exata (YYYY-MM-DD ou date)
+            promotor: Nome do promotor
+            pdv: Nome do PDV
+            start_date: Data inicial do intervalo (inclusiva)
+            end_date: Data final do intervalo (inclusiva)
+
+        Returns:
+            DataFrame filtrado
+        """
+        parts = self._filter_chunks(data, promotor, pdv, start_date, end_date)
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def _filter_chunks(self, data=None, promotor=None, pdv=None, start_date=None, end_date=None):
+        """Aplica os filtros de filter() a cada bloco, sem uni-los"""
+        with self._lock:
+            chunks = self._refresh()
+
+        parts = []
+        for frame in chunks:
+            mask = np.ones(len(frame), dtype=bool)
+
+            if data:
+                mask &= (frame['data'] == pd.Timestamp(data)).to_numpy()
+            if start_date:
+                mask &= (frame['data'] >= pd.Timestamp(start_date)).to_numpy()
+            if end_date:
+                mask &= (frame['data'] <= pd.Timestamp(end_date)).to_numpy()
+            if promotor:
+                mask &= (frame['promotor'] == promotor).to_numpy()
+            if pdv:
+                mask &= (frame['pdv'] == pdv).to_numpy()
+
+            parts.append(frame if mask.all() else frame[mask])
+        return parts
+
+    def totals(self, **filters):
+        """
+        Calcula totais dos registros filtrados
+
+        Args:
+            **filters: Mesmos argumentos de filter()
+
+        Returns:
+            Dicionário com totais
+        """
+        parts = self._filter_chunks(**filters)
+        return {
+            'total_registros': sum(len(frame) for frame in parts),
+            'total_deslocamento': float(sum(frame['valor_deslocamento'].sum() for frame in parts)),
+            'total_entradas': int(sum(frame['num_entradas'].sum() for frame in parts)),
+            'total_fotos': int(sum(frame['num_fotos'].sum() for frame in parts))
+        }
+
+    def group_by(self, by, **filters):
+        """
+        Agrupa os registros filtrados
+
+        Args:
+            by: Coluna ou lista de colunas ('promotor', 'pdv', 'data')
+            **filters: Mesmos argumentos de filter()
+
+        Returns:
+            DataFrame com visitas, total_deslocamento, total_entradas e total_fotos
+        """
+        frame = self.filter(**filters)
+        return frame.groupby(by, observed=True).agg(**AGGREGATIONS)
@@ -1,18 +1,30 @@
+from startup_timer import startup_timer
+
+# Mede o import dos módulos pesados; o Google só é importado no primeiro uso
+startup_timer.import_modules('streamlit', 'pandas', 'database', 'sync_worker')
+
 import streamlit as st
+from collections import OrderedDict
 from datetime import datetime
-import json
-from pathlib import Path
-from google_integration import GoogleIntegration
-from database import Database
+import pandas as pd
+from database import Database, DatabaseLoadError
+from config_registry import config_registry
+from metrics import metrics
+from profiler import run_profiler
+from sync_worker import sync_worker, STATUS_PENDENTE, STATUS_OFFLINE, STATUS_LABELS
 from config import *
-import base64
-from io import BytesIO
+from formatters import format_currency, format_currency_column, format_date_column
+from record import photo_count, photo_list
+from photo_store import photo_store, is_local_ref
+from geo import haversine_km, check_valor_deslocamento, validate_coordinates
 
-# Carregar configurações
 try:
-    load_config()
-except:
-    pass
+    from streamlit_js_eval import get_geolocation
+except ImportError:
+    get_geolocation = None
+import base64
+import zipfile
+from io import BytesIO
 
 # Configuração da página
 st.set_page_config(
@@ -83,56 +95,86 @@ st.markdown("""
 
 # Inicializar sessão
 if 'db' not in st.session_state:
-    st.session_state.db = Database()
+    with startup_timer.measure('Database (carga)'):
+        try:
+            st.session_state.db = Database()
+        except DatabaseLoadError as e:
+            st.error(f"❌ {e}")
+            st.stop()
+    # Registros que ficaram em sincronização quando o app foi encerrado
+    sync_worker.flag_interrupted(st.session_state.db)
 if 'google' not in st.session_state:
-    st.session_state.google = GoogleIntegration()
+    st.session_state.google = None
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 
-def format_currency(value):
-    """Formata valor monetário"""
-    return f"{MOEDA} {value:.2f}"
+if DEBUG_MODE:
+    startup_timer.report_once()
 
-def save_config_to_file():
-    """Salva configurações em arquivo JSON"""
-    try:
-        config_data = {
-            'promotores': PROMOTORES,
-            'pdvs': PDVS
-        }
-        
-        with open('config_data.json', 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, ensure_ascii=False, indent=2)
-        
-        return True
-    except Exception as e:
-        st.error(f"Erro ao salvar configurações: {e}")
-        return False
+def get_google():
+    """Retorna a integração com o Google, importando e autenticando no primeiro uso"""
+    if st.session_state.google is None:
+        with startup_timer.measure('import google_integration'):
+            from google_integration import GoogleIntegration
+        with startup_timer.measure('GoogleIntegration (inicialização)'):
+            st.session_state.google = GoogleIntegration()
+        if DEBUG_MODE:
+            print(startup_timer.format_report())
+    return st.session_state.google
 
-def load_config_from_file():
-    """Carrega configurações do arquivo JSON"""
-    try:
-        if Path('config_data.json').exists():
-            with open('config_data.json', 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-            
-            # Atualizar listas globais
-            PROMOTORES.clear()
-            PROMOTORES.extend(config_data.get('promotores', []))
-            PDVS.clear()
-            PDVS.extend(config_data.get('pdvs', []))
-            
-            return True
-    except Exception as e:
-        st.warning(f"Não foi possível carregar configurações salvas: {e}")
+def conectar_google():
+    """Conecta ao Google Drive/Sheets (autentica novamente se já inicializado)"""
+    if st.session_state.google is None:
+        get_google()
+    else:
+        st.session_state.google.authenticate()
+    st.session_state.authenticated = True
+
+def cached_view(name, builder):
+    """
+    Retorna uma visão derivada dos registros, recalculada apenas
+    quando a versão do banco de dados muda
+    
+    Guarda no máximo VIEW_CACHE_MAX_ENTRIES visões por sessão,
+    descartando as usadas há mais tempo.
+    
+    Args:
+        name: Nome da visão
+        builder: Função que recebe o Database e calcula a visão
+    """
+    db = st.session_state.db
+    cache = st.session_state.setdefault('view_cache', OrderedDict())
+    entry = cache.get(name)
+    
+    if entry is None or entry[0] != db.version:
+        entry = (db.version, builder(db))
+        cache[name] = entry
+    cache.move_to_end(name)
+    
+    while len(cache) > VIEW_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
     
-    return False
+    return entry[1]
+
+def build_sidebar_stats(db):
+    """Calcula as métricas exibidas na barra lateral"""
+    return {
+        'total_visitas': db.count_records(),
+        'promotores_ativos': len({r.get('promotor') for r in db.records})
+    }
+
+def build_filter_options(db):
+    """Calcula as listas de promotores e PDVs usadas nos filtros"""
+    return {
+        'promotores': sorted({r['promotor'] for r in db.records}),
+        'pdvs': sorted({r['pdv'] for r in db.records})
+    }
 
 def show_admin_panel():
     """Painel administrativo"""
     st.markdown('<h2 class="sub-header">⚙️ Painel Administrativo</h2>', unsafe_allow_html=True)
     
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Links", "👥 Promotores", "📍 PDVs", "🗑️ Duplicados"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Links", "👥 Promotores", "📍 PDVs", "🗑️ Duplicados", "⏱️ Desempenho"])
     
     # TAB 1: Links
     with tab1:
@@ -142,7 +184,7 @@ def show_admin_panel():
         
         with col1:
             try:
-                spreadsheet_url = st.session_state.google.get_spreadsheet_url()
+                spreadsheet_url = get_google().get_spreadsheet_url()
                 st.markdown(f"""
                 ### 📊 Planilha Google Sheets
                 
@@ -159,7 +201,7 @@ def show_admin_panel():
         
         with col2:
             try:
-                drive_url = st.session_state.google.get_drive_folder_url()
+                drive_url = get_google().get_drive_folder_url()
                 st.markdown(f"""
                 ### 📁 Pasta Google Drive
                 
@@ -181,9 +223,7 @@ def show_admin_panel():
         st.markdown("#### ➕ Adicionar Promotor")
         new_promotor = st.text_input("Nome do promotor", key="new_promotor")
         if st.button("Adicionar Promotor"):
-            if new_promotor and new_promotor not in PROMOTORES:
-                PROMOTORES.append(new_promotor)
-                save_config_to_file()
+            if new_promotor and config_registry.add_promotor(new_promotor):
                 st.success(f"Promotor '{new_promotor}' adicionado!")
                 st.rerun()
             else:
@@ -192,19 +232,18 @@ def show_admin_panel():
         st.divider()
         
         st.markdown("#### ➖ Remover Promotor")
-        if len(PROMOTORES) > 0:
+        promotores = config_registry.promotores
+        if len(promotores) > 0:
             promotor_to_remove = st.selectbox(
                 "Selecione o promotor para remover",
-                PROMOTORES,
+                promotores,
                 key="remove_promotor"
             )
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("🗑️ Remover Promotor", type="primary", use_container_width=True):
-                    if promotor_to_remove in PROMOTORES:
-                        PROMOTORES.remove(promotor_to_remove)
-                        save_config_to_file()
+                    if config_registry.remove_promotor(promotor_to_remove):
                         st.success(f"Promotor '{promotor_to_remove}' removido!")
                         st.rerun()
         else:
@@ -213,7 +252,7 @@ def show_admin_panel():
         st.divider()
         
         st.markdown("#### 📋 Promotores Cadastrados")
-        for idx, promotor in enumerate(PROMOTORES, 1):
+        for idx, promotor in enumerate(config_registry.promotores, 1):
             st.write(f"{idx}. {promotor}")
     
     # TAB 3: PDVs
@@ -223,9 +262,7 @@ def show_admin_panel():
         st.markdown("#### ➕ Adicionar PDV")
         new_pdv = st.text_input("Nome do PDV", key="new_pdv")
         if st.button("Adicionar PDV"):
-            if new_pdv and new_pdv not in PDVS:
-                PDVS.append(new_pdv)
-                save_config_to_file()
+            if new_pdv and config_registry.add_pdv(new_pdv):
                 st.success(f"PDV '{new_pdv}' adicionado!")
                 st.rerun()
             else:
@@ -234,19 +271,18 @@ def show_admin_panel():
         st.divider()
         
         st.markdown("#### ➖ Remover PDV")
-        if len(PDVS) > 0:
+        pdvs = config_registry.pdvs
+        if len(pdvs) > 0:
             pdv_to_remove = st.selectbox(
                 "Selecione o PDV para remover",
-                PDVS,
+                pdvs,
                 key="remove_pdv"
             )
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("🗑️ Remover PDV", type="primary", use_container_width=True):
-                    if pdv_to_remove in PDVS:
-                        PDVS.remove(pdv_to_remove)
-                        save_config_to_file()
+                    if config_registry.remove_pdv(pdv_to_remove):
                         st.success(f"PDV '{pdv_to_remove}' removido!")
                         st.rerun()
         else:
@@ -254,9 +290,49 @@ def show_admin_panel():
         
         st.divider()
         
+        st.markdown("#### 📍 Coordenadas")
+        if pdvs:
+            pdv_coord = st.selectbox("PDV", pdvs, key="coord_pdv")
+            lat_atual, lon_atual = config_registry.pdv_locations.get(pdv_coord, (None, None))
+            col1, col2 = st.columns(2)
+            with col1:
+                lat = st.number_input("Latitude", value=lat_atual, format="%.6f", key=f"coord_lat_{pdv_coord}")
+            with col2:
+                lon = st.number_input("Longitude", value=lon_atual, format="%.6f", key=f"coord_lon_{pdv_coord}")
+            if st.button("💾 Salvar Coordenadas"):
+                valido, erro = validate_coordinates(lat, lon)
+                if valido and config_registry.set_pdv_location(pdv_coord, lat, lon):
+                    st.success(f"Coordenadas de '{pdv_coord}' salvas!")
+                else:
+                    st.error(erro or "PDV não encontrado")
+        
+        arquivo_coords = st.file_uploader(
+            "Importar CSV (colunas: pdv, latitude, longitude)",
+            type=['csv'],
+            key="coords_csv"
+        )
+        if arquivo_coords is not None and st.button("📥 Importar Coordenadas"):
+            coords = pd.read_csv(arquivo_coords)
+            if not {'pdv', 'latitude', 'longitude'} <= set(coords.columns):
+                st.error("O CSV deve ter as colunas pdv, latitude e longitude")
+            else:
+                validas = {
+                    linha['pdv']: (linha['latitude'], linha['longitude'])
+                    for linha in coords.to_dict('records')
+                    if validate_coordinates(linha['latitude'], linha['longitude'])[0]
+                }
+                atualizados = config_registry.set_pdv_locations(validas)
+                st.success(f"{atualizados} PDV(s) atualizados de {len(coords)} linha(s)")
+        
+        st.divider()
+        
         st.markdown("#### 📋 PDVs Cadastrados")
-        for idx, pdv in enumerate(PDVS, 1):
-            st.write(f"{idx}. {pdv}")
+        locais = config_registry.pdv_locations
+        for idx, pdv in enumerate(config_registry.pdvs, 1):
+            if pdv in locais:
+                st.write(f"{idx}. {pdv} — 📍 {locais[pdv][0]:.5f}, {locais[pdv][1]:.5f}")
+            else:
+                st.write(f"{idx}. {pdv}")
     
     # TAB 4: Duplicados
     with tab4:
@@ -265,7 +341,7 @@ def show_admin_panel():
         if st.button("🔍 Buscar Duplicados", type="primary"):
             with st.spinner("Procurando duplicados..."):
                 try:
-                    duplicates = st.session_state.google.find_duplicates()
+                    duplicates = get_google().find_duplicates()
                     
                     if duplicates:
                         st.warning(f"⚠️ Encontrados {len(duplicates)} check-ins duplicados")
@@ -287,13 +363,90 @@ def show_admin_panel():
                                     st.write(f"Linha: {dup['duplicate']['row_number']}")
                                     
                                     if st.button("🗑️ Remover", key=f"remove_dup_{idx}"):
-                                        if st.session_state.google.delete_row_from_sheet(dup['duplicate']['row_number']):
+                                        if get_google().delete_row_from_sheet(dup['duplicate']['row_number']):
                                             st.success("Removido!")
                                             st.rerun()
                     else:
                         st.success("✅ Nenhum duplicado encontrado!")
                 except Exception as e:
                     st.error(f"Erro ao buscar duplicados: {e}")
+    
+    # TAB 5: Desempenho
+    with tab5:
+        st.subheader("Latência das Operações")
+        
+        if not metrics.enabled:
+            st.info("Coleta de métricas desativada (METRICS_ENABLED = False)")
+        
+        resumo = metrics.snapshot()
+        if resumo:
+            st.dataframe(
+                pd.DataFrame(resumo).rename(columns={
+                    'operacao': 'Operação',
+                    'chamadas': 'Chamadas',
+                    'erros': 'Erros',
+                    'total_ms': 'Total (ms)',
+                    'media_ms': 'Média (ms)',
+                    'p50_ms': 'p50 (ms)',
+                    'p95_ms': 'p95 (ms)',
+                    'max_ms': 'Máx (ms)'
+                }).round(1),
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info("Nenhuma operação medida neste processo ainda")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button(
+                "📥 Baixar (Prometheus)",
+                data=metrics.to_prometheus(),
+                file_name="metrics.prom",
+                mime="text/plain"
+            )
+        with col2:
+            if st.button("💾 Gravar arquivo .prom"):
+                st.success(f"Métricas gravadas em {metrics.write_prometheus()}")
+        with col3:
+            if st.button("🔄 Zerar métricas"):
+                metrics.reset()
+                st.rerun()
+        
+        st.markdown("---")
+        st.subheader("Perfis de Execução")
+        
+        perfis = run_profiler.list_profiles()
+        if not DEBUG_MODE:
+            st.info("Ative DEBUG_MODE em config.py para perfilar cada execução das páginas")
+        if perfis:
+            escolhido = st.selectbox(
+                "Perfil",
+                perfis,
+                format_func=lambda path: path.stem
+            )
+            conteudo = escolhido.read_text(encoding='utf-8')
+            st.code(conteudo[:5000], language=None)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "📥 Baixar perfil",
+                    data=conteudo,
+                    file_name=escolhido.name,
+                    mime="text/plain"
+                )
+            with col2:
+                arquivo_zip = BytesIO()
+                with zipfile.ZipFile(arquivo_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    for path in perfis:
+                        zf.write(path, path.name)
+                st.download_button(
+                    "📦 Baixar todos (.zip)",
+                    data=arquivo_zip.getvalue(),
+                    file_name="perfis.zip",
+                    mime="application/zip"
+                )
 
 def main():
     # Header
@@ -306,7 +459,7 @@ def main():
         st.markdown("---")
         
         # Menu principal
-        opcoes_menu = ["📝 Novo Check-in", "📊 Ver Registros", "📸 Galeria de Fotos", "⚙️ Configurações"]
+        opcoes_menu = ["📝 Novo Check-in", "📊 Ver Registros", "📑 Relatórios", "📸 Galeria de Fotos", "⚙️ Configurações"]
         
         # Adicionar painel admin se autenticado
         if st.session_state.authenticated:
@@ -315,6 +468,7 @@ def main():
         menu = st.radio(
             "Menu Principal",
             opcoes_menu,
+            key="menu",
             label_visibility="collapsed"
         )
         
@@ -322,9 +476,9 @@ def main():
         
         # Estatísticas rápidas
         st.markdown("### 📈 Estatísticas")
-        registros = st.session_state.db.get_all_records()
-        st.metric("Total de Visitas", len(registros))
-        st.metric("Promotores Ativos", len(set([r['promotor'] for r in registros])))
+        stats = cached_view('sidebar_stats', build_sidebar_stats)
+        st.metric("Total de Visitas", stats['total_visitas'])
+        st.metric("Promotores Ativos", stats['promotores_ativos'])
         
         # Status da conexão Google
         st.markdown("---")
@@ -334,8 +488,7 @@ def main():
             st.warning("⚠️ Google Drive desconectado")
             if st.button("🔗 Conectar Google"):
                 try:
-                    st.session_state.google.authenticate()
-                    st.session_state.authenticated = True
+                    conectar_google()
                     st.success("Conectado com sucesso!")
                     st.rerun()
                 except Exception as e:
@@ -346,6 +499,8 @@ def main():
         novo_checkin()
     elif menu == "📊 Ver Registros":
         ver_registros()
+    elif menu == "📑 Relatórios":
+        relatorios()
     elif menu == "📸 Galeria de Fotos":
         galeria_fotos()
     elif menu == "⚙️ Configurações":
@@ -353,6 +508,54 @@ def main():
     elif menu == "🔧 Painel Admin":
         show_admin_panel()
 
+def obter_posicao():
+    """
+    Obtém a posição do dispositivo (automática se streamlit-js-eval
+    estiver instalado, senão informada manualmente)
+    
+    Returns:
+        Tupla (lat, lon) ou None
+    """
+    if get_geolocation is not None:
+        local = get_geolocation()
+        if local and local.get('coords'):
+            return (local['coords']['latitude'], local['coords']['longitude'])
+    
+    with st.expander("📍 Minha localização"):
+        col1, col2 = st.columns(2)
+        with col1:
+            lat = st.number_input("Latitude", min_value=-90.0, max_value=90.0,
+                                  value=None, format="%.6f", key="geo_lat")
+        with col2:
+            lon = st.number_input("Longitude", min_value=-180.0, max_value=180.0,
+                                  value=None, format="%.6f", key="geo_lon")
+    if lat is None or lon is None:
+        return None
+    return (lat, lon)
+
+def conferir_deslocamento(promotor, pdv, valor):
+    """
+    Compara o valor de deslocamento com a distância desde o último PDV
+    visitado hoje pelo promotor
+    
+    Returns:
+        Mensagem de alerta ou None
+    """
+    locais = config_registry.pdv_locations
+    if pdv not in locais:
+        return None
+    
+    hoje = datetime.now().strftime("%Y-%m-%d")
+    anterior = next(st.session_state.db.iter_records(data=hoje, promotor=promotor), None)
+    if anterior is None or anterior['pdv'] not in locais or anterior['pdv'] == pdv:
+        return None
+    
+    distancia = haversine_km(*locais[anterior['pdv']], *locais[pdv])
+    compativel, mensagem = check_valor_deslocamento(valor, distancia)
+    if compativel:
+        return None
+    return f"{mensagem} desde {anterior['pdv']}"
+
 def novo_checkin():
     """Tela de novo check-in"""
     st.markdown('<h2 class="sub-header">📝 Novo Check-in</h2>', unsafe_allow_html=True)
@@ -364,7 +567,7 @@ def novo_checkin():
         
         promotor = st.selectbox(
             "Nome do Promotor",
-            options=[""] + PROMOTORES,
+            options=[""] + config_registry.promotores,
             key="promotor_select"
         )
         
@@ -373,9 +576,24 @@ def novo_checkin():
             if novo_promotor:
                 promotor = novo_promotor
         
+        opcoes_pdv = config_registry.pdvs
+        distancias = {}
+        if ENABLE_GEOLOCATION:
+            posicao = obter_posicao()
+            if posicao:
+                proximos = config_registry.pdv_index().nearest(*posicao)
+                distancias = dict(proximos)
+                if proximos:
+                    # PDVs mais próximos primeiro
+                    sugeridos = [nome for nome, _ in proximos]
+                    opcoes_pdv = sugeridos + [p for p in opcoes_pdv if p not in distancias]
+                else:
+                    st.info(f"Nenhum PDV cadastrado num raio de {GEO_MAX_DISTANCE_KM:.0f} km")
+        
         pdv = st.selectbox(
             "PDV",
-            options=[""] + PDVS,
+            options=[""] + opcoes_pdv,
+            format_func=lambda nome: f"📍 {nome} ({distancias[nome]:.1f} km)" if nome in distancias else nome,
             key="pdv_select"
         )
         
@@ -392,6 +610,11 @@ def novo_checkin():
             format="%.2f"
         )
         
+        if ENABLE_GEOLOCATION and promotor and pdv:
+            aviso = conferir_deslocamento(promotor, pdv, valor_deslocamento)
+            if aviso:
+                st.warning(f"⚠️ {aviso}")
+        
         num_entradas = st.number_input(
             "Número de Entradas",
             min_value=1,
@@ -440,29 +663,40 @@ def novo_checkin():
                         'valor_deslocamento': valor_deslocamento,
                         'num_entradas': num_entradas,
                         'observacoes': observacoes,
-                        'fotos': []
+                        # Fotos gravadas no armazenamento local antes do envio: um
+                        # reinício no meio da tarefa não as perde
+                        'fotos': [photo_store.put(file.getvalue()) for file in uploaded_files or []]
                     }
                     
-                    if uploaded_files and st.session_state.authenticated:
-                        with st.spinner("📤 Fazendo upload das fotos..."):
-                            folder_path = f"{promotor}/{data_hora.strftime('%Y-%m-%d')}"
-                            foto_links = []
-                            
-                            for idx, file in enumerate(uploaded_files):
-                                file_name = f"{pdv}_{idx+1:03d}.jpg"
-                                link = st.session_state.google.upload_photo(
-                                    file, 
-                                    folder_path, 
-                                    file_name
-                                )
-                                foto_links.append(link)
-                            
-                            registro['fotos'] = foto_links
+                    if st.session_state.authenticated:
+                        registro['sync_status'] = STATUS_PENDENTE
+                    else:
+                        # Sem conexão: as fotos aguardam o envio em lote
+                        registro['sync_status'] = STATUS_OFFLINE
                     
-                    st.session_state.db.add_record(registro)
+                    # Gravação local imediata; envio ao Google fica em segundo plano
+                    try:
+                        record_id = st.session_state.db.add_record(registro)
+                    except Exception:
+                        for ref in registro['fotos']:
+                            photo_store.release(ref)
+                        raise
                     
                     if st.session_state.authenticated:
-                        st.session_state.google.add_to_sheet(registro)
+                        fotos = [
+                            (f"{pdv}_{idx+1:03d}.jpg", file.getvalue())
+                            for idx, file in enumerate(uploaded_files or [])
+                        ]
+                        job_id = sync_worker.submit(
+                            st.session_state.db,
+                            get_google(),
+                            record_id,
+                            fotos,
+                            f"{promotor}/{data_hora.strftime('%Y-%m-%d')}",
+                            descricao=f"{promotor} - {pdv} ({data_hora.strftime('%H:%M')})",
+                            local_refs=list(registro['fotos'])
+                        )
+                        st.session_state.setdefault('sync_jobs', []).append(job_id)
                     
                     st.markdown('<div class="success-box">✅ Check-in registrado com sucesso!</div>', unsafe_allow_html=True)
                     
@@ -472,11 +706,83 @@ def novo_checkin():
                     st.write(f"**Data/Hora:** {data_hora.strftime('%d/%m/%Y %H:%M')}")
                     st.write(f"**Valor:** {format_currency(valor_deslocamento)}")
                     st.write(f"**Entradas:** {num_entradas}")
-                    if uploaded_files:
-                        st.write(f"**Fotos:** {len(uploaded_files)} foto(s) enviada(s)")
+                    if uploaded_files and st.session_state.authenticated:
+                        st.write(f"**Fotos:** {len(uploaded_files)} foto(s) na fila de envio")
+                    elif uploaded_files:
+                        st.write(f"**Fotos:** {len(uploaded_files)} foto(s) guardadas no dispositivo até a conexão com o Google")
                     
                 except Exception as e:
                     st.error(f"❌ Erro ao registrar check-in: {str(e)}")
+    
+    if st.session_state.get('sync_jobs'):
+        mostrar_status_sincronizacao()
+
+@st.fragment(run_every=SYNC_STATUS_REFRESH_SECONDS)
+def mostrar_status_sincronizacao():
+    """Painel com o andamento do envio dos check-ins (atualizado periodicamente)"""
+    jobs = sync_worker.get_jobs(st.session_state.get('sync_jobs', []))
+    if not jobs:
+        return
+    
+    st.markdown("---")
+    st.markdown("#### 🔄 Sincronização com o Google")
+    
+    for job in reversed(jobs):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.write(f"**{job['descricao']}**")
+            if job['fotos_total']:
+                st.progress(
+                    job['fotos_enviadas'] / job['fotos_total'],
+                    text=f"{job['fotos_enviadas']}/{job['fotos_total']} foto(s)"
+                )
+            if job['erro']:
+                st.caption(f"❌ {job['erro']}")
+        with col2:
+            st.write(STATUS_LABELS[job['status']])
+
+def mostrar_foto(foto, legenda):
+    """Exibe o link de uma foto do Drive ou a própria foto, se ainda estiver só no dispositivo"""
+    if not is_local_ref(foto):
+        st.markdown(f"[{legenda}]({foto})")
+        return
+    conteudo = photo_store.get(foto)
+    if conteudo is None:
+        st.caption(f"{legenda}: foto local indisponível")
+    else:
+        st.image(conteudo, caption=f"{legenda} (aguardando envio)", width=200)
+
+def mostrar_detalhes_registro(registro, key):
+    """Exibe os detalhes de um registro"""
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.write(f"**Promotor:** {registro['promotor']}")
+        st.write(f"**PDV:** {registro['pdv']}")
+        st.write(f"**Data:** {registro['data']}")
+        st.write(f"**Hora:** {registro['hora']}")
+        st.write(f"**Valor Deslocamento:** {format_currency(registro['valor_deslocamento'])}")
+        st.write(f"**Número de Entradas:** {registro.get('num_entradas', 1)}")
+        if registro.get('observacoes'):
+            st.write(f"**Observações:** {registro['observacoes']}")
+        for suspeita in registro.get('fotos_suspeitas') or []:
+            original = st.session_state.db.get_record_by_id(suspeita['registro'])
+            origem = (
+                f"{original['promotor']} - {original['pdv']} em {original['data']} {original['hora']}"
+                if original else "um registro removido"
+            )
+            st.warning(
+                f"⚠️ A foto {suspeita['foto'] + 1} é quase idêntica à foto "
+                f"{suspeita['foto_registro'] + 1} de {origem} "
+                f"({suspeita['distancia']} bits de diferença)"
+            )
+    
+    with col2:
+        if photo_count(registro):
+            st.write(f"**Fotos:** {photo_count(registro)} foto(s)")
+            if st.button(f"Ver Fotos", key=f"ver_fotos_{key}"):
+                for foto_link in photo_list(registro):
+                    mostrar_foto(foto_link, "📸 Abrir Foto")
 
 def ver_registros():
     """Tela de visualização de registros"""
@@ -487,89 +793,191 @@ def ver_registros():
     with col1:
         filtro_data = st.date_input("Filtrar por Data", value=None)
     
+    opcoes_filtro = cached_view('filter_options', build_filter_options)
+    
     with col2:
-        registros = st.session_state.db.get_all_records()
-        promotores_unicos = ["Todos"] + list(set([r['promotor'] for r in registros]))
+        promotores_unicos = ["Todos"] + opcoes_filtro['promotores']
         filtro_promotor = st.selectbox("Filtrar por Promotor", promotores_unicos)
     
     with col3:
-        pdvs_unicos = ["Todos"] + list(set([r['pdv'] for r in registros]))
+        pdvs_unicos = ["Todos"] + opcoes_filtro['pdvs']
         filtro_pdv = st.selectbox("Filtrar por PDV", pdvs_unicos)
     
-    registros_filtrados = registros.copy()
-    
-    if filtro_data:
-        data_str = filtro_data.strftime("%Y-%m-%d")
-        registros_filtrados = [r for r in registros_filtrados if r['data'] == data_str]
-    
-    if filtro_promotor != "Todos":
-        registros_filtrados = [r for r in registros_filtrados if r['promotor'] == filtro_promotor]
+    filtros = {
+        'data': filtro_data.strftime("%Y-%m-%d") if filtro_data else None,
+        'promotor': filtro_promotor if filtro_promotor != "Todos" else None,
+        'pdv': filtro_pdv if filtro_pdv != "Todos" else None
+    }
+    chave_filtros = f"{filtros['data']}|{filtros['promotor']}|{filtros['pdv']}"
     
-    if filtro_pdv != "Todos":
-        registros_filtrados = [r for r in registros_filtrados if r['pdv'] == filtro_pdv]
+    totais = cached_view(
+        f"totais:{chave_filtros}",
+        lambda db: db.summarize_records(**filtros)
+    )
     
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown('<div class="stat-card"><h4>📝 Total de Registros</h4><h2>{}</h2></div>'.format(len(registros_filtrados)), unsafe_allow_html=True)
+        st.markdown('<div class="stat-card"><h4>📝 Total de Registros</h4><h2>{}</h2></div>'.format(totais['total_registros']), unsafe_allow_html=True)
     
     with col2:
-        total_deslocamento = sum([r['valor_deslocamento'] for r in registros_filtrados])
-        st.markdown('<div class="stat-card"><h4>💰 Total Deslocamento</h4><h2>{}</h2></div>'.format(format_currency(total_deslocamento)), unsafe_allow_html=True)
+        st.markdown('<div class="stat-card"><h4>💰 Total Deslocamento</h4><h2>{}</h2></div>'.format(format_currency(totais['total_deslocamento'])), unsafe_allow_html=True)
     
     with col3:
-        total_entradas = sum([r.get('num_entradas', 1) for r in registros_filtrados])
-        st.markdown('<div class="stat-card"><h4>🔢 Total Entradas</h4><h2>{}</h2></div>'.format(total_entradas), unsafe_allow_html=True)
+        st.markdown('<div class="stat-card"><h4>🔢 Total Entradas</h4><h2>{}</h2></div>'.format(totais['total_entradas']), unsafe_allow_html=True)
     
     with col4:
-        total_fotos = sum([len(r.get('fotos', [])) for r in registros_filtrados])
-        st.markdown('<div class="stat-card"><h4>📸 Total Fotos</h4><h2>{}</h2></div>'.format(total_fotos), unsafe_allow_html=True)
+        st.markdown('<div class="stat-card"><h4>📸 Total Fotos</h4><h2>{}</h2></div>'.format(totais['total_fotos']), unsafe_allow_html=True)
     
     st.markdown("---")
     st.markdown("### 📋 Detalhes dos Registros")
     
-    if not registros_filtrados:
+    if totais['total_registros'] == 0:
         st.info("ℹ️ Nenhum registro encontrado com os filtros aplicados.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        modo = st.radio("Visualização", ["Tabela", "Detalhada"], horizontal=True)
+    with col2:
+        tamanho_pagina = st.selectbox("Registros por página", [10, 25, 50, 100], index=1)
+    
+    # Pilha de cursores: reinicia quando filtros ou tamanho da página mudam
+    chave_paginacao = f"{chave_filtros}|{tamanho_pagina}"
+    if st.session_state.get('registros_paginacao') != chave_paginacao:
+        st.session_state.registros_paginacao = chave_paginacao
+        st.session_state.registros_cursores = [None]
+    cursores = st.session_state.registros_cursores
+    
+    pagina, proximo_cursor = st.session_state.db.query_records(
+        limit=tamanho_pagina,
+        before=cursores[-1],
+        **filtros
+    )
+    
+    if modo == "Tabela":
+        tabela = pd.DataFrame({
+            'Data': format_date_column([r['data'] for r in pagina]),
+            'Hora': [r['hora'] for r in pagina],
+            'Promotor': [r['promotor'] for r in pagina],
+            'PDV': [r['pdv'] for r in pagina],
+            'Deslocamento': format_currency_column([r['valor_deslocamento'] for r in pagina]),
+            'Entradas': [r.get('num_entradas', 1) for r in pagina],
+            'Fotos': [photo_count(r) for r in pagina]
+        })
+        if ENABLE_IMAGE_RECOGNITION:
+            tabela['Alerta'] = ['⚠️ Foto repetida' if r.get('fotos_suspeitas') else '' for r in pagina]
+        
+        evento = st.dataframe(
+            tabela,
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key=f"tabela_registros_{len(cursores)}"
+        )
+        
+        selecionadas = evento.selection.rows
+        if selecionadas:
+            registro = pagina[selecionadas[0]]
+            st.markdown(f"#### 📍 {registro['promotor']} - {registro['pdv']} | {registro['data']} {registro['hora']}")
+            mostrar_detalhes_registro(registro, registro.get('id', 'selecionado'))
     else:
-        for idx, registro in enumerate(sorted(registros_filtrados, key=lambda x: f"{x['data']} {x['hora']}", reverse=True)):
-            with st.expander(f"📍 {registro['promotor']} - {registro['pdv']} | {registro['data']} {registro['hora']}"):
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.write(f"**Promotor:** {registro['promotor']}")
-                    st.write(f"**PDV:** {registro['pdv']}")
-                    st.write(f"**Data:** {registro['data']}")
-                    st.write(f"**Hora:** {registro['hora']}")
-                    st.write(f"**Valor Deslocamento:** {format_currency(registro['valor_deslocamento'])}")
-                    st.write(f"**Número de Entradas:** {registro.get('num_entradas', 1)}")
-                    if registro.get('observacoes'):
-                        st.write(f"**Observações:** {registro['observacoes']}")
-                
-                with col2:
-                    if registro.get('fotos'):
-                        st.write(f"**Fotos:** {len(registro['fotos'])} foto(s)")
-                        if st.button(f"Ver Fotos", key=f"ver_fotos_{idx}"):
-                            for foto_link in registro['fotos']:
-                                st.markdown(f"[📸 Abrir Foto]({foto_link})")
+        for registro in pagina:
+            alerta = "⚠️ " if registro.get('fotos_suspeitas') else ""
+            with st.expander(f"{alerta}📍 {registro['promotor']} - {registro['pdv']} | {registro['data']} {registro['hora']}"):
+                mostrar_detalhes_registro(registro, registro.get('id'))
+    
+    total_paginas = -(-totais['total_registros'] // tamanho_pagina)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("⬅️ Anterior", disabled=len(cursores) == 1):
+            cursores.pop()
+            st.rerun()
+    
+    with col2:
+        st.markdown(f"<p style='text-align: center;'>Página {len(cursores)} de {total_paginas}</p>", unsafe_allow_html=True)
+    
+    with col3:
+        if st.button("Próxima ➡️", disabled=proximo_cursor is None):
+            cursores.append(proximo_cursor)
+            st.rerun()
+
+def relatorios():
+    """Tela de relatórios por período"""
+    st.markdown('<h2 class="sub-header">📑 Relatórios</h2>', unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        tipo = st.selectbox("Período", REPORT_TYPES)
+    
+    inicio = fim = None
+    if tipo == "Customizado":
+        with col2:
+            inicio = st.date_input("Data inicial", value=datetime.now().date())
+        with col3:
+            fim = st.date_input("Data final", value=datetime.now().date())
+    
+    relatorio = st.session_state.db.get_reports().generate_report(tipo, inicio, fim)
+    totais = relatorio['totais']
+    
+    st.caption(f"Período: {relatorio['inicio']} a {relatorio['fim']}")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Visitas", totais['visitas'])
+    col2.metric("Deslocamento", format_currency(totais['total_deslocamento']))
+    col3.metric("Entradas", totais['total_entradas'])
+    col4.metric("Fotos", totais['total_fotos'])
+    
+    if not totais['visitas']:
+        st.info(MESSAGES['no_records'])
+        return
+    
+    st.markdown("### 💰 Deslocamento por Promotor")
+    folha = pd.DataFrame([
+        {'Promotor': promotor, 'Visitas': dados['visitas'], 'Deslocamento': dados['total_deslocamento']}
+        for promotor, dados in relatorio['por_promotor'].items()
+    ])
+    st.dataframe(folha, hide_index=True, use_container_width=True)
+    st.download_button(
+        "⬇️ Baixar CSV",
+        folha.to_csv(index=False).encode('utf-8'),
+        file_name=f"deslocamento_{relatorio['inicio']}_{relatorio['fim']}.csv",
+        mime="text/csv"
+    )
+    
+    st.markdown("### 🏪 Visitas por PDV")
+    por_pdv = pd.DataFrame([
+        {
+            'PDV': pdv,
+            'Visitas': dados['visitas'],
+            'Entradas': dados['total_entradas'],
+            'Fotos': dados['total_fotos']
+        }
+        for pdv, dados in relatorio['por_pdv'].items()
+    ])
+    st.dataframe(por_pdv, hide_index=True, use_container_width=True)
 
 def galeria_fotos():
     """Tela de galeria de fotos"""
     st.markdown('<h2 class="sub-header">📸 Galeria de Fotos</h2>', unsafe_allow_html=True)
     
-    registros = st.session_state.db.get_all_records()
-    registros_com_fotos = [r for r in registros if r.get('fotos')]
+    # Já vem do mais recente ao mais antigo, sem copiar nem ordenar a lista
+    registros_com_fotos = [r for r in st.session_state.db.iter_records() if photo_count(r)]
     
     if not registros_com_fotos:
         st.warning("⚠️ Nenhuma foto encontrada.")
         return
     
-    for registro in sorted(registros_com_fotos, key=lambda x: f"{x['data']} {x['hora']}", reverse=True):
+    for registro in registros_com_fotos:
         st.markdown(f"### 📍 {registro['promotor']} - {registro['pdv']}")
         st.write(f"**Data:** {registro['data']} | **Hora:** {registro['hora']}")
         
-        for idx, foto_link in enumerate(registro['fotos']):
-            st.markdown(f"[📸 Foto {idx+1}]({foto_link})")
+        for idx, foto_link in enumerate(photo_list(registro)):
+            mostrar_foto(foto_link, f"📸 Foto {idx+1}")
         
         st.markdown("---")
 
@@ -577,23 +985,50 @@ def configuracoes():
     """Tela de configurações"""
     st.markdown('<h2 class="sub-header">⚙️ Configurações</h2>', unsafe_allow_html=True)
     
+    pendentes_offline = cached_view(
+        'pendentes_offline',
+        lambda db: len(sync_worker.offline_records(db))
+    )
+    
     if st.session_state.authenticated:
         st.success("✅ Conectado ao Google Drive")
         
         if st.button("🔓 Desconectar"):
             st.session_state.authenticated = False
             st.rerun()
+        
+        if pendentes_offline:
+            st.info(f"📴 {pendentes_offline} check-in(s) registrados sem conexão aguardando envio")
+            if st.button("📤 Enviar check-ins pendentes"):
+                job_ids = sync_worker.submit_offline(st.session_state.db, get_google())
+                st.session_state.setdefault('sync_jobs', []).extend(job_ids)
     else:
         st.warning("⚠️ Não conectado ao Google Drive")
         
         if st.button("🔗 Conectar"):
             try:
-                st.session_state.google.authenticate()
-                st.session_state.authenticated = True
+                conectar_google()
                 st.success("✅ Conectado!")
                 st.rerun()
             except Exception as e:
                 st.error(f"❌ Erro: {str(e)}")
+        
+        if pendentes_offline:
+            st.info(f"📴 {pendentes_offline} check-in(s) guardados no dispositivo; conecte-se para enviá-los")
+    
+    uso = photo_store.usage()
+    st.caption(
+        f"📁 Fotos locais: {uso['pendentes']} aguardando envio, {uso['enviadas']} já enviadas "
+        f"({uso['bytes'] / 1024 / 1024:.1f} de {PHOTO_STORE_MAX_MB} MB)"
+    )
+    
+    if st.session_state.get('sync_jobs'):
+        mostrar_status_sincronizacao()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if DEBUG_MODE:
+        # O rótulo do menu já está na sessão antes de main() executar
+        with run_profiler.profile(st.session_state.get("menu", "📝 Novo Check-in")):
+            main()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Benchmark do Database com históricos sintéticos
+
+Gera bancos com 10k/100k/1M registros, mede as operações principais
+(carga a frio, add_record, consultas, estatísticas, exportação e backup),
+grava os resultados em JSON e compara com uma linha de base salva,
+falhando se alguma operação ficar mais lenta que a tolerância.
+
+A linha de base é gravada uma única vez e não é regravada junto com
+mudanças de código (só com --force, numa máquina nova, por exemplo).
+
+Uso:
+    python benchmarks/bench_database.py [--sizes 10000 100000 1000000]
+    python benchmarks/bench_database.py --save-baseline --rounds 5
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import PROMOTORES, PDVS, BENCH_REGRESSION_TOLERANCE
+from database import Database
+from record_id import new_record_id
+from storage import write_json
+
+RESULTS_PATH = ROOT / 'benchmarks' / 'results' / 'bench_database.json'
+BASELINE_PATH = ROOT / 'benchmarks' / 'baseline_database.json'
+
+# Operações abaixo deste tempo variam demais para comparação (segundos)
+MIN_COMPARABLE_SECONDS = 0.001
+
+
+def generate_records(count, days=365, seed=42):
+    """
+    Gera registros sintéticos em ordem cronológica
+
+    Args:
+        count: Quantidade de registros
+        days: Quantidade de dias cobertos, terminando hoje
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Lista de registros no formato do Database
+    """
+    rng = random.Random(seed)
+    inicio = date.today() - timedelta(days=days - 1)
+    por_dia = max(1, count // days)
+    registros = []
+
+    for i in range(count):
+        dia = inicio + timedelta(days=min(i // por_dia, days - 1))
+        segundos = rng.randrange(6 * 3600, 20 * 3600)
+        hora = f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+        promotor = rng.choice(PROMOTORES)
+        registro = {
+            'data': dia.isoformat(),
+            'hora': hora,
+            'promotor': promotor,
+            'pdv': rng.choice(PDVS),
+            'valor_deslocamento': round(rng.uniform(0, 120), 2),
+            'num_entradas': rng.randint(1, 3),
+            'observacoes': '',
+            'fotos': [
+                f"https://drive.google.com/file/d/{rng.getrandbits(96):024x}/view?usp=drivesdk"
+                for _ in range(rng.randint(0, 3))
+            ],
+            'timestamp': f"{dia.isoformat()}T{hora}"
+        }
+        registro['id'] = new_record_id(registro)
+        registros.append(registro)
+
+    registros.sort(key=lambda r: r['id'])
+    return registros
+
+
+def measure(func, repeat=1):
+    """
+    Executa uma função e retorna a mediana dos tempos
+
+    Args:
+        func: Função sem argumentos
+        repeat: Quantidade de execuções
+
+    Returns:
+        Tempo mediano em segundos
+    """
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def run_size(count, repeat, adds):
+    """
+    Mede todas as operações para um tamanho de histórico
+
+    Args:
+        count: Quantidade de registros
+        repeat: Execuções por operação de leitura
+        adds: Quantidade de add_record medidos
+
+    Returns:
+        Dicionário operação -> segundos
+    """
+    registros = generate_records(count)
+    amostra = registros[count // 2]
+    fim = date.fromisoformat(registros[-1]['data'])
+    inicio_semana = (fim - timedelta(days=6)).isoformat()
+    resultado = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        db_path = workdir / 'local_backup.json'
+        write_json(db_path, registros)
+        del registros
+
+        inicio = time.perf_counter()
+        db = Database(db_path)
+        resultado['cold_load'] = time.perf_counter() - inicio
+
+        resultado['get_record_by_id'] = measure(lambda: db.get_record_by_id(amostra['id']), repeat)
+        resultado['get_records_by_date'] = measure(lambda: db.get_records_by_date(amostra['data']), repeat)
+        resultado['get_records_by_promotor'] = measure(lambda: db.get_records_by_promotor(amostra['promotor']), repeat)
+        resultado['get_records_by_pdv'] = measure(lambda: db.get_records_by_pdv(amostra['pdv']), repeat)
+        resultado['get_records_by_date_range'] = measure(
+            lambda: db.get_records_by_date_range(inicio_semana, fim.isoformat()), repeat
+        )
+        resultado['get_statistics_first'] = measure(db.get_statistics)
+        resultado['get_statistics'] = measure(db.get_statistics, repeat)
+        resultado['export_to_csv'] = measure(lambda: db.export_to_csv(workdir / 'export.csv'))
+        resultado['backup_database'] = measure(lambda: db.backup_database(workdir / 'backup'))
+
+        novos = generate_records(adds, days=1, seed=7)
+        for registro in novos:
+            registro.pop('id')
+        iterador = iter(novos)
+        resultado['add_record'] = measure(lambda: db.add_record(dict(next(iterador))), adds)
+
+    return resultado
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compara os resultados com a linha de base
+
+    Args:
+        results: Dicionário tamanho -> operação -> segundos
+        baseline: Mesmo formato, da execução de referência
+        tolerance: Aumento relativo aceito (0.25 = 25%)
+
+    Returns:
+        Lista de mensagens de regressão
+    """
+    regressoes = []
+    for size, operacoes in results.items():
+        for nome, segundos in operacoes.items():
+            referencia = baseline.get(size, {}).get(nome)
+            if referencia is None or referencia < MIN_COMPARABLE_SECONDS:
+                continue
+            if segundos > referencia * (1 + tolerance):
+                regressoes.append(
+                    f"{nome} ({size} registros): {segundos * 1000:.1f} ms "
+                    f"vs {referencia * 1000:.1f} ms na linha de base"
+                )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Tamanhos de histórico')
+    parser.add_argument('--repeat', type=int, default=5, help='Execuções por operação de leitura')
+    parser.add_argument('--adds', type=int, default=5, help='Quantidade de add_record medidos')
+    parser.add_argument('--rounds', type=int, default=1,
+                        help='Rodadas completas por tamanho (guarda a mediana de cada operação)')
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH, help='Arquivo de resultados')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='Arquivo da linha de base')
+    parser.add_argument('--tolerance', type=float, default=BENCH_REGRESSION_TOLERANCE,
+                        help='Aumento relativo aceito antes de acusar regressão')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Salva os resultados como linha de base (se ainda não existir)')
+    parser.add_argument('--force', action='store_true',
+                        help='Com --save-baseline, substitui a linha de base existente')
+    args = parser.parse_args()
+
+    if args.save_baseline and args.baseline.exists() and not args.force:
+        parser.exit(1, f"❌ {args.baseline} já existe: a linha de base não é regravada (use --force)\n")
+
+    results = {}
+    for count in args.sizes:
+        print(f"Database com {count} registros")
+        rodadas = [run_size(count, args.repeat, args.adds) for _ in range(args.rounds)]
+        results[str(count)] = {
+            nome: statistics.median(rodada[nome] for rodada in rodadas)
+            for nome in rodadas[0]
+        }
+        for nome, segundos in results[str(count)].items():
+            print(f"   {nome:<28} {segundos * 1000:10.2f} ms")
+
+    payload = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f"Resultados salvos em {args.output}")
+
+    if args.save_baseline:
+        if args.rounds < 3:
+            print("⚠️ Linha de base com menos de 3 rodadas: use --rounds 3 ou mais em uma máquina ociosa")
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f"✅ Linha de base salva em {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("Nenhuma linha de base encontrada (use --save-baseline)")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressoes = compare(results, baseline, args.tolerance)
+    if regressoes:
+        for regressao in regressoes:
+            print(f"❌ {regressao}")
+        sys.exit(1)
+
+    print(f"✅ Sem regressões acima de {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
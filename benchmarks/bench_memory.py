@@ -0,0 +1,93 @@
+"""
+Relatório de memória por registro (tracemalloc)
+
+Compara os bytes alocados por registro como dicionário comum (formato
+lido do JSON) e como Record compacto, e mede o Database carregado.
+
+Uso:
+    python benchmarks/bench_memory.py [--sizes 10000 100000]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from database import Database
+from record import Record
+
+from bench_database import generate_records
+
+
+def allocated_bytes(builder):
+    """
+    Mede os bytes que continuam alocados após construir um objeto
+
+    Args:
+        builder: Função sem argumentos que retorna o objeto medido
+
+    Returns:
+        Tupla (objeto, bytes)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = builder()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return obj, current
+
+
+def run_size(count):
+    """
+    Mede a memória de `count` registros em cada representação
+
+    Returns:
+        Dicionário representação -> bytes por registro
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        # O histórico só existe no arquivo: nada além do objeto medido fica na memória
+        db_path = Path(workdir) / 'local_backup.json'
+        db_path.write_text(json.dumps(generate_records(count)), encoding='utf-8')
+
+        def load():
+            with open(db_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        dicts, bytes_dicts = allocated_bytes(load)
+        del dicts
+        records, bytes_records = allocated_bytes(lambda: [Record.from_dict(r) for r in load()])
+        del records
+        db, bytes_db = allocated_bytes(lambda: Database(db_path))
+        del db
+
+    return {
+        'dict': bytes_dicts / count,
+        'Record': bytes_records / count,
+        'Database': bytes_db / count
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"   {'registros':>10} {'dict (B/reg)':>14} {'Record (B/reg)':>16} {'Database (B/reg)':>18} {'redução':>9}")
+    for count in args.sizes:
+        resultado = run_size(count)
+        reducao = resultado['dict'] / resultado['Record']
+        print(f"   {count:>10} {resultado['dict']:>14.0f} {resultado['Record']:>16.0f} "
+              f"{resultado['Database']:>18.0f} {reducao:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
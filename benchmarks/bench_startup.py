@@ -0,0 +1,88 @@
+"""
+Benchmark de inicialização a frio do app.py
+
+Importa o app em processos novos, mede o tempo total e falha se a
+mediana ultrapassar config.STARTUP_BUDGET_SECONDS ou se a pilha do
+Google for importada antes do primeiro uso.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import STARTUP_BUDGET_SECONDS
+
+# Executado em cada processo filho: importa o app e devolve as medições
+CHILD_SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app
+total = time.perf_counter() - inicio
+google = sorted(m for m in sys.modules if m.startswith('googleapiclient') or m == 'google_integration')
+print(json.dumps({{'total': total, 'steps': app.startup_timer.steps, 'google_modules': google}}))
+"""
+
+
+def run_once():
+    """Executa uma inicialização a frio em um diretório temporário"""
+    with tempfile.TemporaryDirectory() as workdir:
+        inicio = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT.format(root=str(ROOT))],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        wall = time.perf_counter() - inicio
+
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data['wall'] = wall
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='Número de execuções')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_SECONDS,
+                        help='Tempo máximo da mediana (segundos)')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    mediana = statistics.median(r['total'] for r in runs)
+
+    print(f"Inicialização a frio ({args.runs} execuções)")
+    print(f"   import app (mediana)   {mediana * 1000:8.1f} ms")
+    print(f"   processo (mediana)     {statistics.median(r['wall'] for r in runs) * 1000:8.1f} ms")
+    for name in sorted(runs[0]['steps'], key=lambda n: -runs[0]['steps'][n]):
+        valor = statistics.median(r['steps'].get(name, 0) for r in runs)
+        print(f"   {name:<22} {valor * 1000:8.1f} ms")
+
+    falhas = []
+    if mediana > args.budget:
+        falhas.append(f"mediana {mediana:.2f}s acima do limite de {args.budget:.2f}s")
+    if runs[0]['google_modules']:
+        falhas.append(f"módulos do Google importados na inicialização: {runs[0]['google_modules']}")
+
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+
+    print(f"✅ Dentro do limite de {args.budget:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
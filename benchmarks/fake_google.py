@@ -0,0 +1,175 @@
+"""
+Backend falso do Google Drive/Sheets para testes de carga
+
+Imita os serviços usados por GoogleIntegration (files, permissions e
+spreadsheets.values) em memória, com latência, banda de upload e taxa
+de erros configuráveis. Os erros usam HttpError (429/503) para exercitar
+os retries de rate_limiter.execute_with_backoff.
+"""
+
+import itertools
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from google_integration import GoogleIntegration
+
+_QUERY_PATTERN = re.compile(r"name='(?P<name>[^']*)' and '(?P<parent>[^']*)' in parents")
+
+
+class _FakeRequest:
+    """Requisição com o mesmo contrato de HttpRequest.execute()"""
+
+    def __init__(self, backend, upload_bytes, action):
+        self.backend = backend
+        self.upload_bytes = upload_bytes
+        self.action = action
+
+    def execute(self):
+        self.backend.simulate(self.upload_bytes)
+        return self.action()
+
+
+class _Files:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def list(self, q, spaces=None, fields=None):
+        match = _QUERY_PATTERN.search(q)
+
+        def action():
+            folder_id = self.backend.folders.get((match['name'], match['parent']))
+            return {'files': [{'id': folder_id, 'name': match['name']}] if folder_id else []}
+
+        return _FakeRequest(self.backend, 0, action)
+
+    def create(self, body, fields=None, media_body=None):
+        size = media_body.size() if media_body is not None else 0
+
+        def action():
+            file_id = self.backend.new_id()
+            if media_body is None:
+                self.backend.folders[(body['name'], body['parents'][0])] = file_id
+            else:
+                self.backend.uploaded_bytes += size
+                self.backend.uploads += 1
+            return {'id': file_id, 'webViewLink': f"https://drive.google.com/file/d/{file_id}/view?usp=drivesdk"}
+
+        return _FakeRequest(self.backend, size, action)
+
+
+class _Permissions:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def create(self, fileId, body):
+        return _FakeRequest(self.backend, 0, lambda: {'id': 'anyone'})
+
+
+class FakeDriveService:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def files(self):
+        return _Files(self.backend)
+
+    def permissions(self):
+        return _Permissions(self.backend)
+
+
+class _Values:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def append(self, spreadsheetId, range, valueInputOption, body):
+        def action():
+            self.backend.rows.extend(body['values'])
+            return {'updates': {'updatedRows': len(body['values'])}}
+
+        return _FakeRequest(self.backend, 0, action)
+
+    def get(self, spreadsheetId, range):
+        return _FakeRequest(self.backend, 0, lambda: {'values': list(self.backend.rows)})
+
+
+class _Spreadsheets:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def values(self):
+        return _Values(self.backend)
+
+
+class FakeSheetsService:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def spreadsheets(self):
+        return _Spreadsheets(self.backend)
+
+
+class FakeGoogleBackend:
+    """Estado compartilhado e modelo de latência dos serviços falsos"""
+
+    def __init__(self, latency_ms=80, upload_mbps=20, error_rate=0.0, seed=42):
+        """
+        Args:
+            latency_ms: Latência média por requisição (distribuição exponencial)
+            upload_mbps: Banda de upload simulada (megabits por segundo)
+            error_rate: Fração das requisições que falham com 429 ou 503
+            seed: Semente do gerador aleatório
+        """
+        self.latency = latency_ms / 1000
+        self.upload_bytes_per_second = upload_mbps * 1_000_000 / 8
+        self.error_rate = error_rate
+        self.folders = {}
+        self.rows = []
+        self.requests = 0
+        self.errors = 0
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def new_id(self):
+        return f"fake{next(self._ids):012d}"
+
+    def simulate(self, upload_bytes):
+        """Aguarda a latência simulada e, às vezes, falha"""
+        with self._lock:
+            self.requests += 1
+            atraso = self._rng.expovariate(1 / self.latency) if self.latency else 0.0
+            falha = self._rng.random() < self.error_rate
+            status = self._rng.choice((429, 503)) if falha else None
+            if falha:
+                self.errors += 1
+
+        time.sleep(atraso + upload_bytes / self.upload_bytes_per_second)
+        if status:
+            resp = httplib2.Response({'status': status, 'retry-after': '0'})
+            raise HttpError(resp, b'{"error": {"message": "simulado"}}')
+
+    def create_integration(self):
+        """
+        Cria um GoogleIntegration ligado aos serviços falsos, sem autenticar
+
+        Returns:
+            Instância de GoogleIntegration
+        """
+        google = GoogleIntegration.__new__(GoogleIntegration)
+        google._init_state()
+        google.drive_service = FakeDriveService(self)
+        google.sheets_service = FakeSheetsService(self)
+        google.main_folder_id = 'root'
+        google.spreadsheet_id = 'fake-spreadsheet'
+        return google
@@ -0,0 +1,192 @@
+"""
+Teste de carga com vários promotores fazendo check-in ao mesmo tempo
+
+Cada escritor grava seus check-ins no Database (como o novo_checkin) e
+agenda a sincronização no SyncWorker, que envia as fotos e as linhas
+para um backend falso do Google (benchmarks/fake_google.py). Ao final
+mostra vazão, latência de cauda e taxa de erros.
+
+Uso:
+    python benchmarks/load_test.py --writers 20 --checkins 10 --photo-kb 300
+    python benchmarks/load_test.py --writers 50 --sheets-rps 1 --error-rate 0.05
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import SYNC_MAX_WORKERS, DRIVE_REQUESTS_PER_SECOND, SHEETS_REQUESTS_PER_SECOND
+from database import Database
+import sync_worker as sync_module
+from metrics import metrics
+from photo_store import PhotoStore
+from rate_limiter import configure_rate_limiter
+from sync_worker import SyncWorker, STATUS_CONCLUIDO, STATUS_ERRO
+from utils import validate_checkin, generate_photo_filename
+
+from fake_google import FakeGoogleBackend
+from workload import generate_checkins
+
+
+class RecordingSyncWorker(SyncWorker):
+    """SyncWorker que guarda uma cópia de cada tarefa finalizada"""
+
+    def __init__(self, max_workers=SYNC_MAX_WORKERS):
+        super().__init__(max_workers)
+        self.finished = []
+        self.done = threading.Condition(self._lock)
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            if changes.get('status') in (STATUS_CONCLUIDO, STATUS_ERRO):
+                self.finished.append(dict(job))
+                self.done.notify_all()
+
+    def wait(self, total, timeout):
+        """Aguarda até `total` tarefas finalizadas ou o tempo limite"""
+        with self.done:
+            return self.done.wait_for(lambda: len(self.finished) >= total, timeout)
+
+
+def percentiles(values):
+    """Retorna p50, p95, p99 e máximo (em ms) de uma lista em segundos"""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000
+
+    return {'p50': pick(50), 'p95': pick(95), 'p99': pick(99), 'max': ordered[-1] * 1000}
+
+
+def run_writer(db, google, worker, checkins, latencies, errors):
+    """Executa os check-ins de um promotor em sequência"""
+    job_ids = []
+    for dados, fotos in checkins:
+        inicio = time.perf_counter()
+        try:
+            registro, mensagens = validate_checkin(dados)
+            if mensagens:
+                raise ValueError('; '.join(mensagens))
+            registro['fotos'] = [sync_module.photo_store.put(foto) for foto in fotos]
+            registro['sync_status'] = 'pendente'
+            record_id = db.add_record(registro)
+            job_ids.append(worker.submit(
+                db,
+                google,
+                record_id,
+                [(generate_photo_filename(registro['pdv'], i), foto) for i, foto in enumerate(fotos, 1)],
+                f"{registro['promotor']}/{registro['data']}",
+                descricao=f"{registro['promotor']} - {registro['pdv']}",
+                local_refs=list(registro['fotos'])
+            ))
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        latencies.append(time.perf_counter() - inicio)
+    return job_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=20, help='Promotores simultâneos')
+    parser.add_argument('--checkins', type=int, default=10, help='Check-ins por promotor')
+    parser.add_argument('--photos', type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'),
+                        help='Fotos por check-in')
+    parser.add_argument('--photo-kb', type=int, default=300, help='Tamanho de cada foto (KB)')
+    parser.add_argument('--sync-workers', type=int, default=SYNC_MAX_WORKERS)
+    parser.add_argument('--latency-ms', type=float, default=80, help='Latência média da API falsa')
+    parser.add_argument('--upload-mbps', type=float, default=20, help='Banda de upload simulada')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 429/503')
+    parser.add_argument('--drive-rps', type=float, default=DRIVE_REQUESTS_PER_SECOND)
+    parser.add_argument('--sheets-rps', type=float, default=SHEETS_REQUESTS_PER_SECOND)
+    parser.add_argument('--timeout', type=float, default=600, help='Tempo máximo de espera da sincronização')
+    args = parser.parse_args()
+
+    configure_rate_limiter('drive', args.drive_rps)
+    configure_rate_limiter('sheets', args.sheets_rps)
+
+    backend = FakeGoogleBackend(args.latency_ms, args.upload_mbps, args.error_rate)
+    google = backend.create_integration()
+    worker = RecordingSyncWorker(args.sync_workers)
+
+    total = args.writers * args.checkins
+    # Domingos não têm check-ins: acrescenta um dia a cada seis dias úteis
+    dias_uteis = -(-total // 40)
+    carga = list(generate_checkins(
+        days=dias_uteis + dias_uteis // 6 + 1,
+        per_day=40,
+        photos=tuple(args.photos),
+        photo_kb=args.photo_kb
+    ))[:total]
+    por_escritor = [carga[i::args.writers] for i in range(args.writers)]
+
+    latencies = []
+    errors = []
+    metrics.reset()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database(Path(workdir) / 'local_backup.json')
+        # Fotos guardadas antes do envio, como no novo_checkin
+        sync_module.photo_store = PhotoStore(Path(workdir) / 'photo_store')
+
+        print(f"Teste de carga: {args.writers} promotores x {args.checkins} check-ins "
+              f"({args.photo_kb} KB/foto, {args.sync_workers} threads de sincronização)")
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.writers) as pool:
+            futures = [
+                pool.submit(run_writer, db, google, worker, checkins, latencies, errors)
+                for checkins in por_escritor
+            ]
+            submetidos = sum(len(f.result()) for f in futures)
+        gravacao = time.perf_counter() - inicio
+
+        concluiu = worker.wait(submetidos, args.timeout)
+        total_tempo = time.perf_counter() - inicio
+
+    sincronizacao = [
+        (datetime.fromisoformat(job['concluido_em']) - datetime.fromisoformat(job['criado_em'])).total_seconds()
+        for job in worker.finished
+    ]
+    falhas = [job for job in worker.finished if job['status'] == STATUS_ERRO]
+
+    local = percentiles(latencies)
+    sync = percentiles(sincronizacao)
+
+    print()
+    print(f"Gravação local   {submetidos / gravacao:8.1f} check-ins/s "
+          f"(p50 {local['p50']:.1f} ms | p95 {local['p95']:.1f} ms | p99 {local['p99']:.1f} ms | máx {local['max']:.1f} ms)")
+    print(f"Sincronização    {len(worker.finished) / total_tempo:8.1f} check-ins/s "
+          f"(p50 {sync['p50']:.0f} ms | p95 {sync['p95']:.0f} ms | p99 {sync['p99']:.0f} ms | máx {sync['max']:.0f} ms)")
+    print(f"Erros            gravação {len(errors)}/{total} | sincronização {len(falhas)}/{submetidos} "
+          f"| API {backend.errors}/{backend.requests} respostas com erro")
+    print(f"Backend falso    {backend.uploads} fotos ({backend.uploaded_bytes / 1_000_000:.1f} MB), "
+          f"{len(backend.rows)} linhas na planilha")
+    if not concluiu:
+        print(f"⚠️ {submetidos - len(worker.finished)} tarefas não terminaram em {args.timeout:.0f}s")
+
+    print()
+    print(f"   {'operação':<36} {'chamadas':>8} {'p50 ms':>9} {'p95 ms':>9} {'máx ms':>9}")
+    for item in metrics.snapshot():
+        print(f"   {item['operacao']:<36} {item['chamadas']:>8} {item['p50_ms']:>9.1f} "
+              f"{item['p95_ms']:>9.1f} {item['max_ms']:>9.1f}")
+
+    if errors:
+        print()
+        for erro in sorted(set(errors))[:10]:
+            print(f"   ⚠️ {erro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Gerador de carga sintética de check-ins
+
+Produz check-ins realistas combinando config.PROMOTORES x config.PDVS
+ao longo de vários dias, com fotos de tamanho configurável.
+
+Uso:
+    python benchmarks/workload.py --days 30 --per-day 40 --output carga.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import PROMOTORES, PDVS, MAX_PHOTOS_PER_CHECKIN
+
+# Cabeçalho JPEG para que as fotos sintéticas tenham assinatura de imagem
+JPEG_HEADER = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00'
+JPEG_TRAILER = b'\xff\xd9'
+
+OBSERVACOES = ['', '', '', 'Gôndola reabastecida', 'Ruptura de estoque', 'Material de PDV instalado']
+
+
+def make_photo(rng, size_kb):
+    """
+    Gera bytes de uma foto sintética
+
+    Args:
+        rng: Instância de random.Random
+        size_kb: Tamanho aproximado em KB
+
+    Returns:
+        Bytes com cabeçalho e final JPEG
+    """
+    corpo = max(0, size_kb * 1024 - len(JPEG_HEADER) - len(JPEG_TRAILER))
+    # Mesmo resultado de rng.randbytes (Python 3.9+)
+    corpo_bytes = (rng.getrandbits(corpo * 8) if corpo else 0).to_bytes(corpo, 'little')
+    return JPEG_HEADER + corpo_bytes + JPEG_TRAILER
+
+
+def generate_checkins(days=30, per_day=None, photos=(0, 3), photo_kb=200,
+                      promotores=PROMOTORES, pdvs=PDVS, end=None, seed=42):
+    """
+    Gera check-ins distribuídos pelo horário comercial
+
+    Cada promotor visita alguns PDVs por dia; PDVs próximos na lista
+    aparecem juntos na rota, como nas visitas reais.
+
+    Args:
+        days: Quantidade de dias, terminando em `end`
+        per_day: Check-ins por dia (padrão: 4 visitas por promotor)
+        photos: Tupla (mínimo, máximo) de fotos por check-in
+        photo_kb: Tamanho de cada foto em KB (0 gera check-ins sem bytes de foto)
+        promotores: Lista de promotores
+        pdvs: Lista de PDVs
+        end: Último dia (padrão: hoje)
+        seed: Semente do gerador aleatório
+
+    Yields:
+        Tuplas (dados, fotos) onde dados segue o formulário de check-in
+        e fotos é uma lista de bytes
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    per_day = per_day or len(promotores) * 4
+    min_fotos, max_fotos = photos
+    max_fotos = min(max_fotos, MAX_PHOTOS_PER_CHECKIN)
+
+    for offset in range(days - 1, -1, -1):
+        dia = end - timedelta(days=offset)
+        if dia.weekday() == 6:
+            continue
+
+        horarios = sorted(rng.randrange(7 * 3600, 19 * 3600) for _ in range(per_day))
+        for segundos in horarios:
+            promotor = rng.choice(promotores)
+            inicio_rota = promotores.index(promotor) * 7
+            pdv = pdvs[(inicio_rota + rng.randrange(6)) % len(pdvs)]
+            quantidade = rng.randint(min_fotos, max_fotos)
+
+            dados = {
+                'data': dia.isoformat(),
+                'hora': f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}",
+                'promotor': promotor,
+                'pdv': pdv,
+                'valor_deslocamento': round(rng.lognormvariate(3, 0.6), 2),
+                'num_entradas': rng.choices([1, 2, 3], weights=[80, 15, 5])[0],
+                'observacoes': rng.choice(OBSERVACOES),
+                'fotos': []
+            }
+            fotos = [make_photo(rng, photo_kb) for _ in range(quantidade)] if photo_kb else []
+            yield dados, fotos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--per-day', type=int, default=None, help='Check-ins por dia')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, required=True, help='Arquivo JSONL (aceito por importer.py)')
+    args = parser.parse_args()
+
+    total = 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for dados, _ in generate_checkins(args.days, args.per_day, photo_kb=0, seed=args.seed):
+            f.write(json.dumps(dados, ensure_ascii=False) + '\n')
+            total += 1
+    print(f"✅ {total} check-ins gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -54,6 +54,9 @@ FAIXAS_VALOR = [
     (150, float('inf'), "Acima de R$ 150")
 ]
 
+# Erro relativo máximo dos percentis aproximados nas estatísticas
+PERCENTILE_RELATIVE_ACCURACY = 0.01
+
 # ==========================================
 # GOOGLE DRIVE E SHEETS
 # ==========================================
@@ -96,6 +99,15 @@ TIME_FORMAT = "%H:%M:%S"
 # Formato de exibição de data/hora completo
 DATETIME_FORMAT = "%d/%m/%Y %H:%M:%S"
 
+# Quantidade de datas convertidas mantidas em cache
+DATE_PARSE_CACHE_SIZE = 4096
+
+# Quantidade de valores formatados (moeda, data, hora) mantidos em cache
+FORMAT_CACHE_SIZE = 4096
+
+# Quantidade de visões derivadas (totais por filtro, opções) guardadas por sessão
+VIEW_CACHE_MAX_ENTRIES = 32
+
 # ==========================================
 # CONFIGURAÇÕES DE BANCO DE DADOS
 # ==========================================
@@ -103,12 +115,48 @@ DATETIME_FORMAT = "%d/%m/%Y %H:%M:%S"
 # Caminho do banco de dados local
 DATABASE_PATH = "data/local_backup.json"
 
+# Compressão do banco local e dos backups: 'none', 'gzip' ou 'zstd'
+# (zstd requer o pacote zstandard; arquivos antigos continuam legíveis)
+DATABASE_COMPRESSION = 'gzip'
+
+# Nível de compressão (gzip 1-9, zstd 1-22)
+DATABASE_COMPRESSION_LEVEL = 3
+
 # Caminho para backups automáticos
 BACKUP_PATH = "data/backups"
 
+# Arquivo com promotores e PDVs editados pelo painel administrativo
+CONFIG_DATA_PATH = "config_data.json"
+
+# Fotos dos check-ins feitos sem conexão (arquivos nomeados pelo hash)
+PHOTO_STORE_PATH = "data/photos"
+
+# Espaço máximo das fotos locais (MB); acima dele as já enviadas são descartadas
+PHOTO_STORE_MAX_MB = 500
+
 # Frequência de backup automático (em dias)
 AUTO_BACKUP_DAYS = 7
 
+# Registros por bloco (um commit por bloco) na importação de históricos
+IMPORT_CHUNK_SIZE = 5000
+
+# ==========================================
+# API DE INGESTÃO
+# ==========================================
+
+# Endereço e porta da API local de ingestão de check-ins
+INGESTION_HOST = "127.0.0.1"
+INGESTION_PORT = 8502
+
+# Máximo de check-ins gravados em um único commit
+INGESTION_MAX_BATCH = 500
+
+# Tempo de espera para agrupar requisições no mesmo commit (milissegundos)
+INGESTION_COMMIT_INTERVAL_MS = 50
+
+# Tamanho máximo do corpo de uma requisição (em MB)
+INGESTION_MAX_BODY_MB = 50
+
 # ==========================================
 # CONFIGURAÇÕES DE RELATÓRIOS
 # ==========================================
@@ -213,6 +261,21 @@ DEBUG_MODE = False
 # Habilitar logs detalhados
 VERBOSE_LOGGING = False
 
+# Diretório dos perfis de execução gravados quando DEBUG_MODE está ativo
+PROFILE_DIR = "data/profiles"
+
+# Quantidade de funções listadas em cada perfil
+PROFILE_TOP_N = 30
+
+# Quantidade de perfis mantidos (os mais antigos são apagados)
+PROFILE_MAX_FILES = 50
+
+# Tempo máximo aceitável para a inicialização a frio do app (segundos)
+STARTUP_BUDGET_SECONDS = 3.0
+
+# Aumento relativo de tempo aceito nos benchmarks antes de acusar regressão
+BENCH_REGRESSION_TOLERANCE = 0.25
+
 # Timeout para operações de rede (segundos)
 NETWORK_TIMEOUT = 30
 
@@ -222,12 +285,42 @@ MAX_RETRY_ATTEMPTS = 3
 # Intervalo entre tentativas (segundos)
 RETRY_DELAY = 5
 
+# Intervalo máximo entre tentativas com backoff (segundos)
+MAX_RETRY_DELAY = 60
+
+# Limite de requisições por segundo à API do Google Drive
+DRIVE_REQUESTS_PER_SECOND = 10
+
+# Limite de requisições por segundo à API do Google Sheets
+SHEETS_REQUESTS_PER_SECOND = 1
+
 # Habilitar cache local
 ENABLE_LOCAL_CACHE = True
 
 # Tempo de validade do cache (minutos)
 CACHE_VALIDITY_MINUTES = 30
 
+# Antecedência para renovar o token do Google antes de expirar (minutos)
+TOKEN_REFRESH_MARGIN_MINUTES = 5
+
+# Número de threads para envio de fotos e sincronização em segundo plano
+SYNC_MAX_WORKERS = 4
+
+# Quantidade de tarefas finalizadas mantidas para o painel de status
+SYNC_MAX_FINISHED_JOBS = 200
+
+# Intervalo de atualização do painel de sincronização (segundos)
+SYNC_STATUS_REFRESH_SECONDS = 2
+
+# Coletar métricas de latência das operações (banco local, Drive, Sheets)
+METRICS_ENABLED = True
+
+# Limites dos baldes do histograma de latência (segundos)
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Arquivo com as métricas no formato texto do Prometheus
+METRICS_PROMETHEUS_PATH = "data/metrics.prom"
+
 # ==========================================
 # PERMISSÕES E SEGURANÇA
 # ==========================================
@@ -263,9 +356,31 @@ NOTIFICATION_TYPES = {
 # Habilitar geolocalização
 ENABLE_GEOLOCATION = False
 
+# Tamanho da célula do índice espacial de PDVs (km)
+GEO_GRID_CELL_KM = 2.0
+
+# Quantidade de PDVs sugeridos no check-in
+GEO_NEAREST_PDVS = 3
+
+# Distância máxima para sugerir um PDV (km)
+GEO_MAX_DISTANCE_KM = 30.0
+
+# Valor de referência por km rodado
+VALOR_POR_KM = 1.20
+
+# Folga sobre o valor esperado antes de alertar (fração e valor fixo)
+DESLOCAMENTO_TOLERANCIA = 0.5
+DESLOCAMENTO_MARGEM = 10.00
+
 # Habilitar reconhecimento de imagem
 ENABLE_IMAGE_RECOGNITION = False
 
+# Algoritmo do hash perceptual das fotos ('phash' ou 'dhash')
+PHOTO_HASH_ALGORITHM = 'phash'
+
+# Bits diferentes (de 64) para considerar duas fotos a mesma imagem
+PHOTO_HASH_MAX_DISTANCE = 6
+
 # Habilitar analytics
 ENABLE_ANALYTICS = False
 
@@ -0,0 +1,261 @@
+"""
+Módulo de registro de configurações editáveis (promotores, PDVs e suas coordenadas)
+Lê config_data.json apenas quando o arquivo muda e grava de forma atômica
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from config import CONFIG_DATA_PATH, PROMOTORES, PDVS
+from geo import GridIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigRegistry:
+    """Listas de promotores e PDVs compartilhadas entre sessões e processos"""
+
+    def __init__(self, path=CONFIG_DATA_PATH, promotores=PROMOTORES, pdvs=PDVS):
+        """
+        Args:
+            path: Caminho do arquivo JSON de configurações
+            promotores: Lista padrão de promotores (usada se o arquivo não existir)
+            pdvs: Lista padrão de PDVs (usada se o arquivo não existir)
+        """
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._signature = None
+        self._set_data({'promotores': list(promotores), 'pdvs': list(pdvs)})
+
+    def _set_data(self, data):
+        """
+        Valida os dados e atualiza os conjuntos e as visões ordenadas
+
+        Nada é alterado se os dados forem inválidos.
+
+        Raises:
+            ValueError: Se os dados não tiverem o formato esperado
+        """
+        if not isinstance(data, dict):
+            raise ValueError("As configurações devem ser um objeto JSON")
+        try:
+            promotores = set(data.get('promotores', []))
+            pdvs = set(data.get('pdvs', []))
+            pdv_locations = {
+                name: (float(lat), float(lon))
+                for name, (lat, lon) in data.get('pdv_locations', {}).items()
+                if name in pdvs
+            }
+            promotores_sorted = sorted(promotores)
+            pdvs_sorted = sorted(pdvs)
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"Configurações inválidas: {e}") from e
+
+        self._data = data
+        self._promotores = promotores
+        self._pdvs = pdvs
+        self._promotores_sorted = promotores_sorted
+        self._pdvs_sorted = pdvs_sorted
+        self._pdv_locations = pdv_locations
+        self._pdv_index = None
+
+    def _file_signature(self):
+        """Retorna (mtime, tamanho) do arquivo ou None se não existir"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Recarrega o arquivo somente se ele mudou desde a última leitura"""
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return
+
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._set_data(data)
+            except OSError:
+                # Arquivo sendo substituído: tenta de novo no próximo acesso
+                return
+            except ValueError as e:
+                # Mantém a versão anterior até o arquivo ser corrigido
+                logger.warning("Ignorando %s inválido: %s", self.path, e)
+            self._signature = signature
+
+    def _save(self):
+        """Grava o arquivo de forma atômica (arquivo temporário + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent,
+            prefix=f".{self.path.name}.",
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._signature = self._file_signature()
+
+    def _modify(self, key, name, add):
+        """Adiciona ou remove um item e grava o arquivo"""
+        with self._lock:
+            self._refresh()
+            items = list(self._data.get(key, []))
+
+            if add:
+                if name in items:
+                    return False
+                items.append(name)
+            else:
+                if name not in items:
+                    return False
+                items.remove(name)
+
+            data = dict(self._data)
+            data[key] = items
+            if key == 'pdvs' and not add:
+                data['pdv_locations'] = {
+                    k: v for k, v in data.get('pdv_locations', {}).items() if k != name
+                }
+            self._set_data(data)
+            self._save()
+            return True
+
+    def set_pdv_locations(self, locations):
+        """
+        Define as coordenadas de vários PDVs com uma única gravação
+
+        Args:
+            locations: Dicionário nome -> (lat, lon); None remove a coordenada
+
+        Returns:
+            Quantidade de PDVs atualizados (PDVs não cadastrados são ignorados)
+        """
+        with self._lock:
+            self._refresh()
+            current = dict(self._data.get('pdv_locations', {}))
+            updated = 0
+
+            for name, coords in locations.items():
+                if name not in self._pdvs:
+                    continue
+                if coords is None:
+                    current.pop(name, None)
+                else:
+                    current[name] = [float(coords[0]), float(coords[1])]
+                updated += 1
+
+            if updated:
+                data = dict(self._data)
+                data['pdv_locations'] = current
+                self._set_data(data)
+                self._save()
+            return updated
+
+    def set_pdv_location(self, name, lat, lon):
+        """
+        Define as coordenadas de um PDV
+
+        Returns:
+            True se atualizado, False se o PDV não existe
+        """
+        return self.set_pdv_locations({name: (lat, lon)}) == 1
+
+    @property
+    def promotores(self):
+        """Lista ordenada de promotores"""
+        self._refresh()
+        return self._promotores_sorted
+
+    @property
+    def pdvs(self):
+        """Lista ordenada de PDVs"""
+        self._refresh()
+        return self._pdvs_sorted
+
+    @property
+    def pdv_locations(self):
+        """Dicionário nome -> (lat, lon) dos PDVs com coordenadas"""
+        self._refresh()
+        return self._pdv_locations
+
+    def pdv_index(self):
+        """
+        Índice espacial dos PDVs com coordenadas (recriado quando o arquivo muda)
+
+        Returns:
+            Instância de GridIndex
+        """
+        self._refresh()
+        index = self._pdv_index
+        if index is None:
+            with self._lock:
+                index = self._pdv_index
+                if index is None:
+                    index = self._pdv_index = GridIndex(self._pdv_locations)
+        return index
+
+    def has_promotor(self, name):
+        """Verifica se o promotor está cadastrado"""
+        self._refresh()
+        return name in self._promotores
+
+    def has_pdv(self, name):
+        """Verifica se o PDV está cadastrado"""
+        self._refresh()
+        return name in self._pdvs
+
+    def add_promotor(self, name):
+        """
+        Cadastra um promotor
+
+        Returns:
+            True se adicionado, False se já existia
+        """
+        return self._modify('promotores', name, add=True)
+
+    def remove_promotor(self, name):
+        """
+        Remove um promotor
+
+        Returns:
+            True se removido, False se não existia
+        """
+        return self._modify('promotores', name, add=False)
+
+    def add_pdv(self, name):
+        """
+        Cadastra um PDV
+
+        Returns:
+            True se adicionado, False se já existia
+        """
+        return self._modify('pdvs', name, add=True)
+
+    def remove_pdv(self, name):
+        """
+        Remove um PDV
+
+        Returns:
+            True se removido, False se não existia
+        """
+        return self._modify('pdvs', name, add=False)
+
+
+# Instância única por processo
+config_registry = ConfigRegistry()
@@ -0,0 +1,124 @@
+"""
+Módulo de cache de credenciais do Google
+Mantém uma única credencial por processo, renovada em segundo plano antes de expirar
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from config import TOKEN_REFRESH_MARGIN_MINUTES, RETRY_DELAY
+
+
+class CredentialHolder:
+    """Guarda as credenciais OAuth2 compartilhadas por todas as sessões"""
+
+    def __init__(self, refresh_margin_minutes=TOKEN_REFRESH_MARGIN_MINUTES):
+        self.refresh_margin = timedelta(minutes=refresh_margin_minutes)
+        self._credentials = None
+        self._lock = threading.Lock()
+        self._timer = None
+        self.last_refresh = None
+        self.last_error = None
+
+    def _needs_refresh(self):
+        """Verifica se o token expira dentro da margem de renovação"""
+        creds = self._credentials
+        if creds is None or not creds.refresh_token:
+            return False
+        if creds.expiry is None:
+            return not creds.valid
+        # google-auth usa datetime UTC sem timezone em expiry
+        return creds.expiry - self.refresh_margin <= datetime.utcnow()
+
+    def _schedule(self, delay=None):
+        """Agenda a próxima renovação em segundo plano"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        creds = self._credentials
+        if creds is None or not creds.refresh_token:
+            return
+
+        if delay is None:
+            if creds.expiry is None:
+                return
+            renew_at = creds.expiry - self.refresh_margin
+            delay = max(0.0, (renew_at - datetime.utcnow()).total_seconds())
+
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        """Renova o token fora da sessão do usuário (sem chamadas ao Streamlit)"""
+        try:
+            self.refresh()
+        except Exception:
+            # Mantém a credencial atual e tenta novamente mais tarde
+            with self._lock:
+                self._schedule(delay=RETRY_DELAY)
+
+    def set(self, credentials):
+        """
+        Define as credenciais compartilhadas
+
+        Args:
+            credentials: Objeto google.oauth2.credentials.Credentials
+        """
+        with self._lock:
+            self._credentials = credentials
+            self._schedule()
+
+    def refresh(self, force=False):
+        """
+        Renova o token (apenas uma renovação por vez no processo)
+
+        Args:
+            force: Renova mesmo que o token ainda esteja dentro da validade
+
+        Returns:
+            Credenciais atualizadas ou None
+        """
+        with self._lock:
+            if self._credentials is None:
+                return None
+
+            if force or self._needs_refresh():
+                from google.auth.transport.requests import Request
+                try:
+                    self._credentials.refresh(Request())
+                except Exception as e:
+                    self.last_error = str(e)
+                    raise
+                self.last_refresh = datetime.now()
+                self.last_error = None
+
+            self._schedule()
+            return self._credentials
+
+    def get(self):
+        """
+        Retorna credenciais válidas, renovando se necessário
+
+        Returns:
+            Credenciais ou None se nenhuma foi definida
+        """
+        creds = self._credentials
+        if creds is None:
+            return None
+        if creds.valid and not self._needs_refresh():
+            return creds
+        return self.refresh()
+
+    def clear(self):
+        """Descarta as credenciais e cancela a renovação agendada"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._credentials = None
+
+
+# Instância única por processo
+credential_holder = CredentialHolder()
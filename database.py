@@ -2,15 +2,47 @@
 Módulo de gerenciamento de dados local
 """
 
+import gc
 import json
+import threading
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
 from pathlib import Path
 from datetime import datetime
 
+from config import DATABASE_COMPRESSION
+from metrics import metrics
+from record import Record, to_json
+from record_id import all_record_ids, checkin_ms, is_record_id, new_record_id, time_prefix
+from storage import SUFFIXES, CorruptFileError, read_json, resolve_compression, write_json
+
+# Chave de ordenação dos registros (IDs ULID ordenam pelo horário do check-in)
+_record_id = attrgetter('id')
+
+# Registros lidos por vez ao percorrer o histórico (iter_records)
+_ITER_CHUNK = 256
+
+
+class DatabaseLoadError(RuntimeError):
+    """O arquivo do banco existe, mas não pôde ser lido (o arquivo não é alterado)"""
+
+
 class Database:
     """Classe para gerenciar banco de dados local em JSON"""
     
-    def __init__(self, db_path='data/local_backup.json'):
+    def __init__(self, db_path='data/local_backup.json', compression=DATABASE_COMPRESSION):
         self.db_path = Path(db_path)
+        self.compression = resolve_compression(compression)
+        self._version = 0
+        self._lock = threading.RLock()
+        self._by_id = {}
+        # IDs na mesma ordem de self.records (buscas binárias sem key=, Python 3.8+)
+        self._ids = []
+        self._aliases = None
+        self._listeners = []
+        self._analytics = None
+        self._reports = None
+        self._photo_index = None
         self._ensure_data_dir()
         self._load_data()
     
@@ -22,19 +54,230 @@ class Database:
             self._save_data([])
     
     def _load_data(self):
-        """Carrega dados do arquivo JSON"""
+        """
+        Carrega dados do arquivo JSON
+        
+        Raises:
+            DatabaseLoadError: Se o arquivo estiver comprimido e corrompido
+                ou exigir um pacote de descompressão não instalado
+        """
+        # Sem coletas do GC durante a criação em massa de objetos
+        gc_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                self.records = json.load(f)
+            # Aceita JSON puro (formato antigo), gzip ou zstd
+            self.records = [Record.from_dict(r) for r in read_json(self.db_path)]
         except (FileNotFoundError, json.JSONDecodeError):
             self.records = []
             self._save_data(self.records)
+        except (CorruptFileError, RuntimeError) as e:
+            # Não recria o arquivo: os registros ainda podem ser recuperados
+            dica = " Restaure um backup do banco." if isinstance(e, CorruptFileError) else ""
+            raise DatabaseLoadError(
+                f"Não foi possível ler o banco de dados {self.db_path}: {e}. O arquivo não foi alterado.{dica}"
+            ) from e
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self._index_records()
+        self._mark_changed()
+    
+    def _index_records(self):
+        """
+        Monta o mapa ID -> registro
+        
+        Converte IDs fora do formato ULID e reordena os registros por ID
+        se o arquivo não estiver ordenado.
+        """
+        ids = [getattr(r, 'id', None) for r in self.records]
+        if not all_record_ids(ids):
+            self._migrate_ids()
+            ids = [r.id for r in self.records]
+        elif ids != sorted(ids):
+            self.records.sort(key=_record_id)
+            ids.sort()
+        
+        self._by_id = dict(zip(ids, self.records))
+        self._ids = ids
+        self._aliases = None
+    
+    def _migrate_ids(self):
+        """
+        Troca os IDs antigos (data_hora_promotor) por IDs ULID em ordem cronológica
+        
+        O ID antigo fica em 'legacy_id' e continua aceito em get_record_by_id,
+        update_record e delete_record. O arquivo anterior é copiado para a
+        pasta de backups antes da conversão.
+        """
+        self.backup_database(self.db_path.parent / 'backups')
+        
+        chronological = sorted(
+            range(len(self.records)),
+            key=lambda i: (self.records[i].get('data') or '', self.records[i].get('hora') or '', i)
+        )
+        for i in chronological:
+            record = self.records[i]
+            old_id = record.get('id')
+            if is_record_id(old_id):
+                continue
+            if old_id:
+                record['legacy_id'] = old_id
+            record['id'] = new_record_id(record)
+        
+        self.records.sort(key=_record_id)
+        self._save_data(self.records)
+    
+    def _get_aliases(self):
+        """Mapa ID antigo -> ID atual (montado na primeira busca por um ID antigo)"""
+        if self._aliases is None:
+            aliases = {}
+            for record in self.records:
+                legacy_id = record.get('legacy_id')
+                if legacy_id is not None:
+                    aliases.setdefault(legacy_id, record.id)
+            self._aliases = aliases
+        return self._aliases
+    
+    def _find(self, record_id):
+        """Busca um registro pelo ID atual ou pelo ID antigo"""
+        record = self._by_id.get(record_id)
+        if record is None:
+            with self._lock:
+                current_id = self._get_aliases().get(record_id)
+            if current_id is not None:
+                record = self._by_id.get(current_id)
+        return record
+    
+    def _insert(self, record):
+        """Insere um registro mantendo a ordem por ID (anexa no caso comum)"""
+        if not self._ids or record.id >= self._ids[-1]:
+            self.records.append(record)
+            self._ids.append(record.id)
+        else:
+            i = bisect_right(self._ids, record.id)
+            self.records.insert(i, record)
+            self._ids.insert(i, record.id)
+        self._by_id[record.id] = record
+    
+    def _mark_changed(self):
+        """Incrementa a versão dos dados após qualquer alteração"""
+        self._version += 1
+    
+    def subscribe(self, callback):
+        """
+        Registra uma função chamada a cada alteração dos registros
+        
+        Args:
+            callback: Função (evento, registro) onde evento é
+                'add', 'update', 'delete' ou 'clear'
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event, record=None):
+        """Avisa os assinantes sobre uma alteração"""
+        for callback in self._listeners:
+            callback(event, record)
+    
+    def get_analytics(self):
+        """
+        Retorna a visão colunar (pandas) dos registros
+        
+        A visão é criada na primeira chamada e mantida atualizada
+        incrementalmente a cada inserção.
+        
+        Returns:
+            Instância de analytics.RecordFrame
+        """
+        if self._analytics is None:
+            from analytics import RecordFrame
+            self._analytics = RecordFrame(self)
+        return self._analytics
+    
+    def get_photo_index(self):
+        """
+        Retorna o índice de hashes perceptuais das fotos
+        
+        O índice é montado na primeira busca e acompanha as alterações
+        seguintes dos registros.
+        
+        Returns:
+            Instância de photo_hash.PhotoHashIndex
+        """
+        if self._photo_index is None:
+            from photo_hash import PhotoHashIndex
+            self._photo_index = PhotoHashIndex(self)
+        return self._photo_index
+    
+    def get_reports(self):
+        """
+        Retorna o gerador de relatórios com consolidados diários
+        
+        Returns:
+            Instância de reports.ReportEngine
+        """
+        if self._reports is None:
+            from reports import ReportEngine
+            self._reports = ReportEngine(self)
+        return self._reports
+    
+    @property
+    def version(self):
+        """
+        Versão dos dados (cresce a cada alteração)
+        
+        Permite que visões derivadas sejam reaproveitadas enquanto
+        a versão não mudar.
+        """
+        return self._version
     
+    @metrics.timed('database.save_data')
     def _save_data(self, data):
-        """Salva dados no arquivo JSON"""
-        with open(self.db_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Salva dados no arquivo JSON (compacto e comprimido conforme a configuração)"""
+        write_json(self.db_path, data, compression=self.compression, default=to_json)
+    
+    @staticmethod
+    def make_record_id(registro):
+        """
+        Gera a chave natural de um registro a partir de data, hora e promotor
+        
+        Era o ID dos registros antes dos IDs ULID; continua sendo usada para
+        identificar check-ins repetidos (importação) e como ID antigo.
+        
+        Args:
+            registro: Dicionário com os dados do registro
+            
+        Returns:
+            String com a chave
+        """
+        return f"{registro['data']}_{registro['hora']}_{registro['promotor']}".replace(':', '-').replace(' ', '_')
+    
+    def find_existing_keys(self, registros):
+        """
+        Verifica quais check-ins já estão gravados (mesma chave natural)
+        
+        Os IDs começam pelo horário do check-in, então cada busca percorre
+        apenas os registros do mesmo horário, sem montar um índice à parte.
+        
+        Args:
+            registros: Lista de dicionários com data, hora e promotor
+            
+        Returns:
+            Conjunto com as chaves (make_record_id) já existentes
+        """
+        existing = set()
+        with self._lock:
+            for registro in registros:
+                ms = checkin_ms(registro)
+                first = bisect_left(self._ids, time_prefix(ms))
+                last = bisect_left(self._ids, time_prefix(ms + 1))
+                if first == last:
+                    continue
+                key = self.make_record_id(registro)
+                if any(self.make_record_id(record) == key for record in self.records[first:last]):
+                    existing.add(key)
+        return existing
     
+    @metrics.timed('database.add_record')
     def add_record(self, registro):
         """
         Adiciona um novo registro
@@ -45,18 +288,69 @@ class Database:
         Returns:
             ID do registro adicionado
         """
-        # Adiciona timestamp único como ID
-        registro['id'] = f"{registro['data']}_{registro['hora']}_{registro['promotor']}".replace(':', '-').replace(' ', '_')
-        registro['created_at'] = datetime.now().isoformat()
-        
-        self.records.append(registro)
-        self._save_data(self.records)
+        with self._lock:
+            # ID único e ordenado pelo horário do check-in
+            registro['id'] = new_record_id(registro)
+            registro['created_at'] = datetime.now().isoformat()
+            record = Record.from_dict(registro)
+            
+            self._insert(record)
+            self._mark_changed()
+            self._save_data(self.records)
+            self._notify('add', record)
         
         return registro['id']
     
+    @metrics.timed('database.add_records')
+    def add_records(self, registros, save=True):
+        """
+        Adiciona vários registros com uma única gravação em disco
+        
+        Args:
+            registros: Lista de dicionários com os dados dos registros
+            save: False deixa a gravação para uma chamada posterior de save()
+                (importações em blocos gravam o arquivo uma única vez)
+            
+        Returns:
+            Lista com os IDs dos registros adicionados
+        """
+        if not registros:
+            return []
+        
+        with self._lock:
+            created_at = datetime.now().isoformat()
+            for registro in registros:
+                registro['id'] = new_record_id(registro)
+                registro.setdefault('created_at', created_at)
+            
+            records = [Record.from_dict(registro) for registro in registros]
+            in_order = all(records[i].id <= records[i + 1].id for i in range(len(records) - 1))
+            if in_order and (not self._ids or records[0].id >= self._ids[-1]):
+                self.records.extend(records)
+                self._ids.extend(record.id for record in records)
+            else:
+                # Históricos importados fora de ordem: timsort aproveita os trechos já ordenados
+                self.records.extend(records)
+                self.records.sort(key=_record_id)
+                self._ids = [record.id for record in self.records]
+            for record in records:
+                self._by_id[record.id] = record
+            self._mark_changed()
+            if save:
+                self._save_data(self.records)
+            for record in records:
+                self._notify('add', record)
+        
+        return [registro['id'] for registro in registros]
+    
+    def save(self):
+        """Grava o estado atual no arquivo (após add_records(..., save=False))"""
+        with self._lock:
+            self._save_data(self.records)
+    
     def get_record_by_id(self, record_id):
         """
-        Busca um registro por ID
+        Busca um registro por ID (aceita também o ID antigo de registros migrados)
         
         Args:
             record_id: ID do registro
@@ -64,10 +358,7 @@ class Database:
         Returns:
             Dicionário com os dados ou None
         """
-        for record in self.records:
-            if record.get('id') == record_id:
-                return record
-        return None
+        return self._find(record_id)
     
     def get_all_records(self):
         """
@@ -78,6 +369,15 @@ class Database:
         """
         return self.records.copy()
     
+    def count_records(self):
+        """
+        Retorna o número de registros sem copiar a lista
+        
+        Returns:
+            Quantidade de registros
+        """
+        return len(self.records)
+    
     def get_records_by_date(self, date_str):
         """
         Busca registros por data
@@ -130,6 +430,103 @@ class Database:
             if start_date <= r.get('data', '') <= end_date
         ]
     
+    @staticmethod
+    def make_cursor(record):
+        """
+        Gera o cursor de paginação de um registro
+        
+        Args:
+            record: Dicionário do registro
+            
+        Returns:
+            O próprio ID (IDs ULID ordenam pelo horário do check-in)
+        """
+        return record.get('id', '')
+    
+    def _chunk_before(self, before=None):
+        """
+        Copia os _ITER_CHUNK registros imediatamente anteriores ao cursor
+        
+        Cada trecho é localizado pela lista de IDs, então inserções e
+        remoções entre um trecho e outro não pulam nem repetem registros.
+        
+        Args:
+            before: Cursor (None para o fim da lista)
+            
+        Returns:
+            Lista de registros em ordem de ID
+        """
+        with self._lock:
+            end = bisect_left(self._ids, before) if before is not None else len(self._ids)
+            return self.records[max(0, end - _ITER_CHUNK):end]
+    
+    @staticmethod
+    def _matches(record, data=None, promotor=None, pdv=None):
+        """Verifica se o registro atende aos filtros informados"""
+        if data and record.get('data') != data:
+            return False
+        if promotor and record.get('promotor') != promotor:
+            return False
+        if pdv and record.get('pdv') != pdv:
+            return False
+        return True
+    
+    def iter_records(self, data=None, promotor=None, pdv=None, before=None):
+        """
+        Percorre os registros filtrados, do mais recente para o mais antigo
+        
+        Args:
+            data: Data no formato YYYY-MM-DD (opcional)
+            promotor: Nome do promotor (opcional)
+            pdv: Nome do PDV (opcional)
+            before: Cursor; retorna apenas registros anteriores a ele (opcional)
+            
+        Yields:
+            Registros que atendem aos filtros
+        """
+        chunk = self._chunk_before(before or None)
+        while chunk:
+            for record in reversed(chunk):
+                if self._matches(record, data, promotor, pdv):
+                    yield record
+            chunk = self._chunk_before(chunk[0].id)
+    
+    def query_records(self, data=None, promotor=None, pdv=None, limit=25, before=None):
+        """
+        Busca uma página de registros (mais recentes primeiro)
+        
+        Args:
+            data: Data no formato YYYY-MM-DD (opcional)
+            promotor: Nome do promotor (opcional)
+            pdv: Nome do PDV (opcional)
+            limit: Tamanho da página
+            before: Cursor retornado pela página anterior (opcional)
+            
+        Returns:
+            Tupla (lista de registros, cursor da próxima página ou None)
+        """
+        page = []
+        for record in self.iter_records(data, promotor, pdv, before):
+            if len(page) == limit:
+                return page, self.make_cursor(page[-1])
+            page.append(record)
+        return page, None
+    
+    def summarize_records(self, data=None, promotor=None, pdv=None):
+        """
+        Calcula totais dos registros filtrados em uma única passada
+        
+        Args:
+            data: Data no formato YYYY-MM-DD (opcional)
+            promotor: Nome do promotor (opcional)
+            pdv: Nome do PDV (opcional)
+            
+        Returns:
+            Dicionário com totais
+        """
+        return self.get_analytics().totals(data=data, promotor=promotor, pdv=pdv)
+    
+    @metrics.timed('database.update_record')
     def update_record(self, record_id, updated_data):
         """
         Atualiza um registro existente
@@ -141,14 +538,19 @@ class Database:
         Returns:
             True se atualizado, False se não encontrado
         """
-        for i, record in enumerate(self.records):
-            if record.get('id') == record_id:
-                self.records[i].update(updated_data)
-                self.records[i]['updated_at'] = datetime.now().isoformat()
-                self._save_data(self.records)
-                return True
-        return False
+        with self._lock:
+            record = self._find(record_id)
+            if record is None:
+                return False
+            updated_data = {k: v for k, v in updated_data.items() if k != 'id'}
+            record.update(updated_data)
+            record['updated_at'] = datetime.now().isoformat()
+            self._mark_changed()
+            self._save_data(self.records)
+            self._notify('update', record)
+            return True
     
+    @metrics.timed('database.delete_record')
     def delete_record(self, record_id):
         """
         Remove um registro
@@ -159,12 +561,21 @@ class Database:
         Returns:
             True se removido, False se não encontrado
         """
-        for i, record in enumerate(self.records):
-            if record.get('id') == record_id:
-                self.records.pop(i)
-                self._save_data(self.records)
-                return True
-        return False
+        with self._lock:
+            record = self._find(record_id)
+            if record is None:
+                return False
+            i = bisect_left(self._ids, record.id)
+            self.records.pop(i)
+            self._ids.pop(i)
+            del self._by_id[record.id]
+            legacy_id = record.get('legacy_id')
+            if self._aliases is not None and self._aliases.get(legacy_id) == record.id:
+                del self._aliases[legacy_id]
+            self._mark_changed()
+            self._save_data(self.records)
+            self._notify('delete', record)
+            return True
     
     def get_statistics(self):
         """
@@ -183,19 +594,17 @@ class Database:
                 'total_fotos': 0
             }
         
-        promotores = set(r.get('promotor') for r in self.records)
-        pdvs = set(r.get('pdv') for r in self.records)
-        total_deslocamento = sum(r.get('valor_deslocamento', 0) for r in self.records)
-        total_entradas = sum(r.get('num_entradas', 1) for r in self.records)
-        total_fotos = sum(len(r.get('fotos', [])) for r in self.records)
+        frame = self.get_analytics().frame
+        promotores = frame['promotor'].unique().tolist()
+        pdvs = frame['pdv'].unique().tolist()
         
         return {
-            'total_registros': len(self.records),
+            'total_registros': len(frame),
             'total_promotores': len(promotores),
             'total_pdvs': len(pdvs),
-            'total_deslocamento': total_deslocamento,
-            'total_entradas': total_entradas,
-            'total_fotos': total_fotos,
+            'total_deslocamento': float(frame['valor_deslocamento'].sum()),
+            'total_entradas': int(frame['num_entradas'].sum()),
+            'total_fotos': int(frame['num_fotos'].sum()),
             'promotores': list(promotores),
             'pdvs': list(pdvs)
         }
@@ -210,9 +619,9 @@ class Database:
         Returns:
             Dicionário com estatísticas
         """
-        registros = self.get_records_by_promotor(promotor)
+        registros = self.get_analytics().filter(promotor=promotor)
         
-        if not registros:
+        if registros.empty:
             return {
                 'total_visitas': 0,
                 'total_deslocamento': 0,
@@ -221,17 +630,12 @@ class Database:
                 'pdvs_visitados': []
             }
         
-        pdvs = set(r.get('pdv') for r in registros)
-        total_deslocamento = sum(r.get('valor_deslocamento', 0) for r in registros)
-        total_entradas = sum(r.get('num_entradas', 1) for r in registros)
-        total_fotos = sum(len(r.get('fotos', [])) for r in registros)
-        
         return {
             'total_visitas': len(registros),
-            'total_deslocamento': total_deslocamento,
-            'total_entradas': total_entradas,
-            'total_fotos': total_fotos,
-            'pdvs_visitados': list(pdvs)
+            'total_deslocamento': float(registros['valor_deslocamento'].sum()),
+            'total_entradas': int(registros['num_entradas'].sum()),
+            'total_fotos': int(registros['num_fotos'].sum()),
+            'pdvs_visitados': registros['pdv'].unique().tolist()
         }
     
     def export_to_csv(self, output_path='data/export.csv'):
@@ -267,14 +671,21 @@ class Database:
                     'valor_deslocamento': record.get('valor_deslocamento', 0),
                     'num_entradas': record.get('num_entradas', 1),
                     'observacoes': record.get('observacoes', ''),
-                    'num_fotos': len(record.get('fotos', []))
+                    'num_fotos': record.photo_count()
                 }
                 writer.writerow(row)
     
+    @metrics.timed('database.clear_all_records')
     def clear_all_records(self):
         """Remove todos os registros (use com cuidado!)"""
-        self.records = []
-        self._save_data(self.records)
+        with self._lock:
+            self.records = []
+            self._by_id = {}
+            self._ids = []
+            self._aliases = None
+            self._mark_changed()
+            self._save_data(self.records)
+            self._notify('clear')
     
     def backup_database(self, backup_path='data/backup'):
         """
@@ -287,9 +698,7 @@ class Database:
         backup_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = backup_dir / f'backup_{timestamp}.json'
-        
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump(self.records, f, indent=2, ensure_ascii=False)
+        backup_file = backup_dir / f'backup_{timestamp}.json{SUFFIXES[self.compression]}'
         
-        return str(backup_file)
\ No newline at end of file
+        with self._lock:
+            return write_json(backup_file, self.records, compression=self.compression, default=to_json)
\ No newline at end of file
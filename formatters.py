@@ -0,0 +1,120 @@
+"""
+Módulo de formatação para exibição (moeda, data e hora no padrão brasileiro)
+Formatadores com cache e versões em lote para colunas inteiras
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from config import MOEDA, DATE_FORMAT, TIME_FORMAT, DATETIME_FORMAT, FORMAT_CACHE_SIZE
+
+# Troca separadores do padrão americano (1,234.56) pelo brasileiro (1.234,56)
+_BR_SEPARATORS = str.maketrans({',': '.', '.': ','})
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _currency(value):
+    return f"{MOEDA} {value:,.2f}".translate(_BR_SEPARATORS)
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _iso_to(iso_str, fmt):
+    return datetime.fromisoformat(iso_str).strftime(fmt)
+
+
+def format_currency(value):
+    """
+    Formata valor monetário
+
+    Args:
+        value: Valor numérico
+
+    Returns:
+        String formatada (ex.: "R$ 1.234,56")
+    """
+    return _currency(float(value))
+
+
+def format_date(date_obj):
+    """
+    Formata data para exibição
+
+    Args:
+        date_obj: Objeto datetime ou string ISO
+
+    Returns:
+        String formatada
+    """
+    if isinstance(date_obj, str):
+        return _iso_to(date_obj, DATE_FORMAT)
+    return date_obj.strftime(DATE_FORMAT)
+
+
+def format_time(time_obj):
+    """
+    Formata hora para exibição
+
+    Args:
+        time_obj: Objeto datetime ou string
+
+    Returns:
+        String formatada
+    """
+    if isinstance(time_obj, str):
+        if 'T' in time_obj:
+            return _iso_to(time_obj, TIME_FORMAT)
+        return time_obj
+    return time_obj.strftime(TIME_FORMAT)
+
+
+def format_datetime(datetime_obj):
+    """
+    Formata data/hora completo
+
+    Args:
+        datetime_obj: Objeto datetime ou string ISO
+
+    Returns:
+        String formatada
+    """
+    if isinstance(datetime_obj, str):
+        return _iso_to(datetime_obj, DATETIME_FORMAT)
+    return datetime_obj.strftime(DATETIME_FORMAT)
+
+
+def format_currency_column(values):
+    """
+    Formata uma coluna de valores monetários
+
+    Cada valor distinto é formatado uma única vez.
+
+    Args:
+        values: Lista, array ou pandas Series de números
+
+    Returns:
+        Lista de strings formatadas
+    """
+    numbers = np.asarray(values, dtype=float)
+    if numbers.size == 0:
+        return []
+    uniques, inverse = np.unique(numbers, return_inverse=True)
+    formatted = np.array([_currency(float(v)) for v in uniques], dtype=object)
+    return formatted[inverse].tolist()
+
+
+def format_date_column(values, fmt=DATE_FORMAT):
+    """
+    Formata uma coluna de datas (strings ISO ou datetime)
+
+    Args:
+        values: Lista ou pandas Series de datas
+        fmt: Formato de saída (padrão: DATE_FORMAT)
+
+    Returns:
+        Lista de strings formatadas ('' para datas inválidas)
+    """
+    dates = pd.to_datetime(pd.Series(values), errors='coerce')
+    return dates.dt.strftime(fmt).fillna('').tolist()
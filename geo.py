@@ -0,0 +1,195 @@
+"""
+Módulo de geolocalização de PDVs
+Índice espacial em grade para encontrar os PDVs mais próximos de uma
+posição e conferência do valor de deslocamento pela distância percorrida
+"""
+
+import math
+from collections import defaultdict
+
+from config import (
+    GEO_GRID_CELL_KM,
+    GEO_NEAREST_PDVS,
+    GEO_MAX_DISTANCE_KM,
+    VALOR_POR_KM,
+    DESLOCAMENTO_TOLERANCIA,
+    DESLOCAMENTO_MARGEM
+)
+from formatters import format_currency
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distância em linha reta entre dois pontos
+
+    Args:
+        lat1, lon1: Coordenadas do primeiro ponto (graus)
+        lat2, lon2: Coordenadas do segundo ponto (graus)
+
+    Returns:
+        Distância em km
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def validate_coordinates(lat, lon):
+    """
+    Valida latitude e longitude
+
+    Returns:
+        Tupla (válido, mensagem_erro)
+    """
+    try:
+        lat = float(lat)
+        lon = float(lon)
+    except (TypeError, ValueError):
+        return False, "Coordenadas devem ser numéricas"
+    if not -90 <= lat <= 90:
+        return False, "Latitude deve estar entre -90 e 90"
+    if not -180 <= lon <= 180:
+        return False, "Longitude deve estar entre -180 e 180"
+    return True, ""
+
+
+class GridIndex:
+    """Índice espacial em grade (células de tamanho fixo em graus)"""
+
+    def __init__(self, points=None, cell_km=GEO_GRID_CELL_KM):
+        """
+        Args:
+            points: Dicionário nome -> (lat, lon) (opcional)
+            cell_km: Lado da célula em km (no sentido norte-sul)
+        """
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self._cells = defaultdict(list)
+        self._bounds = None
+        for name, (lat, lon) in (points or {}).items():
+            self.add(name, lat, lon)
+
+    def __len__(self):
+        return sum(len(items) for items in self._cells.values())
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def add(self, name, lat, lon):
+        """Adiciona um ponto ao índice"""
+        i, j = self._cell(lat, lon)
+        self._cells[(i, j)].append((name, lat, lon))
+        if self._bounds is None:
+            self._bounds = [i, i, j, j]
+        else:
+            b = self._bounds
+            b[0], b[1], b[2], b[3] = min(b[0], i), max(b[1], i), min(b[2], j), max(b[3], j)
+
+    def _ring(self, ci, cj, r):
+        """Células na borda do quadrado de raio r ao redor de (ci, cj)"""
+        if r == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def _covered_km(self, lat, r):
+        """Raio garantidamente coberto após visitar os anéis 0..r"""
+        # Longitude encolhe com a latitude: usa a mais afastada do equador no alcance
+        lat_max = min(89.0, abs(lat) + (r + 1) * self.cell_deg)
+        return r * self.cell_km * math.cos(math.radians(lat_max))
+
+    def nearest(self, lat, lon, k=GEO_NEAREST_PDVS, max_km=GEO_MAX_DISTANCE_KM):
+        """
+        Busca os k pontos mais próximos
+
+        Args:
+            lat, lon: Posição de referência
+            k: Quantidade de pontos
+            max_km: Distância máxima (None para sem limite)
+
+        Returns:
+            Lista de tuplas (nome, distância_km) em ordem crescente
+        """
+        if not self._cells or k <= 0:
+            return []
+
+        ci, cj = self._cell(lat, lon)
+        b = self._bounds
+        # Anel a partir do qual todas as células ocupadas já foram visitadas
+        last_ring = max(abs(ci - b[0]), abs(ci - b[1]), abs(cj - b[2]), abs(cj - b[3]))
+        found = []
+
+        r = 0
+        while r <= last_ring:
+            for cell in self._ring(ci, cj, r):
+                for name, plat, plon in self._cells.get(cell, ()):
+                    distance = haversine_km(lat, lon, plat, plon)
+                    if max_km is None or distance <= max_km:
+                        found.append((distance, name))
+
+            covered = self._covered_km(lat, r)
+            if max_km is not None and covered >= max_km:
+                break
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                if found[-1][0] <= covered:
+                    break
+            r += 1
+
+        found.sort()
+        return [(name, distance) for distance, name in found[:k]]
+
+    def within(self, lat, lon, radius_km):
+        """
+        Lista os pontos dentro de um raio
+
+        Returns:
+            Lista de tuplas (nome, distância_km) em ordem crescente
+        """
+        return self.nearest(lat, lon, k=len(self), max_km=radius_km)
+
+
+def expected_travel_value(distance_km):
+    """
+    Valor de referência para uma distância
+
+    Args:
+        distance_km: Distância percorrida em km
+
+    Returns:
+        Valor esperado
+    """
+    return round(distance_km * VALOR_POR_KM, 2)
+
+
+def check_valor_deslocamento(valor, distance_km):
+    """
+    Confere se o valor informado é compatível com a distância
+
+    Args:
+        valor: Valor de deslocamento informado
+        distance_km: Distância entre a origem e o PDV em km
+
+    Returns:
+        Tupla (compatível, mensagem)
+    """
+    esperado = expected_travel_value(distance_km)
+    limite = esperado * (1 + DESLOCAMENTO_TOLERANCIA) + DESLOCAMENTO_MARGEM
+    if valor > limite:
+        return False, (
+            f"Valor de {format_currency(valor)} acima do esperado para {distance_km:.1f} km "
+            f"(referência {format_currency(esperado)}, limite {format_currency(limite)})"
+        )
+    return True, ""
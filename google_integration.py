@@ -5,15 +5,21 @@ Usa OAuth2 para funcionar com contas pessoais do Google
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 import streamlit as st
 import pickle
 import os
+import threading
 from pathlib import Path
 from io import BytesIO
 from config import DRIVE_FOLDER_NAME, SHEET_NAME
+from rate_limiter import execute_with_backoff
+from credential_manager import credential_holder
+from metrics import metrics
+
+# Versão da API de cada serviço
+API_VERSIONS = {'drive': 'v3', 'sheets': 'v4'}
 
 # Escopos necessários
 SCOPES = [
@@ -25,13 +31,65 @@ class GoogleIntegration:
     """Classe para gerenciar integração com Google Drive e Sheets usando OAuth2"""
     
     def __init__(self):
+        self._init_state()
+        self.authenticate()
+        self._setup_drive_structure()
+    
+    def _init_state(self):
+        """Inicializa os atributos sem autenticar"""
         self.credentials = None
-        self.drive_service = None
-        self.sheets_service = None
         self.main_folder_id = None
         self.spreadsheet_id = None
-        self.authenticate()
-        self._setup_drive_structure()
+        # Os serviços do Google não são thread-safe (cada um usa uma única
+        # conexão HTTP): as threads de envio criam os seus sob demanda
+        self._services = {}
+        self._local = threading.local()
+        # Pastas do Drive já localizadas (caminho -> ID) e trava por caminho,
+        # para que tarefas simultâneas não criem a mesma pasta duas vezes
+        self._folder_ids = {}
+        self._folder_locks = {}
+        self._folder_lock = threading.Lock()
+    
+    def _get_service(self, api):
+        """
+        Retorna o serviço da API para a thread atual
+        
+        Args:
+            api: 'drive' ou 'sheets'
+        
+        Returns:
+            Serviço do googleapiclient (None antes da autenticação)
+        """
+        cached = getattr(self._local, api, None)
+        if cached is not None and cached[0] is self.credentials:
+            return cached[1]
+        
+        service = self._services.get(api)
+        if service is not None and self.credentials is not None:
+            service = build(api, API_VERSIONS[api], credentials=self.credentials, cache_discovery=False)
+            setattr(self._local, api, (self.credentials, service))
+        return service
+    
+    def _set_service(self, api, service):
+        """Define o serviço da thread atual e o modelo usado pelas demais"""
+        self._services[api] = service
+        setattr(self._local, api, (self.credentials, service))
+    
+    @property
+    def drive_service(self):
+        return self._get_service('drive')
+    
+    @drive_service.setter
+    def drive_service(self, service):
+        self._set_service('drive', service)
+    
+    @property
+    def sheets_service(self):
+        return self._get_service('sheets')
+    
+    @sheets_service.setter
+    def sheets_service(self, service):
+        self._set_service('sheets', service)
 
     def _load_token_from_secrets(self):
         """Carrega token do Streamlit Secrets (para Streamlit Cloud)"""
@@ -49,12 +107,26 @@ class GoogleIntegration:
     def authenticate(self):
         """Autentica usando OAuth2 (funciona local e no Streamlit Cloud)"""
         try:
+            # PRIORIDADE 0: Credenciais já carregadas por outra sessão neste processo
+            try:
+                cached_credentials = credential_holder.get()
+            except Exception:
+                credential_holder.clear()
+                cached_credentials = None
+            if cached_credentials is not None and cached_credentials.valid:
+                self.credentials = cached_credentials
+                self.drive_service = build('drive', 'v3', credentials=self.credentials)
+                self.sheets_service = build('sheets', 'v4', credentials=self.credentials)
+                return
+            
             # PRIORIDADE 1: Tenta carregar do Streamlit Secrets (para Streamlit Cloud)
             if self._load_token_from_secrets():
+                credential_holder.set(self.credentials)
+                
                 # Verifica se o token precisa ser renovado
                 if self.credentials.expired and self.credentials.refresh_token:
                     try:
-                        self.credentials.refresh(Request())
+                        credential_holder.refresh(force=True)
                         st.info("🔄 Token renovado automaticamente")
                     except Exception as e:
                         st.error(f"❌ Erro ao renovar token: {e}")
@@ -80,10 +152,12 @@ class GoogleIntegration:
                 if self.credentials and self.credentials.expired and self.credentials.refresh_token:
                     # Tenta renovar
                     try:
-                        self.credentials.refresh(Request())
+                        credential_holder.set(self.credentials)
+                        credential_holder.refresh(force=True)
                         st.info("🔄 Token renovado automaticamente")
                     except Exception as e:
                         st.warning(f"⚠️ Erro ao renovar token: {e}")
+                        credential_holder.clear()
                         self.credentials = None
                 
                 # Se ainda não tem credenciais, precisa autenticar localmente
@@ -158,6 +232,9 @@ class GoogleIntegration:
                         3. Execute novamente a autenticação
                         """)
             
+            # Compartilha as credenciais com as próximas sessões
+            credential_holder.set(self.credentials)
+            
             # Inicializa os serviços
             self.drive_service = build('drive', 'v3', credentials=self.credentials)
             self.sheets_service = build('sheets', 'v4', credentials=self.credentials)
@@ -179,11 +256,11 @@ class GoogleIntegration:
         try:
             # Pasta principal
             query = f"name='{DRIVE_FOLDER_NAME}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.drive_service.files().list(
+            results = execute_with_backoff('drive', self.drive_service.files().list(
                 q=query, 
                 spaces='drive',
                 fields='files(id, name, webViewLink)'
-            ).execute()
+            ))
             
             folders = results.get('files', [])
             
@@ -195,10 +272,10 @@ class GoogleIntegration:
                     'name': DRIVE_FOLDER_NAME,
                     'mimeType': 'application/vnd.google-apps.folder'
                 }
-                folder = self.drive_service.files().create(
+                folder = execute_with_backoff('drive', self.drive_service.files().create(
                     body=folder_metadata,
                     fields='id, webViewLink'
-                ).execute()
+                ))
                 self.main_folder_id = folder.get('id')
                 st.success(f"Pasta '{DRIVE_FOLDER_NAME}' criada")
         
@@ -209,11 +286,11 @@ class GoogleIntegration:
         try:
             # Planilha principal
             query = f"name='{SHEET_NAME}' and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false"
-            results = self.drive_service.files().list(
+            results = execute_with_backoff('drive', self.drive_service.files().list(
                 q=query,
                 spaces='drive',
                 fields='files(id, name, webViewLink)'
-            ).execute()
+            ))
             
             sheets = results.get('files', [])
             
@@ -228,34 +305,34 @@ class GoogleIntegration:
                         'properties': {'title': 'Registros'}
                     }]
                 }
-                spreadsheet = self.sheets_service.spreadsheets().create(
+                spreadsheet = execute_with_backoff('sheets', self.sheets_service.spreadsheets().create(
                     body=spreadsheet,
                     fields='spreadsheetId'
-                ).execute()
+                ))
                 self.spreadsheet_id = spreadsheet.get('spreadsheetId')
                 
                 # Adiciona cabeçalhos
                 headers = [['Data', 'Hora', 'Promotor', 'PDV', 'Valor Deslocamento',
                            'Nº Entradas', 'Observações', 'Fotos']]
-                self.sheets_service.spreadsheets().values().update(
+                execute_with_backoff('sheets', self.sheets_service.spreadsheets().values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range='Registros!A1:H1',
                     valueInputOption='RAW',
                     body={'values': headers}
-                ).execute()
+                ))
                 
                 # Move planilha para pasta principal
-                file = self.drive_service.files().get(
+                file = execute_with_backoff('drive', self.drive_service.files().get(
                     fileId=self.spreadsheet_id,
                     fields='parents'
-                ).execute()
+                ))
                 previous_parents = ",".join(file.get('parents', []))
-                self.drive_service.files().update(
+                execute_with_backoff('drive', self.drive_service.files().update(
                     fileId=self.spreadsheet_id,
                     addParents=self.main_folder_id,
                     removeParents=previous_parents,
                     fields='id, parents'
-                ).execute()
+                ))
                 st.success(f"Planilha '{SHEET_NAME}' criada e movida para a pasta")
             
             # Exibe links permanentes
@@ -270,17 +347,40 @@ class GoogleIntegration:
             st.stop()
     
     def _get_or_create_folder(self, folder_path):
+        """
+        Retorna o ID de uma pasta, localizada ou criada só na primeira vez
+        
+        Apenas as tarefas que usam a mesma pasta aguardam a criação; as
+        demais seguem em paralelo.
+        """
+        with self._folder_lock:
+            folder_id = self._folder_ids.get(folder_path)
+            if folder_id is not None:
+                return folder_id
+            path_lock = self._folder_locks.setdefault(folder_path, threading.Lock())
+        
+        with path_lock:
+            folder_id = self._folder_ids.get(folder_path)
+            if folder_id is None:
+                folder_id = self._find_or_create_folder(folder_path)
+                with self._folder_lock:
+                    self._folder_ids[folder_path] = folder_id
+                    self._folder_locks.pop(folder_path, None)
+        return folder_id
+    
+    @metrics.timed('google.get_or_create_folder')
+    def _find_or_create_folder(self, folder_path):
         """Cria ou obtém ID de uma pasta no caminho especificado"""
         folders = folder_path.split('/')
         parent_id = self.main_folder_id
         
         for folder_name in folders:
             query = f"name='{folder_name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.drive_service.files().list(
+            results = execute_with_backoff('drive', self.drive_service.files().list(
                 q=query,
                 spaces='drive',
                 fields='files(id, name)'
-            ).execute()
+            ))
             items = results.get('files', [])
             
             if items:
@@ -291,80 +391,116 @@ class GoogleIntegration:
                     'mimeType': 'application/vnd.google-apps.folder',
                     'parents': [parent_id]
                 }
-                folder = self.drive_service.files().create(
+                folder = execute_with_backoff('drive', self.drive_service.files().create(
                     body=folder_metadata,
                     fields='id'
-                ).execute()
+                ))
                 parent_id = folder.get('id')
                 
         return parent_id
 
-    def upload_photo(self, file_data, folder_path, file_name):
-        """Faz upload de uma foto para o Google Drive e retorna link público"""
-        try:
-            folder_id = self._get_or_create_folder(folder_path)
+    @metrics.timed('google.upload_photo')
+    def upload_file(self, file_data, folder_path, file_name):
+        """
+        Envia uma foto ao Google Drive sem exibir mensagens na interface
+        (usado pelas tarefas em segundo plano)
+        
+        Args:
+            file_data: Arquivo aberto em modo binário (BytesIO)
+            folder_path: Pasta de destino (ex.: "Promotor/2024-01-01")
+            file_name: Nome do arquivo
+        
+        Returns:
+            Link público da foto
+        
+        Raises:
+            Exception: Erros da API do Google após as novas tentativas
+        """
+        folder_id = self._get_or_create_folder(folder_path)
+        file_metadata = {
+            'name': file_name,
+            'parents': [folder_id]
+        }
+        
+        def create_request():
+            # Recria o upload a cada tentativa para reenviar desde o início
             file_data.seek(0)
-            
             media = MediaIoBaseUpload(
                 file_data,
                 mimetype='image/jpeg',
                 resumable=True
             )
-            file_metadata = {
-                'name': file_name,
-                'parents': [folder_id]
-            }
-            
-            file = self.drive_service.files().create(
+            return self.drive_service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id, webViewLink'
-            ).execute()
-            
-            # Adiciona permissão pública (opcional)
-            try:
-                self.drive_service.permissions().create(
-                    fileId=file.get('id'),
-                    body={'type': 'anyone', 'role': 'reader'}
-                ).execute()
-            except Exception as e:
-                # Não é crítico se falhar
-                pass
-            
-            return file.get('webViewLink')
+            )
+        
+        file = execute_with_backoff('drive', create_request)
+        
+        # Adiciona permissão pública (opcional)
+        try:
+            execute_with_backoff('drive', self.drive_service.permissions().create(
+                fileId=file.get('id'),
+                body={'type': 'anyone', 'role': 'reader'}
+            ))
+        except Exception as e:
+            # Não é crítico se falhar
+            pass
+        
+        return file.get('webViewLink')
+
+    def upload_photo(self, file_data, folder_path, file_name):
+        """Faz upload de uma foto para o Google Drive e retorna link público"""
+        try:
+            return self.upload_file(file_data, folder_path, file_name)
             
         except Exception as e:
             st.error(f"❌ Erro ao fazer upload da foto: {e}")
             return None
 
+    @metrics.timed('google.add_to_sheet')
+    def append_row(self, registro):
+        """
+        Adiciona o registro à planilha sem exibir mensagens na interface
+        (usado pelas tarefas em segundo plano)
+        
+        Args:
+            registro: Dicionário com os dados do registro
+        
+        Raises:
+            Exception: Erros da API do Google após as novas tentativas
+        """
+        # Garante que fotos é uma lista e filtra valores None
+        fotos = registro.get('fotos', [])
+        if fotos:
+            fotos = [f for f in fotos if f is not None]
+        fotos_links = '\n'.join(fotos) if fotos else ''
+        
+        values = [[
+            str(registro.get('data', '')),
+            str(registro.get('hora', '')),
+            str(registro.get('promotor', '')),
+            str(registro.get('pdv', '')),
+            str(registro.get('valor_deslocamento', 0)),
+            str(registro.get('num_entradas', 1)),
+            str(registro.get('observacoes', '')),
+            fotos_links
+        ]]
+        
+        body = {'values': values}
+        
+        return execute_with_backoff('sheets', self.sheets_service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range='Registros!A:H',
+            valueInputOption='RAW',
+            body=body
+        ))
+
     def add_to_sheet(self, registro):
         """Adiciona um registro à planilha do Google Sheets"""
         try:
-            # Garante que fotos é uma lista e filtra valores None
-            fotos = registro.get('fotos', [])
-            if fotos:
-                fotos = [f for f in fotos if f is not None]
-            fotos_links = '\n'.join(fotos) if fotos else ''
-            
-            values = [[
-                str(registro.get('data', '')),
-                str(registro.get('hora', '')),
-                str(registro.get('promotor', '')),
-                str(registro.get('pdv', '')),
-                str(registro.get('valor_deslocamento', 0)),
-                str(registro.get('num_entradas', 1)),
-                str(registro.get('observacoes', '')),
-                fotos_links
-            ]]
-            
-            body = {'values': values}
-            
-            result = self.sheets_service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range='Registros!A:H',
-                valueInputOption='RAW',
-                body=body
-            ).execute()
+            self.append_row(registro)
             
             st.success(f"✅ Registro salvo com sucesso!")
             
@@ -382,13 +518,14 @@ class GoogleIntegration:
         """Retorna URL da pasta do Drive"""
         return f"https://drive.google.com/drive/folders/{self.main_folder_id}"
 
+    @metrics.timed('google.get_all_records_from_sheet')
     def get_all_records_from_sheet(self):
         """Obtém todos os registros da planilha"""
         try:
-            result = self.sheets_service.spreadsheets().values().get(
+            result = execute_with_backoff('sheets', self.sheets_service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='Registros!A2:H'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             records = []
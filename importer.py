@@ -0,0 +1,231 @@
+"""
+Importação em lote de históricos de check-ins
+
+Lê arquivos CSV (mesmas colunas de Database.export_to_csv ou da planilha
+do Google Sheets) ou JSONL em blocos, valida cada bloco de forma vetorizada,
+remove duplicados (consultando o banco bloco a bloco) e grava o arquivo
+do banco uma única vez ao final.
+
+Uso:
+    python importer.py historico.csv [--db data/local_backup.json] [--chunk-size 5000]
+"""
+
+import argparse
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from config import DATABASE_PATH, IMPORT_CHUNK_SIZE
+from database import Database, DatabaseLoadError
+from utils import validate_checkin_batch, build_checkin_record
+
+# Cabeçalhos da planilha do Google Sheets -> campos do registro
+SHEET_COLUMNS = {
+    'Data': 'data',
+    'Hora': 'hora',
+    'Promotor': 'promotor',
+    'PDV': 'pdv',
+    'Valor Deslocamento': 'valor_deslocamento',
+    'Nº Entradas': 'num_entradas',
+    'Observações': 'observacoes',
+    'Fotos': 'fotos'
+}
+
+# Quantidade máxima de mensagens de erro guardadas no resultado
+MAX_ERROR_MESSAGES = 100
+
+
+class InvalidRow:
+    """Linha que não pôde ser lida (contada como inválida na importação)"""
+
+    __slots__ = ('erro',)
+
+    def __init__(self, erro):
+        self.erro = erro
+
+
+def iter_csv_rows(path):
+    """
+    Lê um CSV linha a linha, convertendo cabeçalhos da planilha
+
+    Args:
+        path: Caminho do arquivo
+
+    Yields:
+        Dicionários com os campos do registro
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            dados = {SHEET_COLUMNS.get(k, k): v for k, v in row.items() if k}
+            if isinstance(dados.get('fotos'), str):
+                dados['fotos'] = [link for link in dados['fotos'].split('\n') if link]
+            yield dados
+
+
+def iter_jsonl_rows(path):
+    """
+    Lê um arquivo JSONL (um registro por linha)
+
+    Args:
+        path: Caminho do arquivo
+
+    Yields:
+        Dicionários com os campos do registro, ou InvalidRow para linhas
+        com JSON inválido
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for numero, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                dados = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidRow(f"Linha {numero}: JSON inválido ({e.msg})")
+                continue
+            if not isinstance(dados, dict):
+                yield InvalidRow(f"Linha {numero}: registro não é um objeto JSON")
+                continue
+            yield dados
+
+
+def iter_rows(path):
+    """Escolhe o leitor pela extensão do arquivo"""
+    if Path(path).suffix.lower() in ('.jsonl', '.ndjson'):
+        return iter_jsonl_rows(path)
+    return iter_csv_rows(path)
+
+
+def iter_chunks(rows, size):
+    """Agrupa um iterável em listas de até `size` itens"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_rows(db, rows, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Importa registros em blocos, ignorando inválidos e duplicados
+
+    Args:
+        db: Instância de Database
+        rows: Iterável de dicionários
+        chunk_size: Registros por bloco (memória usada independe do arquivo)
+        progress: Função chamada com o resultado parcial após cada bloco
+
+    Returns:
+        Dicionário com lidos, importados, duplicados, invalidos e erros
+    """
+    resultado = {
+        'lidos': 0,
+        'importados': 0,
+        'duplicados': 0,
+        'invalidos': 0,
+        'erros': []
+    }
+    try:
+        for chunk in iter_chunks(rows, chunk_size):
+            _import_chunk(db, chunk, resultado)
+            if progress:
+                progress(resultado)
+    finally:
+        if resultado['importados']:
+            db.save()
+
+    return resultado
+
+
+def _import_chunk(db, chunk, resultado):
+    """Valida um bloco e adiciona os registros novos ao banco (sem gravar o arquivo)"""
+    validos = []
+    legiveis = [dados for dados in chunk if not isinstance(dados, InvalidRow)]
+    validacao = zip(*validate_checkin_batch(legiveis), legiveis) if legiveis else iter(())
+
+    for linha in chunk:
+        resultado['lidos'] += 1
+
+        if isinstance(linha, InvalidRow):
+            resultado['invalidos'] += 1
+            if len(resultado['erros']) < MAX_ERROR_MESSAGES:
+                resultado['erros'].append(linha.erro)
+            continue
+
+        invalido, erros, dados = next(validacao)
+        if invalido:
+            resultado['invalidos'] += 1
+            if len(resultado['erros']) < MAX_ERROR_MESSAGES:
+                resultado['erros'].append(f"Linha {resultado['lidos']}: {'; '.join(erros)}")
+            continue
+
+        validos.append(build_checkin_record(dados))
+
+    # Chave natural (data, hora, promotor): os IDs gravados são ULIDs únicos.
+    # Os blocos anteriores já estão no banco; o bloco atual é conferido à parte
+    existentes = db.find_existing_keys(validos)
+    vistos = set()
+    novos = []
+    for registro in validos:
+        chave = Database.make_record_id(registro)
+        if chave in existentes or chave in vistos:
+            resultado['duplicados'] += 1
+            continue
+        vistos.add(chave)
+        novos.append(registro)
+
+    db.add_records(novos, save=False)
+    resultado['importados'] += len(novos)
+
+
+def import_file(db, path, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Importa um arquivo CSV ou JSONL
+
+    Args:
+        db: Instância de Database
+        path: Caminho do arquivo
+        chunk_size: Registros por bloco (memória usada independe do arquivo)
+        progress: Função chamada com o resultado parcial após cada bloco
+
+    Returns:
+        Dicionário com lidos, importados, duplicados, invalidos e erros
+    """
+    return import_rows(db, iter_rows(path), chunk_size, progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa históricos de check-ins (CSV/JSONL)")
+    parser.add_argument('arquivos', nargs='+', help='Arquivos CSV ou JSONL')
+    parser.add_argument('--db', default=DATABASE_PATH, help='Caminho do banco de dados local')
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    try:
+        db = Database(args.db)
+    except DatabaseLoadError as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    def mostrar_progresso(parcial):
+        print(
+            f"\r   {parcial['lidos']} lidos | {parcial['importados']} importados | "
+            f"{parcial['duplicados']} duplicados | {parcial['invalidos']} inválidos",
+            end='',
+            flush=True
+        )
+
+    for arquivo in args.arquivos:
+        print(f"📥 Importando {arquivo}")
+        resultado = import_file(db, arquivo, args.chunk_size, mostrar_progresso)
+        print()
+        for erro in resultado['erros']:
+            print(f"   ⚠️ {erro}")
+
+    print(f"✅ Total de registros no banco: {db.count_records()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+API HTTP local para ingestão de check-ins fora do Streamlit
+
+Endpoints:
+    POST /checkins   JSON (objeto, lista ou {"checkins": [...]}) ou
+                     multipart/form-data (campo "checkin" + arquivos "fotos")
+    GET  /jobs/<id>  Estado da sincronização com o Google
+    GET  /health     Situação do serviço
+    GET  /metrics    Latência das operações (formato texto do Prometheus)
+
+Uso:
+    python ingestion_api.py [--host 127.0.0.1] [--port 8502] [--sync]
+"""
+
+import argparse
+import base64
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (
+    DATABASE_PATH,
+    INGESTION_HOST,
+    INGESTION_PORT,
+    INGESTION_MAX_BATCH,
+    INGESTION_COMMIT_INTERVAL_MS,
+    INGESTION_MAX_BODY_MB,
+    MAX_PHOTOS_PER_CHECKIN
+)
+from database import Database, DatabaseLoadError
+from metrics import metrics
+from photo_store import photo_store
+from sync_worker import sync_worker, STATUS_OFFLINE
+from utils import validate_checkin, generate_photo_filename
+
+
+class GroupCommitWriter:
+    """Agrupa check-ins de várias requisições em uma única gravação em disco"""
+
+    def __init__(self, db, max_batch=INGESTION_MAX_BATCH, interval_ms=INGESTION_COMMIT_INTERVAL_MS):
+        self.db = db
+        self.max_batch = max_batch
+        self.interval = interval_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='pdv-group-commit', daemon=True)
+        self._thread.start()
+
+    def write(self, registros):
+        """
+        Enfileira registros e aguarda a gravação do grupo
+
+        Args:
+            registros: Lista de registros já validados
+
+        Returns:
+            Lista de IDs na mesma ordem
+        """
+        future = Future()
+        self._queue.put((registros, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            total = len(pending[0][0])
+
+            # Aguarda um pouco para juntar outras requisições ao mesmo commit
+            try:
+                while total < self.max_batch:
+                    item = self._queue.get(timeout=self.interval)
+                    pending.append(item)
+                    total += len(item[0])
+            except queue.Empty:
+                pass
+
+            batch = [r for registros, _ in pending for r in registros]
+            try:
+                self.db.add_records(batch)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            for registros, future in pending:
+                future.set_result([r['id'] for r in registros])
+
+
+class IngestionService:
+    """Valida, grava e agenda a sincronização dos check-ins recebidos"""
+
+    def __init__(self, db, google=None):
+        """
+        Args:
+            db: Instância de Database
+            google: Instância de GoogleIntegration (None desativa a sincronização)
+        """
+        self.db = db
+        self.google = google
+        self.writer = GroupCommitWriter(db)
+
+    def ingest(self, itens):
+        """
+        Processa uma lista de check-ins
+
+        Args:
+            itens: Lista de tuplas (dados, fotos) onde fotos é lista de bytes
+
+        Returns:
+            Dicionário com 'aceitos' (IDs e tarefas) e 'erros' por índice
+        """
+        validos = []
+        erros = []
+
+        for indice, (dados, fotos) in enumerate(itens):
+            registro, mensagens = validate_checkin(dados)
+            if len(fotos) > MAX_PHOTOS_PER_CHECKIN:
+                mensagens = mensagens + [f"fotos: Máximo de {MAX_PHOTOS_PER_CHECKIN} fotos"]
+            if mensagens:
+                erros.append({'indice': indice, 'erros': mensagens})
+                continue
+            # Fotos guardadas localmente antes do envio: um reinício não as perde
+            registro['fotos'] = [photo_store.put(foto) for foto in fotos]
+            if self.google is not None:
+                registro['sync_status'] = 'pendente'
+            else:
+                # Sem sincronização: fotos aguardam o envio posterior
+                registro['sync_status'] = STATUS_OFFLINE
+            validos.append((registro, fotos))
+
+        try:
+            ids = self.writer.write([registro for registro, _ in validos]) if validos else []
+        except Exception:
+            # Nada foi gravado: libera as fotos guardadas para estes check-ins
+            for registro, _ in validos:
+                for ref in registro['fotos']:
+                    photo_store.release(ref)
+            raise
+
+        aceitos = []
+        for record_id, (registro, fotos) in zip(ids, validos):
+            aceito = {'id': record_id}
+            if self.google is not None:
+                aceito['job_id'] = sync_worker.submit(
+                    self.db,
+                    self.google,
+                    record_id,
+                    [(generate_photo_filename(registro['pdv'], i), foto) for i, foto in enumerate(fotos, 1)],
+                    f"{registro['promotor']}/{registro['data']}",
+                    descricao=f"{registro['promotor']} - {registro['pdv']} (API)",
+                    local_refs=list(registro['fotos'])
+                )
+            aceitos.append(aceito)
+
+        return {'aceitos': aceitos, 'erros': erros}
+
+
+def _parse_json(body):
+    """Converte o corpo JSON em lista de (dados, fotos)"""
+    payload = json.loads(body)
+    if isinstance(payload, dict) and 'checkins' in payload:
+        payload = payload['checkins']
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list):
+        raise ValueError("Envie um objeto, uma lista ou {\"checkins\": [...]}")
+
+    itens = []
+    for dados in payload:
+        if not isinstance(dados, dict):
+            raise ValueError("Cada check-in deve ser um objeto JSON")
+        fotos = [base64.b64decode(f) for f in dados.pop('fotos_base64', [])]
+        itens.append((dados, fotos))
+    return itens
+
+
+def _parse_multipart(content_type, body):
+    """Converte o corpo multipart em lista com um único (dados, fotos)"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+    )
+    dados = None
+    fotos = []
+
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name == 'checkin':
+            dados = json.loads(part.get_payload(decode=True))
+        elif name == 'fotos':
+            fotos.append(part.get_payload(decode=True))
+
+    if not isinstance(dados, dict):
+        raise ValueError("Campo 'checkin' (JSON) é obrigatório")
+    return [(dados, fotos)]
+
+
+class IngestionHandler(BaseHTTPRequestHandler):
+    """Handler HTTP da API de ingestão"""
+
+    service = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {
+                'status': 'ok',
+                'registros': self.service.db.count_records(),
+                'sincronizacao': self.service.google is not None
+            })
+        elif self.path == '/metrics':
+            body = metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith('/jobs/'):
+            job = sync_worker.get_job(self.path[len('/jobs/'):])
+            if job:
+                self._send_json(200, job)
+            else:
+                self._send_json(404, {'erro': 'Tarefa não encontrada'})
+        else:
+            self._send_json(404, {'erro': 'Endpoint não encontrado'})
+
+    def do_POST(self):
+        if self.path != '/checkins':
+            self._send_json(404, {'erro': 'Endpoint não encontrado'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'erro': "Content-Length inválido"})
+            return
+        if length > INGESTION_MAX_BODY_MB * 1024 * 1024:
+            self._send_json(413, {'erro': f"Corpo maior que {INGESTION_MAX_BODY_MB}MB"})
+            return
+
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '')
+
+        try:
+            if content_type.startswith('multipart/form-data'):
+                itens = _parse_multipart(content_type, body)
+            else:
+                itens = _parse_json(body)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'erro': f"Requisição inválida: {e}"})
+            return
+
+        try:
+            resultado = self.service.ingest(itens)
+        except Exception as e:
+            # Falha ao gravar (disco, banco de dados): responde em vez de derrubar a conexão
+            self._send_json(500, {'erro': f"Erro ao gravar os check-ins: {e}"})
+            return
+        self._send_json(201 if resultado['aceitos'] else 400, resultado)
+
+    def log_message(self, format, *args):
+        # Evita uma linha de log por requisição em cargas altas
+        pass
+
+
+def create_server(db, google=None, host=INGESTION_HOST, port=INGESTION_PORT):
+    """
+    Cria o servidor HTTP de ingestão
+
+    Args:
+        db: Instância de Database
+        google: Instância de GoogleIntegration (opcional)
+        host: Endereço de escuta
+        port: Porta de escuta
+
+    Returns:
+        Instância de ThreadingHTTPServer (chame serve_forever())
+    """
+    handler = type('Handler', (IngestionHandler,), {'service': IngestionService(db, google)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de ingestão de check-ins")
+    parser.add_argument('--host', default=INGESTION_HOST)
+    parser.add_argument('--port', type=int, default=INGESTION_PORT)
+    parser.add_argument('--db', default=DATABASE_PATH, help='Caminho do banco de dados local')
+    parser.add_argument('--sync', action='store_true',
+                        help='Envia fotos e registros ao Google Drive/Sheets')
+    args = parser.parse_args()
+
+    google = None
+    if args.sync:
+        from google_integration import GoogleIntegration
+        google = GoogleIntegration()
+
+    try:
+        db = Database(args.db)
+    except DatabaseLoadError as e:
+        parser.exit(1, f"❌ {e}\n")
+    if google is not None:
+        sync_worker.flag_interrupted(db)
+    server = create_server(db, google, args.host, args.port)
+    print(f"📥 API de ingestão em http://{args.host}:{args.port}/checkins")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Módulo de métricas de desempenho
+Mede a latência das operações críticas (banco local, Drive, Sheets)
+e expõe contagens, percentis e o formato texto do Prometheus
+"""
+
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from pathlib import Path
+
+from config import METRICS_ENABLED, METRICS_BUCKETS, METRICS_PROMETHEUS_PATH
+
+
+class LatencyHistogram:
+    """Histograma de latências com limites fixos (em segundos)"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'errors', 'total', 'max')
+
+    def __init__(self, bounds=METRICS_BUCKETS):
+        self.bounds = tuple(bounds)
+        # Último balde recebe tudo acima do maior limite (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        """Registra uma duração"""
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def percentile(self, q):
+        """
+        Estima um percentil interpolando dentro do balde
+
+        Args:
+            q: Percentil entre 0 e 100
+
+        Returns:
+            Duração estimada em segundos
+        """
+        if not self.count:
+            return 0.0
+
+        alvo = q / 100 * self.count
+        acumulado = 0
+        for i, quantidade in enumerate(self.counts):
+            if quantidade and acumulado + quantidade >= alvo:
+                inferior = self.bounds[i - 1] if i > 0 else 0.0
+                superior = min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+                fracao = (alvo - acumulado) / quantidade
+                return inferior + (superior - inferior) * fracao
+            acumulado += quantidade
+        return self.max
+
+
+class _Timer:
+    """Context manager e decorator devolvido por MetricsRegistry.timed"""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.registry.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            self.registry.observe(self.name, time.perf_counter() - self.start, exc_type is not None)
+            self.start = None
+        return False
+
+    def __call__(self, func):
+        registry = self.registry
+        name = self.name
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            inicio = time.perf_counter()
+            erro = True
+            try:
+                result = func(*args, **kwargs)
+                erro = False
+                return result
+            finally:
+                registry.observe(name, time.perf_counter() - inicio, erro)
+
+        return wrapper
+
+
+class MetricsRegistry:
+    """Registro de histogramas por operação, compartilhado pelo processo"""
+
+    def __init__(self, enabled=METRICS_ENABLED, bounds=METRICS_BUCKETS):
+        self.enabled = enabled
+        self.bounds = tuple(bounds)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def timed(self, name):
+        """
+        Mede a duração de um bloco ou de uma função
+
+        Uso:
+            with metrics.timed('database.save'):
+                ...
+
+            @metrics.timed('google.add_to_sheet')
+            def append_row(...):
+                ...
+
+        Args:
+            name: Nome da operação
+
+        Returns:
+            Objeto usável como context manager ou decorator
+        """
+        return _Timer(self, name)
+
+    def observe(self, name, seconds, error=False):
+        """
+        Registra uma duração medida externamente
+
+        Args:
+            name: Nome da operação
+            seconds: Duração em segundos
+            error: Se a operação terminou com exceção
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(self.bounds)
+            histogram.observe(seconds, error)
+
+    def reset(self):
+        """Descarta todas as medições"""
+        with self._lock:
+            self._histograms = {}
+
+    def snapshot(self):
+        """
+        Resume as medições por operação
+
+        Returns:
+            Lista de dicionários ordenada pelo tempo total
+        """
+        with self._lock:
+            items = list(self._histograms.items())
+
+        resumo = []
+        for name, h in items:
+            resumo.append({
+                'operacao': name,
+                'chamadas': h.count,
+                'erros': h.errors,
+                'total_ms': h.total * 1000,
+                'media_ms': h.total / h.count * 1000 if h.count else 0.0,
+                'p50_ms': h.percentile(50) * 1000,
+                'p95_ms': h.percentile(95) * 1000,
+                'max_ms': h.max * 1000
+            })
+        return sorted(resumo, key=lambda item: -item['total_ms'])
+
+    def to_prometheus(self):
+        """
+        Exporta as medições no formato texto do Prometheus
+
+        Returns:
+            Texto com histogramas e contadores de erro
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+
+        lines = [
+            '# HELP pdv_operation_duration_seconds Duração das operações do PDV Control',
+            '# TYPE pdv_operation_duration_seconds histogram'
+        ]
+        for name, h in items:
+            acumulado = 0
+            for bound, quantidade in zip(h.bounds, h.counts):
+                acumulado += quantidade
+                lines.append(f'pdv_operation_duration_seconds_bucket{{operation="{name}",le="{bound}"}} {acumulado}')
+            lines.append(f'pdv_operation_duration_seconds_bucket{{operation="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'pdv_operation_duration_seconds_sum{{operation="{name}"}} {h.total}')
+            lines.append(f'pdv_operation_duration_seconds_count{{operation="{name}"}} {h.count}')
+
+        lines.append('# HELP pdv_operation_errors_total Operações que terminaram com exceção')
+        lines.append('# TYPE pdv_operation_errors_total counter')
+        for name, h in items:
+            lines.append(f'pdv_operation_errors_total{{operation="{name}"}} {h.errors}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=METRICS_PROMETHEUS_PATH):
+        """
+        Grava as métricas em arquivo (para o textfile collector do node_exporter)
+
+        Args:
+            path: Caminho do arquivo .prom
+
+        Returns:
+            Caminho do arquivo gravado
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return str(path)
+
+
+# Instância única por processo
+metrics = MetricsRegistry()
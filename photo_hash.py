@@ -0,0 +1,243 @@
+"""
+Módulo de detecção de fotos repetidas
+Calcula hashes perceptuais (pHash/dHash) das fotos e mantém uma BK-tree
+com todo o arquivo para encontrar quase-duplicatas em tempo sublinear
+"""
+
+import threading
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from config import PHOTO_HASH_ALGORITHM, PHOTO_HASH_MAX_DISTANCE
+
+HASH_SIZE = 8
+_PHASH_SAMPLE = HASH_SIZE * 4
+
+
+def _dct_matrix(n):
+    """Matriz da DCT-II ortonormal de ordem n"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_PHASH_SAMPLE)
+
+
+def _grayscale(content, size):
+    """Abre a foto, corrige a rotação EXIF e reduz a tons de cinza no tamanho dado"""
+    with Image.open(BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image).convert('L')
+        image = image.resize(size, Image.Resampling.LANCZOS)
+        return np.asarray(image, dtype=np.float64)
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(content):
+    """
+    Hash por diferença entre pixels vizinhos
+
+    Args:
+        content: Bytes da imagem
+
+    Returns:
+        Hash de 64 bits (int)
+    """
+    pixels = _grayscale(content, (HASH_SIZE + 1, HASH_SIZE))
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(content):
+    """
+    Hash pelas frequências baixas da DCT (resiste a recompressão e brilho)
+
+    Args:
+        content: Bytes da imagem
+
+    Returns:
+        Hash de 64 bits (int)
+    """
+    pixels = _grayscale(content, (_PHASH_SAMPLE, _PHASH_SAMPLE))
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    # O termo DC (brilho médio) fica fora da mediana
+    median = np.median(low.ravel()[1:])
+    return _bits_to_int(low > median)
+
+
+_ALGORITHMS = {'phash': phash, 'dhash': dhash}
+
+
+def photo_hash(content, algorithm=PHOTO_HASH_ALGORITHM):
+    """
+    Calcula o hash perceptual configurado em formato hexadecimal
+
+    Args:
+        content: Bytes da imagem
+        algorithm: 'phash' ou 'dhash'
+
+    Returns:
+        Hash com 16 dígitos hexadecimais, ou None se a imagem não puder ser lida
+    """
+    try:
+        return f"{_ALGORITHMS[algorithm](content):016x}"
+    except (OSError, ValueError):
+        return None
+
+
+def hamming(a, b):
+    """Quantidade de bits diferentes entre dois hashes (int)"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Árvore BK sobre a distância de Hamming"""
+
+    def __init__(self):
+        # Nó: [hash, itens, filhos {distância: nó}]
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value, item):
+        """
+        Insere um hash
+
+        Args:
+            value: Hash (int)
+            item: Valor associado devolvido nas buscas
+        """
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """
+        Busca os hashes a até max_distance bits
+
+        Args:
+            value: Hash (int)
+            max_distance: Distância máxima
+
+        Returns:
+            Lista de tuplas (distância, item) em ordem crescente de distância
+        """
+        found = []
+        if self._root is None:
+            return found
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Desigualdade triangular: só filhos em [d - max, d + max] podem conter resultados
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    pending.append(child)
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class PhotoHashIndex:
+    """Índice das fotos do Database pelos hashes guardados em 'foto_hashes'"""
+
+    def __init__(self, db, max_distance=PHOTO_HASH_MAX_DISTANCE):
+        """
+        Args:
+            db: Instância de Database a acompanhar
+            max_distance: Distância de Hamming máxima para considerar duas fotos iguais
+        """
+        self.db = db
+        self.max_distance = max_distance
+        self._tree = None
+        self._indexed = set()
+        self._lock = threading.Lock()
+        db.subscribe(self._on_change)
+
+    def _on_change(self, event, record):
+        """Recebe as alterações do Database"""
+        with self._lock:
+            if self._tree is None:
+                return
+            if event in ('add', 'update'):
+                self._add_record(record)
+            else:
+                # A BK-tree não remove nós: reconstrói na próxima busca
+                self._tree = None
+
+    def _add_record(self, record):
+        record_id = record.get('id')
+        hashes = record.get('foto_hashes')
+        if not hashes or record_id in self._indexed:
+            return
+        self._indexed.add(record_id)
+        for position, value in enumerate(hashes):
+            if value:
+                self._tree.add(int(value, 16), (record_id, position))
+
+    def _ensure_tree(self):
+        if self._tree is None:
+            self._tree = BKTree()
+            self._indexed = set()
+            for record in list(self.db.records):
+                self._add_record(record)
+
+    def find_matches(self, hashes, exclude_id=None):
+        """
+        Procura fotos já arquivadas parecidas com as informadas
+
+        Args:
+            hashes: Lista de hashes hexadecimais (None para fotos ilegíveis)
+            exclude_id: ID do registro a ignorar (o próprio check-in)
+
+        Returns:
+            Lista de dicionários {'foto', 'registro', 'foto_registro', 'distancia'},
+            com no máximo uma ocorrência por foto e registro
+        """
+        suspeitas = []
+        with self._lock:
+            self._ensure_tree()
+            for position, value in enumerate(hashes):
+                if not value:
+                    continue
+                vistos = set()
+                for distance, (record_id, other_position) in self._tree.search(int(value, 16), self.max_distance):
+                    if record_id == exclude_id or record_id in vistos:
+                        continue
+                    vistos.add(record_id)
+                    suspeitas.append({
+                        'foto': position,
+                        'registro': record_id,
+                        'foto_registro': other_position,
+                        'distancia': distance
+                    })
+        return suspeitas
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_tree()
+            return len(self._tree)
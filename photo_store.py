@@ -0,0 +1,266 @@
+"""
+Módulo de armazenamento local de fotos
+Guarda as fotos dos check-ins feitos sem conexão com o Google em arquivos
+nomeados pelo hash do conteúdo (em subdiretórios), para envio posterior
+em lote. Uma foto repetida em vários check-ins ocupa um único arquivo e
+só é liberada quando todos eles forem enviados; fotos já enviadas ficam
+como cache até o limite de espaço.
+
+Uso (envio em lote, por exemplo agendado fora do horário de pico):
+    python photo_store.py [--db data/local_backup.json] [--limit 100]
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from config import DATABASE_PATH, PHOTO_STORE_PATH, PHOTO_STORE_MAX_MB
+from record import photo_list
+
+# Prefixo das fotos guardadas localmente na lista 'fotos' do registro
+LOCAL_PREFIX = 'local:'
+
+# Sufixo dos arquivos já enviados ao Google Drive (podem ser descartados)
+SYNCED_SUFFIX = '.synced'
+
+# Sufixo do arquivo com a quantidade de referências (só existe acima de uma)
+REFS_SUFFIX = '.refs'
+
+
+def is_local_ref(entry):
+    """Indica se a entrada de 'fotos' aponta para o armazenamento local"""
+    return type(entry) is str and entry.startswith(LOCAL_PREFIX)
+
+
+def has_local_photos(record):
+    """Indica se o registro ainda tem fotos guardadas apenas localmente"""
+    return any(is_local_ref(entry) for entry in photo_list(record))
+
+
+class PhotoStore:
+    """Armazenamento endereçado por conteúdo (SHA-256) com limite de tamanho"""
+
+    def __init__(self, root=PHOTO_STORE_PATH, max_bytes=PHOTO_STORE_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            root: Diretório base
+            max_bytes: Espaço máximo; acima dele as fotos já enviadas são descartadas
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, digest, synced=False, suffix=None):
+        """Caminho do arquivo: <root>/ab/cd/abcd... (dois níveis de subdiretórios)"""
+        if suffix is None:
+            suffix = SYNCED_SUFFIX if synced else ''
+        return self.root / digest[:2] / digest[2:4] / (digest + suffix)
+
+    def _refs(self, digest):
+        """Quantidade de registros que ainda aguardam o envio da foto"""
+        try:
+            return int(self._path(digest, suffix=REFS_SUFFIX).read_text())
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def _set_refs(self, digest, count):
+        path = self._path(digest, suffix=REFS_SUFFIX)
+        if count <= 1:
+            path.unlink(missing_ok=True)
+            return
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(str(count))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _digest(ref):
+        digest = ref[len(LOCAL_PREFIX):]
+        if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+            raise ValueError(f"Referência de foto inválida: {ref}")
+        return digest
+
+    def _files(self):
+        """Percorre os arquivos guardados"""
+        if not self.root.exists():
+            return
+        for first in os.scandir(self.root):
+            if not first.is_dir():
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if entry.is_file() and not entry.name.endswith(('.tmp', REFS_SUFFIX)):
+                        yield entry
+
+    def _total_size(self):
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self._files())
+        return self._size
+
+    def put(self, content):
+        """
+        Guarda uma foto (fotos repetidas ocupam um único arquivo)
+
+        Cada chamada conta uma referência, liberada por mark_synced.
+
+        Args:
+            content: Bytes da foto
+
+        Returns:
+            Referência 'local:<sha256>' para a lista 'fotos' do registro
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(digest)
+
+        with self._lock:
+            synced = self._path(digest, synced=True)
+            if synced.exists():
+                # A mesma foto volta a aguardar envio
+                os.replace(synced, path)
+            elif path.exists():
+                # Outro registro já aguarda o envio da mesma foto
+                self._set_refs(digest, self._refs(digest) + 1)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{digest}.", suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(content)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    Path(tmp_path).unlink(missing_ok=True)
+                    raise
+                if self._size is not None:
+                    self._size += len(content)
+                self._evict()
+
+        return LOCAL_PREFIX + digest
+
+    def get(self, ref):
+        """
+        Lê uma foto guardada
+
+        Args:
+            ref: Referência 'local:<sha256>'
+
+        Returns:
+            Bytes da foto ou None se não estiver mais no armazenamento
+        """
+        digest = self._digest(ref)
+        for path in (self._path(digest), self._path(digest, synced=True)):
+            try:
+                return path.read_bytes()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def mark_synced(self, ref):
+        """
+        Marca o envio da foto de um registro; o arquivo só fica liberado para
+        descarte quando todos os registros que o referenciam forem enviados
+
+        Args:
+            ref: Referência 'local:<sha256>'
+        """
+        digest = self._digest(ref)
+        with self._lock:
+            if not self._path(digest).exists():
+                return
+            refs = self._refs(digest)
+            if refs > 1:
+                self._set_refs(digest, refs - 1)
+                return
+            os.replace(self._path(digest), self._path(digest, synced=True))
+            self._evict()
+
+    def release(self, ref):
+        """
+        Desfaz um put cujo registro não chegou a ser gravado; o arquivo é
+        apagado quando nenhum outro registro o referencia
+
+        Args:
+            ref: Referência 'local:<sha256>'
+        """
+        digest = self._digest(ref)
+        with self._lock:
+            path = self._path(digest)
+            if not path.exists():
+                return
+            refs = self._refs(digest)
+            if refs > 1:
+                self._set_refs(digest, refs - 1)
+                return
+            size = path.stat().st_size
+            path.unlink()
+            if self._size is not None:
+                self._size -= size
+
+    def _evict(self):
+        """Descarta as fotos já enviadas mais antigas até caber no limite"""
+        if self._total_size() <= self.max_bytes:
+            return
+        synced = [entry for entry in self._files() if entry.name.endswith(SYNCED_SUFFIX)]
+        synced.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in synced:
+            if self._size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            Path(entry.path).unlink(missing_ok=True)
+            self._size -= size
+
+    def usage(self):
+        """
+        Resumo do armazenamento
+
+        Returns:
+            Dicionário com 'pendentes', 'enviadas' e 'bytes'
+        """
+        with self._lock:
+            pendentes = enviadas = total = 0
+            for entry in self._files():
+                total += entry.stat().st_size
+                if entry.name.endswith(SYNCED_SUFFIX):
+                    enviadas += 1
+                else:
+                    pendentes += 1
+            self._size = total
+            return {'pendentes': pendentes, 'enviadas': enviadas, 'bytes': total}
+
+
+# Instância única por processo
+photo_store = PhotoStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envia ao Google as fotos e check-ins guardados sem conexão")
+    parser.add_argument('--db', default=DATABASE_PATH, help='Caminho do banco de dados local')
+    parser.add_argument('--limit', type=int, default=None, help='Máximo de check-ins enviados')
+    args = parser.parse_args()
+
+    from database import Database, DatabaseLoadError
+    from google_integration import GoogleIntegration
+    from sync_worker import sync_worker, STATUS_CONCLUIDO
+
+    try:
+        db = Database(args.db)
+    except DatabaseLoadError as e:
+        parser.exit(1, f"❌ {e}\n")
+    job_ids = sync_worker.submit_offline(db, GoogleIntegration(), limit=args.limit)
+    print(f"📤 Enviando {len(job_ids)} check-in(s) guardados localmente")
+
+    sync_worker.shutdown(wait=True)
+    jobs = sync_worker.get_jobs(job_ids)
+    concluidos = sum(1 for job in jobs if job['status'] == STATUS_CONCLUIDO)
+    for job in jobs:
+        if job['erro']:
+            print(f"❌ {job['descricao']}: {job['erro']}")
+    print(f"✅ {concluidos}/{len(jobs)} check-in(s) enviados")
+
+
+if __name__ == '__main__':
+    main()
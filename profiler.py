@@ -0,0 +1,116 @@
+"""
+Módulo de perfilamento das execuções do app (ativado por DEBUG_MODE)
+Cada execução do script é medida com cProfile e as funções mais caras
+são gravadas em um diretório rotativo, uma entrada por página
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import PROFILE_DIR, PROFILE_TOP_N, PROFILE_MAX_FILES, VERBOSE_LOGGING
+
+
+def page_slug(page):
+    """
+    Converte o rótulo do menu em nome de arquivo
+
+    Args:
+        page: Rótulo da página (ex.: "📝 Novo Check-in")
+
+    Returns:
+        Nome simplificado (ex.: "novo_check_in")
+    """
+    ascii_name = unicodedata.normalize('NFKD', page).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', ascii_name.lower()).strip('_') or 'pagina'
+
+
+class RunProfiler:
+    """Perfila execuções do script e mantém os resumos mais recentes"""
+
+    def __init__(self, directory=PROFILE_DIR, top_n=PROFILE_TOP_N, max_files=PROFILE_MAX_FILES):
+        """
+        Args:
+            directory: Diretório dos resumos
+            top_n: Quantidade de funções listadas em cada resumo
+            max_files: Quantidade de resumos mantidos (os mais antigos são apagados)
+        """
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.max_files = max_files
+        # Apenas um cProfile pode estar ativo por vez no processo
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self, page):
+        """
+        Perfila o bloco e grava o resumo da página
+
+        Se outra sessão estiver sendo perfilada, o bloco roda sem medição.
+
+        Args:
+            page: Rótulo da página executada
+        """
+        if not self._lock.acquire(blocking=False):
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._save(page, profiler, time.perf_counter() - inicio)
+        finally:
+            self._lock.release()
+
+    def _save(self, page, profiler, elapsed):
+        """Grava o resumo em texto e apaga os mais antigos"""
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+
+        agora = datetime.now()
+        slug = page_slug(page)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{agora.strftime('%Y%m%d_%H%M%S_%f')}_{slug}.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Página: {page}\n")
+            f.write(f"Data: {agora.isoformat(timespec='seconds')}\n")
+            f.write(f"Tempo total: {elapsed * 1000:.1f} ms\n\n")
+            f.write(stream.getvalue())
+
+        if VERBOSE_LOGGING:
+            print(f"⏱️ {page}: {elapsed * 1000:.1f} ms ({path.name})")
+
+        self._rotate()
+
+    def _rotate(self):
+        """Mantém apenas os max_files resumos mais recentes"""
+        for path in self.list_profiles()[self.max_files:]:
+            path.unlink(missing_ok=True)
+
+    def list_profiles(self):
+        """
+        Lista os resumos gravados
+
+        Returns:
+            Lista de caminhos, do mais recente para o mais antigo
+        """
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob('*.txt'), reverse=True)
+
+
+# Instância única por processo
+run_profiler = RunProfiler()
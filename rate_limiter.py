@@ -0,0 +1,209 @@
+"""
+Módulo de controle de taxa (rate limiting) para as APIs do Google
+Token bucket adaptativo por API, com backoff em caso de limite de cota
+"""
+
+import random
+import threading
+import time
+
+from config import (
+    MAX_RETRY_ATTEMPTS,
+    RETRY_DELAY,
+    MAX_RETRY_DELAY,
+    DRIVE_REQUESTS_PER_SECOND,
+    SHEETS_REQUESTS_PER_SECOND
+)
+
+# Motivos de erro 403 que indicam limite de taxa (e não falta de permissão)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+# Erros temporários do servidor que valem nova tentativa
+TRANSIENT_STATUS = (500, 502, 503, 504)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket que reduz a taxa ao receber 429 e recupera aos poucos"""
+
+    def __init__(self, rate, burst=None, min_rate=None):
+        """
+        Args:
+            rate: Taxa máxima (requisições por segundo)
+            burst: Tamanho máximo da rajada (padrão: 1 segundo de taxa)
+            min_rate: Taxa mínima após reduções (padrão: 5% da taxa máxima)
+        """
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate * 0.05
+        self.rate = self.max_rate
+        self.capacity = float(burst) if burst else max(1.0, self.max_rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Repõe tokens conforme o tempo decorrido"""
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Reserva um token, aguardando se necessário
+
+        Returns:
+            Tempo aguardado em segundos
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            wait = max(wait, self._paused_until - now)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        """Aumenta a taxa gradualmente (aumento aditivo) até o máximo"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_rate_limited(self, retry_after=None):
+        """
+        Reduz a taxa pela metade e pausa o bucket
+
+        Args:
+            retry_after: Segundos de pausa (Retry-After ou backoff, opcional)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+_LIMITERS = {
+    'drive': AdaptiveRateLimiter(DRIVE_REQUESTS_PER_SECOND),
+    'sheets': AdaptiveRateLimiter(SHEETS_REQUESTS_PER_SECOND)
+}
+
+
+def get_rate_limiter(api):
+    """
+    Retorna o limitador compartilhado (por processo) de uma API
+
+    Args:
+        api: 'drive' ou 'sheets'
+
+    Returns:
+        Instância de AdaptiveRateLimiter
+    """
+    return _LIMITERS[api]
+
+
+def configure_rate_limiter(api, rate, burst=None):
+    """
+    Substitui o limitador de uma API (ex.: testes de carga com cotas diferentes)
+
+    Args:
+        api: 'drive' ou 'sheets'
+        rate: Taxa máxima (requisições por segundo)
+        burst: Tamanho máximo da rajada (opcional)
+
+    Returns:
+        Novo AdaptiveRateLimiter
+    """
+    _LIMITERS[api] = AdaptiveRateLimiter(rate, burst)
+    return _LIMITERS[api]
+
+
+def _error_status(error):
+    """Retorna o status HTTP de um HttpError (ou None)"""
+    resp = getattr(error, 'resp', None)
+    if resp is None:
+        return None
+    try:
+        return int(getattr(resp, 'status', 0))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_rate_limit_error(error, status):
+    """Verifica se o erro indica limite de taxa"""
+    if status == 429:
+        return True
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='ignore')
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def _retry_after_seconds(error):
+    """Lê o header Retry-After (em segundos) de um HttpError"""
+    resp = getattr(error, 'resp', None)
+    if resp is None or not hasattr(resp, 'get'):
+        return None
+    value = resp.get('retry-after') or resp.get('Retry-After')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt):
+    """Backoff exponencial com jitter baseado em RETRY_DELAY"""
+    delay = min(MAX_RETRY_DELAY, RETRY_DELAY * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def execute_with_backoff(api, request):
+    """
+    Executa uma requisição respeitando o limite de taxa da API
+
+    Em caso de 429/403 por limite de taxa, reduz a taxa do limitador e o
+    pausa pelo Retry-After (ou pelo backoff); erros temporários do servidor
+    aguardam o backoff. São feitas no máximo MAX_RETRY_ATTEMPTS tentativas.
+
+    Args:
+        api: 'drive' ou 'sheets'
+        request: HttpRequest ou função que cria um novo request a cada tentativa
+
+    Returns:
+        Resposta da requisição
+    """
+    limiter = get_rate_limiter(api)
+
+    for attempt in range(MAX_RETRY_ATTEMPTS):
+        limiter.acquire()
+        current = request() if callable(request) else request
+
+        try:
+            response = current.execute()
+        except Exception as e:
+            status = _error_status(e)
+            rate_limited = _is_rate_limit_error(e, status)
+
+            if not rate_limited and status not in TRANSIENT_STATUS:
+                raise
+            if attempt >= MAX_RETRY_ATTEMPTS - 1:
+                raise
+
+            retry_after = _retry_after_seconds(e)
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            if rate_limited:
+                # A pausa do limitador é aguardada no próximo acquire (e vale
+                # para as outras threads), então não há sleep aqui
+                limiter.on_rate_limited(delay)
+            else:
+                time.sleep(delay)
+            continue
+
+        limiter.on_success()
+        return response
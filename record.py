@@ -0,0 +1,242 @@
+"""
+Módulo do registro compacto de check-in
+Guarda os valores de cada check-in em uma lista e compartilha entre os
+registros com os mesmos campos uma única tupla de chaves (em vez de um
+dicionário por registro), além das strings repetidas (promotor, PDV,
+data, hora). A lista de fotos fica em uma única string, com os links do
+Drive reduzidos ao ID do arquivo, e volta a ser lista ao ser acessada
+"""
+
+import re
+import sys
+from collections.abc import MutableMapping
+
+# Campos com poucos valores distintos, compartilhados entre registros
+INTERNED_FIELDS = frozenset(('data', 'hora', 'promotor', 'pdv', 'observacoes', 'sync_status'))
+
+# Link de visualização devolvido pelo Drive (webViewLink) para cada foto
+DRIVE_FILE_PREFIX = 'https://drive.google.com/file/d/'
+DRIVE_FILE_SUFFIX = '/view?usp=drivesdk'
+
+_intern = sys.intern
+
+_DRIVE_LINK = re.compile(re.escape(DRIVE_FILE_PREFIX) + r'([A-Za-z0-9_-]+)' + re.escape(DRIVE_FILE_SUFFIX))
+
+# Marca as entradas guardadas por extenso (referências locais e outros links)
+_LITERAL = '\x00'
+
+
+class _PackedPhotos(str):
+    """Fotos de um registro em uma string: uma entrada por linha"""
+
+    __slots__ = ()
+
+
+# Compartilhada pelos registros sem fotos
+_NO_PHOTOS = _PackedPhotos()
+
+
+def _pack_photos(fotos):
+    """
+    Compacta uma lista de fotos sem perder informação
+
+    Args:
+        fotos: Lista de links ou referências
+
+    Returns:
+        _PackedPhotos, ou a própria lista se alguma entrada não couber no formato
+    """
+    if not fotos:
+        return _NO_PHOTOS
+    entries = []
+    for foto in fotos:
+        if type(foto) is not str or '\n' in foto:
+            return fotos
+        match = _DRIVE_LINK.fullmatch(foto)
+        entries.append(match.group(1) if match else _LITERAL + foto)
+    return _PackedPhotos('\n'.join(entries))
+
+
+def _unpack_photos(packed):
+    """Reconstrói a lista de fotos de uma _PackedPhotos"""
+    if not packed:
+        return []
+    return [
+        entry[1:] if entry.startswith(_LITERAL) else DRIVE_FILE_PREFIX + entry + DRIVE_FILE_SUFFIX
+        for entry in packed.split('\n')
+    ]
+
+
+class _Layout:
+    """Chaves de um conjunto de campos, compartilhadas pelos registros que o usam"""
+
+    __slots__ = ('keys', 'index', 'interned', 'id_position')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.interned = tuple(i for i, key in enumerate(keys) if key in INTERNED_FIELDS)
+        self.id_position = self.index.get('id')
+
+
+# Tupla de chaves -> _Layout (poucos formatos distintos por banco)
+_layouts = {}
+
+
+def _get_layout(keys):
+    layout = _layouts.get(keys)
+    if layout is None:
+        layout = _layouts.setdefault(keys, _Layout(keys))
+    return layout
+
+
+def _stored_photos(record):
+    """Valor de 'fotos' como está guardado, sem expandir a forma compacta"""
+    if isinstance(record, Record):
+        i = record._layout.index.get('fotos')
+        return None if i is None else record._values[i]
+    return record.get('fotos')
+
+
+def photo_count(record):
+    """
+    Conta as fotos de um registro (Record ou dicionário)
+
+    Args:
+        record: Registro
+
+    Returns:
+        Quantidade de fotos
+    """
+    fotos = _stored_photos(record)
+    if type(fotos) is _PackedPhotos:
+        return fotos.count('\n') + 1 if fotos else 0
+    return len(fotos or ())
+
+
+def photo_list(record):
+    """
+    Lista as fotos de um registro sem alterar sua forma compacta
+    (para leituras em massa; alterações devem usar record['fotos'])
+
+    Args:
+        record: Registro (Record ou dicionário)
+
+    Returns:
+        Lista de links ou referências (vazia se não houver fotos)
+    """
+    fotos = _stored_photos(record)
+    if type(fotos) is _PackedPhotos:
+        return _unpack_photos(fotos)
+    return fotos or []
+
+
+class Record(MutableMapping):
+    """Check-in com interface de dicionário e representação compacta em memória"""
+
+    # 'id' repete o valor da lista para ordenação e busca rápidas
+    __slots__ = ('id', '_layout', '_values')
+
+    def __init__(self, data=None, **kwargs):
+        if kwargs:
+            data = {**(data or {}), **kwargs}
+        elif data is None:
+            data = {}
+        layout = _get_layout(tuple(data))
+        values = list(data.values())
+        for i in layout.interned:
+            value = values[i]
+            if type(value) is str:
+                values[i] = _intern(value)
+        i = layout.index.get('fotos')
+        if i is not None and type(values[i]) is list:
+            values[i] = _pack_photos(values[i])
+        self._layout = layout
+        self._values = values
+        if layout.id_position is not None:
+            self.id = values[layout.id_position]
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Converte um dicionário em Record (retorna o próprio objeto se já for)
+
+        Args:
+            data: Dicionário com os dados do registro
+
+        Returns:
+            Instância de Record
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(data)
+
+    def to_dict(self):
+        """Retorna um dicionário comum (para JSON e cópias)"""
+        data = dict(zip(self._layout.keys, self._values))
+        fotos = data.get('fotos')
+        if type(fotos) is _PackedPhotos:
+            data['fotos'] = _unpack_photos(fotos)
+        return data
+
+    def _value(self, i):
+        value = self._values[i]
+        if type(value) is _PackedPhotos:
+            # A lista passa a ser o valor guardado, para que alterações nela permaneçam
+            value = self._values[i] = _unpack_photos(value)
+        return value
+
+    def get(self, key, default=None):
+        i = self._layout.index.get(key)
+        return default if i is None else self._value(i)
+
+    def __getitem__(self, key):
+        return self._value(self._layout.index[key])
+
+    def __setitem__(self, key, value):
+        if key in INTERNED_FIELDS and type(value) is str:
+            value = _intern(value)
+        i = self._layout.index.get(key)
+        if i is None:
+            self._layout = _get_layout(self._layout.keys + (key,))
+            self._values.append(value)
+        else:
+            self._values[i] = value
+        if key == 'id':
+            self.id = value
+
+    def __delitem__(self, key):
+        i = self._layout.index[key]
+        keys = self._layout.keys
+        self._layout = _get_layout(keys[:i] + keys[i + 1:])
+        del self._values[i]
+        if key == 'id':
+            del self.id
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def photo_count(self):
+        """Quantidade de fotos"""
+        return photo_count(self)
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+def to_json(obj):
+    """
+    Função `default` para json.dump que serializa Records
+
+    Raises:
+        TypeError: Se o objeto não for um Record
+    """
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
@@ -0,0 +1,169 @@
+"""
+Módulo de IDs dos registros
+Gera IDs no formato ULID (26 caracteres em base32 de Crockford): os 48
+primeiros bits são o horário do check-in em milissegundos e os 80 seguintes
+são aleatórios, então os IDs ordenam pelo horário e não colidem entre
+processos. IDs gerados no mesmo milissegundo são crescentes.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ID_LENGTH = 26
+
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+_TIME_MAX = (1 << 48) - 1
+_ID_PATTERN = re.compile(f"[0-7][{CROCKFORD_ALPHABET}]{{25}}")
+_ID_LIST_PATTERN = re.compile(f"{_ID_PATTERN.pattern}(?:\n{_ID_PATTERN.pattern})*")
+
+# Pares de caracteres para cada bloco de 10 bits (13 blocos por ID)
+_PAIRS = [a + b for a in CROCKFORD_ALPHABET for b in CROCKFORD_ALPHABET]
+_DECODE = {c: i for i, c in enumerate(CROCKFORD_ALPHABET)}
+
+
+def encode(value):
+    """
+    Codifica um inteiro de 128 bits em 26 caracteres
+
+    Args:
+        value: Inteiro (timestamp << 80 | aleatório)
+
+    Returns:
+        String do ID
+    """
+    chunks = []
+    for _ in range(13):
+        chunks.append(_PAIRS[value & 0x3FF])
+        value >>= 10
+    return ''.join(reversed(chunks))
+
+
+def is_record_id(value):
+    """Indica se o valor é um ID no formato ULID"""
+    return type(value) is str and len(value) == ID_LENGTH and _ID_PATTERN.fullmatch(value) is not None
+
+
+def all_record_ids(values):
+    """
+    Indica se todos os valores são IDs no formato ULID (uma única busca de regex)
+
+    Args:
+        values: Lista de IDs
+
+    Returns:
+        True se todos forem válidos
+    """
+    if not values:
+        return True
+    try:
+        joined = '\n'.join(values)
+    except TypeError:
+        return False
+    return _ID_LIST_PATTERN.fullmatch(joined) is not None
+
+
+def time_prefix(ms):
+    """
+    Prefixo comum aos IDs gerados num milissegundo (10 primeiros caracteres)
+
+    Args:
+        ms: Milissegundos desde 1970
+
+    Returns:
+        String de 10 caracteres
+    """
+    return encode(ms << _RANDOM_BITS)[:10]
+
+
+def record_id_time(record_id):
+    """
+    Extrai o horário (milissegundos desde 1970) de um ID
+
+    Args:
+        record_id: ID no formato ULID
+
+    Returns:
+        Milissegundos
+    """
+    ms = 0
+    for char in record_id[:10]:
+        ms = (ms << 5) | _DECODE[char]
+    return ms
+
+
+@lru_cache(maxsize=1024)
+def _day_start_ms(data):
+    """Meia-noite (hora local) da data em milissegundos"""
+    day = date.fromisoformat(data)
+    return int(time.mktime(day.timetuple())) * 1000
+
+
+def checkin_ms(registro):
+    """
+    Horário do check-in em milissegundos a partir de 'data' e 'hora'
+
+    Args:
+        registro: Dicionário ou Record
+
+    Returns:
+        Milissegundos, ou o horário atual se data/hora estiverem ausentes ou inválidas
+    """
+    try:
+        h, m, s = registro.get('hora', '').split(':')
+        ms = _day_start_ms(registro.get('data')) + (int(h) * 3600 + int(m) * 60 + int(s)) * 1000
+    except (TypeError, ValueError, OverflowError):
+        return int(time.time() * 1000)
+    return ms if 0 <= ms <= _TIME_MAX else int(time.time() * 1000)
+
+
+class RecordIdGenerator:
+    """Gerador de IDs monotônico dentro de cada milissegundo"""
+
+    def __init__(self):
+        self._last_ms = -1
+        self._last_random = 0
+        self._lock = threading.Lock()
+
+    def new_id(self, ms=None):
+        """
+        Gera um ID
+
+        Args:
+            ms: Horário em milissegundos (padrão: agora)
+
+        Returns:
+            String de 26 caracteres
+        """
+        if ms is None:
+            ms = int(time.time() * 1000)
+        with self._lock:
+            if ms == self._last_ms and self._last_random < _RANDOM_MAX:
+                random_part = self._last_random + 1
+            else:
+                random_part = int.from_bytes(os.urandom(10), 'big')
+            self._last_ms = ms
+            self._last_random = random_part
+        return encode((ms << _RANDOM_BITS) | random_part)
+
+
+# Instância única por processo
+record_id_generator = RecordIdGenerator()
+
+
+def new_record_id(registro=None):
+    """
+    Gera o ID de um registro a partir do horário do check-in
+
+    Args:
+        registro: Dicionário com 'data' e 'hora' (None usa o horário atual)
+
+    Returns:
+        ID no formato ULID
+    """
+    return record_id_generator.new_id(checkin_ms(registro) if registro is not None else None)
@@ -0,0 +1,182 @@
+"""
+Módulo de relatórios
+Mantém consolidados diários por promotor e por PDV, atualizados a cada gravação
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from record import photo_count
+from utils import get_date_range
+
+# Posições dos contadores em cada consolidado
+VISITAS, DESLOCAMENTO, ENTRADAS, FOTOS = range(4)
+
+DIMENSIONS = ('promotor', 'pdv')
+
+
+def _contribution(record):
+    """Retorna (data, promotor, pdv, contadores) de um registro"""
+    return (
+        record.get('data', ''),
+        record.get('promotor', ''),
+        record.get('pdv', ''),
+        (
+            1,
+            record.get('valor_deslocamento', 0),
+            record.get('num_entradas', 1),
+            photo_count(record)
+        )
+    )
+
+
+def _counters_to_dict(counters):
+    """Converte a lista de contadores em dicionário"""
+    return {
+        'visitas': counters[VISITAS],
+        'total_deslocamento': counters[DESLOCAMENTO],
+        'total_entradas': counters[ENTRADAS],
+        'total_fotos': counters[FOTOS]
+    }
+
+
+class ReportEngine:
+    """Gera relatórios por período somando consolidados diários"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: Instância de Database a acompanhar
+        """
+        self.db = db
+        self._lock = threading.Lock()
+        self._rebuild()
+        db.subscribe(self._on_change)
+
+    def _rebuild(self):
+        """Recalcula todos os consolidados a partir dos registros"""
+        # {data: {'promotor': {nome: [contadores]}, 'pdv': {nome: [contadores]}}}
+        self._daily = {}
+        self._dates = []
+        # Contribuição atual de cada registro, para desfazer em updates/remoções
+        self._applied = {}
+        for record in self.db.records:
+            self._apply(record)
+
+    def _add(self, contribution, sign):
+        """Soma (sign=1) ou subtrai (sign=-1) uma contribuição dos consolidados"""
+        data, promotor, pdv, values = contribution
+
+        day = self._daily.get(data)
+        if day is None:
+            day = self._daily[data] = {dim: {} for dim in DIMENSIONS}
+            insort(self._dates, data)
+
+        for dim, key in (('promotor', promotor), ('pdv', pdv)):
+            counters = day[dim].setdefault(key, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                counters[i] += sign * value
+            if counters[VISITAS] == 0:
+                del day[dim][key]
+
+    def _apply(self, record):
+        contribution = _contribution(record)
+        self._add(contribution, 1)
+        self._applied[id(record)] = contribution
+
+    def _revert(self, record):
+        contribution = self._applied.pop(id(record), None)
+        if contribution is not None:
+            self._add(contribution, -1)
+
+    def _on_change(self, event, record):
+        """Recebe as alterações do Database"""
+        with self._lock:
+            if event == 'add':
+                self._apply(record)
+            elif event == 'update':
+                self._revert(record)
+                self._apply(record)
+            elif event == 'delete':
+                self._revert(record)
+            else:
+                self._rebuild()
+
+    def summarize(self, start_date, end_date):
+        """
+        Soma os consolidados diários de um intervalo
+
+        Args:
+            start_date: Data inicial (date ou YYYY-MM-DD)
+            end_date: Data final (date ou YYYY-MM-DD)
+
+        Returns:
+            Dicionário com 'por_promotor', 'por_pdv' e 'totais'
+        """
+        start = str(start_date)
+        end = str(end_date)
+        result = {dim: {} for dim in DIMENSIONS}
+        totais = [0, 0, 0, 0]
+
+        with self._lock:
+            first = bisect_left(self._dates, start)
+            last = bisect_right(self._dates, end)
+
+            for data in self._dates[first:last]:
+                day = self._daily[data]
+                for dim in DIMENSIONS:
+                    acc = result[dim]
+                    for key, counters in day[dim].items():
+                        target = acc.setdefault(key, [0, 0, 0, 0])
+                        for i, value in enumerate(counters):
+                            target[i] += value
+                for counters in day['promotor'].values():
+                    for i, value in enumerate(counters):
+                        totais[i] += value
+
+        return {
+            'inicio': start,
+            'fim': end,
+            'por_promotor': {k: _counters_to_dict(v) for k, v in sorted(result['promotor'].items())},
+            'por_pdv': {k: _counters_to_dict(v) for k, v in sorted(result['pdv'].items())},
+            'totais': _counters_to_dict(totais)
+        }
+
+    def generate_report(self, period_type, custom_start=None, custom_end=None):
+        """
+        Gera relatório de um período de config.REPORT_TYPES
+
+        Args:
+            period_type: "Diário", "Semanal", "Mensal" ou "Customizado"
+            custom_start: Data inicial para período customizado
+            custom_end: Data final para período customizado
+
+        Returns:
+            Dicionário com 'tipo', 'inicio', 'fim', 'por_promotor', 'por_pdv' e 'totais'
+        """
+        start, end = get_date_range(period_type, custom_start, custom_end)
+        report = self.summarize(start, end)
+        report['tipo'] = period_type
+        return report
+
+    def travel_cost_payroll(self, period_type, custom_start=None, custom_end=None):
+        """
+        Totais de deslocamento por promotor no período (para pagamento)
+
+        Args:
+            period_type: "Diário", "Semanal", "Mensal" ou "Customizado"
+            custom_start: Data inicial para período customizado
+            custom_end: Data final para período customizado
+
+        Returns:
+            Lista de dicionários (promotor, visitas, total_deslocamento)
+        """
+        report = self.generate_report(period_type, custom_start, custom_end)
+        return [
+            {
+                'promotor': promotor,
+                'visitas': dados['visitas'],
+                'total_deslocamento': dados['total_deslocamento']
+            }
+            for promotor, dados in report['por_promotor'].items()
+        ]
@@ -0,0 +1,71 @@
+"""
+Módulo de medição do tempo de inicialização
+Registra quanto cada etapa (imports, banco de dados, Google) leva na primeira execução
+"""
+
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Acumula o tempo das etapas de inicialização do processo"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.steps = {}
+        self.reported = False
+
+    @contextmanager
+    def measure(self, name):
+        """
+        Mede uma etapa (apenas a primeira execução é registrada)
+
+        Args:
+            name: Nome da etapa
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.setdefault(name, time.perf_counter() - inicio)
+
+    def import_modules(self, *names):
+        """
+        Importa módulos medindo o tempo de cada um
+
+        Módulos já carregados não são medidos novamente.
+
+        Args:
+            *names: Nomes dos módulos
+        """
+        for name in names:
+            if name in sys.modules:
+                continue
+            with self.measure(f"import {name}"):
+                importlib.import_module(name)
+
+    def format_report(self):
+        """
+        Monta o resumo das etapas medidas
+
+        Returns:
+            Texto com uma linha por etapa
+        """
+        total = time.perf_counter() - self.started_at
+        lines = ["⏱️ Inicialização do PDV Control:"]
+        for name, seconds in sorted(self.steps.items(), key=lambda item: -item[1]):
+            lines.append(f"   {name:<32} {seconds * 1000:8.1f} ms")
+        lines.append(f"   {'total desde o início':<32} {total * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+    def report_once(self):
+        """Imprime o resumo uma única vez por processo"""
+        if not self.reported:
+            self.reported = True
+            print(self.format_report())
+
+
+# Instância única por processo
+startup_timer = StartupTimer()
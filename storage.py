@@ -0,0 +1,160 @@
+"""
+Módulo de leitura e gravação dos arquivos JSON do banco local
+Grava JSON compacto (orjson quando instalado), opcionalmente comprimido
+com gzip ou zstd, e lê qualquer um desses formatos pelo conteúdo do arquivo
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+from config import DATABASE_COMPRESSION, DATABASE_COMPRESSION_LEVEL
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Assinaturas no início do arquivo
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Extensão acrescentada a '.json' em arquivos novos (backups)
+SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+class CorruptFileError(ValueError):
+    """Arquivo comprimido truncado ou corrompido"""
+
+
+def resolve_compression(compression=DATABASE_COMPRESSION):
+    """
+    Valida o formato pedido, trocando zstd por gzip se o pacote não estiver instalado
+
+    Args:
+        compression: 'none', 'gzip' ou 'zstd'
+
+    Returns:
+        Formato efetivamente usado
+
+    Raises:
+        ValueError: Se o formato for desconhecido
+    """
+    if compression not in SUFFIXES:
+        raise ValueError(f"Compressão desconhecida: {compression} (use {', '.join(SUFFIXES)})")
+    if compression == 'zstd' and zstandard is None:
+        return 'gzip'
+    return compression
+
+
+def dumps(obj, default=None):
+    """
+    Serializa em JSON compacto (UTF-8, sem indentação)
+
+    Args:
+        obj: Objeto a serializar
+        default: Função para tipos não suportados (como record.to_json)
+
+    Returns:
+        Bytes do JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default).encode('utf-8')
+
+
+def loads(data):
+    """Lê JSON a partir de bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(data, compression, level=DATABASE_COMPRESSION_LEVEL):
+    """
+    Comprime os bytes no formato pedido
+
+    Args:
+        data: Bytes do JSON
+        compression: 'none', 'gzip' ou 'zstd' (já resolvido)
+        level: Nível de compressão
+
+    Returns:
+        Bytes gravados no arquivo
+    """
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+
+def decompress(data):
+    """
+    Descomprime pelo conteúdo (gzip, zstd ou JSON puro)
+
+    Raises:
+        CorruptFileError: Se o conteúdo comprimido estiver truncado ou corrompido
+        RuntimeError: Se o arquivo for zstd e o pacote zstandard não estiver instalado
+    """
+    if data.startswith(GZIP_MAGIC):
+        try:
+            return gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as e:
+            raise CorruptFileError(f"gzip corrompido ou incompleto ({e})") from e
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("Arquivo comprimido com zstd: instale o pacote 'zstandard' para lê-lo")
+        try:
+            return zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise CorruptFileError(f"zstd corrompido ou incompleto ({e})") from e
+    return data
+
+
+def read_json(path):
+    """
+    Lê um arquivo JSON em qualquer um dos formatos gravados
+
+    Args:
+        path: Caminho do arquivo
+
+    Returns:
+        Objeto lido
+    """
+    with open(path, 'rb') as f:
+        return loads(decompress(f.read()))
+
+
+def write_json(path, obj, compression=DATABASE_COMPRESSION, default=None):
+    """
+    Grava um arquivo JSON de forma atômica (arquivo temporário + rename)
+
+    Args:
+        path: Caminho do arquivo
+        obj: Objeto a gravar
+        compression: 'none', 'gzip' ou 'zstd'
+        default: Função para tipos não suportados
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    path = Path(path)
+    data = compress(dumps(obj, default=default), resolve_compression(compression))
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return str(path)
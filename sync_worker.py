@@ -0,0 +1,333 @@
+"""
+Módulo de sincronização em segundo plano
+Envia fotos ao Google Drive e registros ao Google Sheets sem bloquear a interface
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from config import SYNC_MAX_WORKERS, SYNC_MAX_FINISHED_JOBS, ENABLE_IMAGE_RECOGNITION
+from photo_hash import photo_hash
+from photo_store import photo_store, is_local_ref, has_local_photos
+from utils import generate_photo_filename
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de uma tarefa
+STATUS_PENDENTE = 'pendente'
+STATUS_ENVIANDO_FOTOS = 'enviando_fotos'
+STATUS_SINCRONIZANDO = 'sincronizando_planilha'
+STATUS_CONCLUIDO = 'concluido'
+STATUS_ERRO = 'erro'
+STATUS_OFFLINE = 'aguardando_conexao'
+
+# Estados gravados no registro enquanto a tarefa não termina
+STATUS_EM_ANDAMENTO = (STATUS_PENDENTE, STATUS_ENVIANDO_FOTOS, STATUS_SINCRONIZANDO)
+
+STATUS_LABELS = {
+    STATUS_PENDENTE: '⏳ Na fila',
+    STATUS_ENVIANDO_FOTOS: '📤 Enviando fotos',
+    STATUS_SINCRONIZANDO: '📊 Sincronizando planilha',
+    STATUS_CONCLUIDO: '✅ Concluído',
+    STATUS_ERRO: '❌ Erro',
+    STATUS_OFFLINE: '📴 Aguardando conexão'
+}
+
+
+class SyncWorker:
+    """Pool de threads que processa o envio dos check-ins em segundo plano"""
+
+    def __init__(self, max_workers=SYNC_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='pdv-sync'
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._recovered = set()
+
+    def submit(self, db, google, record_id, fotos, folder_path, descricao='', local_refs=None):
+        """
+        Agenda o envio das fotos e a sincronização de um registro já salvo
+
+        Args:
+            db: Instância de Database onde o registro foi salvo
+            google: Instância de GoogleIntegration
+            record_id: ID do registro salvo localmente
+            fotos: Lista de tuplas (nome_arquivo, bytes da foto)
+            folder_path: Pasta de destino no Google Drive
+            descricao: Texto exibido no painel de status
+            local_refs: Referências 'local:<hash>' das fotos, na mesma ordem,
+                quando elas já estão no registro (gravadas antes do envio)
+
+        Returns:
+            ID da tarefa
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'record_id': record_id,
+            'descricao': descricao,
+            'status': STATUS_PENDENTE,
+            'fotos_total': len(fotos),
+            'fotos_enviadas': 0,
+            'erro': None,
+            'criado_em': datetime.now().isoformat(),
+            'concluido_em': None
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job_id, db, google, record_id, fotos, folder_path, local_refs)
+        return job_id
+
+    def _active_record_ids(self):
+        """IDs dos registros com tarefa ainda não finalizada neste processo"""
+        with self._lock:
+            return {
+                j['record_id'] for j in self._jobs.values()
+                if j['status'] not in (STATUS_CONCLUIDO, STATUS_ERRO)
+            }
+
+    def offline_records(self, db):
+        """
+        Lista os check-ins com fotos ou linha da planilha ainda por enviar
+
+        Inclui os registros aguardando conexão e os que ficaram em
+        sincronização ou com erro mantendo fotos só no armazenamento local
+        (sem tarefa em andamento).
+
+        Args:
+            db: Instância de Database
+
+        Returns:
+            Lista de registros, do mais antigo para o mais recente
+        """
+        ativos = self._active_record_ids()
+        registros = [
+            r for r in db.iter_records()
+            if r.get('sync_status') == STATUS_OFFLINE or (
+                r.get('sync_status') in STATUS_EM_ANDAMENTO + (STATUS_ERRO,)
+                and r['id'] not in ativos
+                and has_local_photos(r)
+            )
+        ]
+        registros.reverse()
+        return registros
+
+    def submit_offline(self, db, google, limit=None):
+        """
+        Agenda o envio dos check-ins registrados sem conexão com o Google
+        (veja offline_records)
+
+        Fotos que não estiverem mais no armazenamento local são ignoradas
+        e continuam referenciadas no registro.
+
+        Args:
+            db: Instância de Database
+            google: Instância de GoogleIntegration
+            limit: Máximo de check-ins agendados (None para todos)
+
+        Returns:
+            Lista de IDs das tarefas
+        """
+        pendentes = self.offline_records(db)
+        if limit is not None:
+            pendentes = pendentes[:limit]
+
+        job_ids = []
+        for registro in pendentes:
+            fotos = []
+            refs = []
+            for ref in registro.get('fotos') or []:
+                content = photo_store.get(ref) if is_local_ref(ref) else None
+                if content is not None:
+                    fotos.append((generate_photo_filename(registro['pdv'], len(fotos) + 1), content))
+                    refs.append(ref)
+
+            db.update_record(registro['id'], {'sync_status': STATUS_PENDENTE})
+            job_ids.append(self.submit(
+                db,
+                google,
+                registro['id'],
+                fotos,
+                f"{registro['promotor']}/{registro['data']}",
+                descricao=f"{registro['promotor']} - {registro['pdv']} ({registro['data']} {registro['hora'][:5]})",
+                local_refs=refs
+            ))
+        return job_ids
+
+    def flag_interrupted(self, db):
+        """
+        Marca os registros que ficaram em sincronização quando o processo
+        anterior terminou (as tarefas só existem em memória): voltam a
+        aguardar conexão se ainda tiverem fotos locais, senão ficam com erro
+
+        Executado uma vez por arquivo de banco de dados em cada processo.
+
+        Args:
+            db: Instância de Database
+
+        Returns:
+            Lista de IDs marcados
+        """
+        with self._lock:
+            if str(db.db_path) in self._recovered:
+                return []
+            self._recovered.add(str(db.db_path))
+        ativos = self._active_record_ids()
+
+        interrompidos = [
+            r for r in db.iter_records()
+            if r.get('sync_status') in STATUS_EM_ANDAMENTO and r['id'] not in ativos
+        ]
+        for registro in interrompidos:
+            status = STATUS_OFFLINE if has_local_photos(registro) else STATUS_ERRO
+            db.update_record(registro['id'], {'sync_status': status})
+        return [registro['id'] for registro in interrompidos]
+
+    def shutdown(self, wait=True):
+        """Encerra o pool, aguardando as tarefas em andamento (uso em scripts)"""
+        self._executor.shutdown(wait=wait)
+
+    def _prune(self):
+        """Descarta as tarefas finalizadas mais antigas"""
+        finished = [
+            j for j in self._jobs.values()
+            if j['status'] in (STATUS_CONCLUIDO, STATUS_ERRO)
+        ]
+        excess = len(finished) - SYNC_MAX_FINISHED_JOBS
+        if excess > 0:
+            finished.sort(key=lambda j: j['concluido_em'])
+            for job in finished[:excess]:
+                del self._jobs[job['id']]
+
+    def _update(self, job_id, **changes):
+        """Atualiza o estado de uma tarefa"""
+        with self._lock:
+            self._jobs[job_id].update(changes)
+
+    def _check_duplicates(self, db, record_id, fotos):
+        """
+        Calcula os hashes perceptuais das fotos e marca o registro se alguma
+        já existir no arquivo
+
+        Args:
+            db: Instância de Database
+            record_id: ID do registro
+            fotos: Lista de tuplas (nome_arquivo, bytes da foto)
+        """
+        hashes = [photo_hash(content) for _, content in fotos]
+        suspeitas = db.get_photo_index().find_matches(hashes, exclude_id=record_id)
+        db.update_record(record_id, {'foto_hashes': hashes, 'fotos_suspeitas': suspeitas})
+
+    def _run(self, job_id, db, google, record_id, fotos, folder_path, local_refs=None):
+        """Executa a tarefa: upload das fotos, atualização local e planilha"""
+        try:
+            foto_links = []
+            erros = []
+
+            if ENABLE_IMAGE_RECOGNITION and fotos:
+                try:
+                    self._check_duplicates(db, record_id, fotos)
+                except Exception:
+                    # A detecção de repetidas é auxiliar: nunca impede o envio
+                    logger.exception("Falha na detecção de fotos repetidas do registro %s", record_id)
+
+            if fotos:
+                self._update(job_id, status=STATUS_ENVIANDO_FOTOS)
+
+            # Referência local -> links enviados (uma entrada por ocorrência)
+            enviadas = {}
+            sincronizadas = []
+            for idx, (file_name, content) in enumerate(fotos, 1):
+                ref = local_refs[idx - 1] if local_refs is not None else None
+                try:
+                    link = google.upload_file(BytesIO(content), folder_path, file_name)
+                    if ref is None:
+                        foto_links.append(link)
+                    else:
+                        enviadas.setdefault(ref, []).append(link)
+                        sincronizadas.append(ref)
+                except Exception as e:
+                    erros.append(f"{file_name}: {e}")
+                    if ref is None:
+                        # Guarda a foto para o próximo envio em lote
+                        foto_links.append(photo_store.put(content))
+                self._update(job_id, fotos_enviadas=idx)
+
+            if local_refs is not None:
+                # Troca só as referências enviadas; as que falharam continuam locais
+                atuais = db.get_record_by_id(record_id).get('fotos') or []
+                foto_links = [
+                    enviadas[foto].pop(0) if enviadas.get(foto) else foto
+                    for foto in atuais
+                ]
+
+            if erros:
+                # O registro volta a aguardar o envio em lote das fotos que
+                # faltam; a linha só vai para a planilha com todas as fotos
+                # enviadas, para que um novo envio não a duplique
+                db.update_record(record_id, {'fotos': foto_links})
+                for ref in sincronizadas:
+                    photo_store.mark_synced(ref)
+                raise RuntimeError(f"Falha no envio de {len(erros)} foto(s): " + '; '.join(erros))
+
+            db.update_record(record_id, {'fotos': foto_links, 'sync_status': STATUS_SINCRONIZANDO})
+            for ref in sincronizadas:
+                photo_store.mark_synced(ref)
+
+            self._update(job_id, status=STATUS_SINCRONIZANDO)
+            google.append_row(db.get_record_by_id(record_id))
+
+            db.update_record(record_id, {'sync_status': STATUS_CONCLUIDO})
+            self._update(job_id, status=STATUS_CONCLUIDO, concluido_em=datetime.now().isoformat())
+
+        except Exception as e:
+            # Com fotos ainda locais o registro volta para o envio em lote
+            registro = db.get_record_by_id(record_id)
+            status = STATUS_OFFLINE if registro is not None and has_local_photos(registro) else STATUS_ERRO
+            db.update_record(record_id, {'sync_status': status})
+            self._update(
+                job_id,
+                status=STATUS_ERRO,
+                erro=str(e),
+                concluido_em=datetime.now().isoformat()
+            )
+
+    def get_job(self, job_id):
+        """
+        Retorna uma cópia do estado de uma tarefa
+
+        Args:
+            job_id: ID da tarefa
+
+        Returns:
+            Dicionário com o estado ou None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_jobs(self, job_ids):
+        """
+        Retorna o estado de várias tarefas (ignora as já descartadas)
+
+        Args:
+            job_ids: Lista de IDs
+
+        Returns:
+            Lista de dicionários com o estado
+        """
+        with self._lock:
+            return [dict(self._jobs[j]) for j in job_ids if j in self._jobs]
+
+
+# Instância única por processo
+sync_worker = SyncWorker()
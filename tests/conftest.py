@@ -0,0 +1,40 @@
+"""
+Configuração comum dos testes
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from database import Database
+
+
+def make_checkin(**campos):
+    """
+    Monta um check-in válido (os campos informados substituem os padrões)
+
+    Returns:
+        Dicionário no formato do formulário de check-in
+    """
+    registro = {
+        'data': '2026-03-02',
+        'hora': '10:00:00',
+        'promotor': 'Maria Silva',
+        'pdv': 'Mercado Central',
+        'valor_deslocamento': 25.0,
+        'num_entradas': 1,
+        'observacoes': '',
+        'fotos': []
+    }
+    registro.update(campos)
+    return registro
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Database vazio em um diretório temporário"""
+    return Database(tmp_path / 'local_backup.json')
@@ -0,0 +1,221 @@
+"""
+Testes do Database, do registro compacto, dos IDs e do formato dos arquivos
+"""
+
+import gzip
+import json
+
+import pytest
+
+import database
+import storage
+from conftest import make_checkin
+from database import Database, DatabaseLoadError
+from record import Record, photo_list
+from record_id import all_record_ids, checkin_ms, is_record_id, new_record_id, record_id_time
+
+
+# Database
+
+def test_add_record_keeps_records_sorted(db):
+    tarde = db.add_record(make_checkin(hora='15:00:00'))
+    cedo = db.add_record(make_checkin(hora='09:00:00'))
+
+    assert [r['id'] for r in db.records] == [cedo, tarde]
+    assert db.get_record_by_id(cedo)['hora'] == '09:00:00'
+
+
+def test_records_survive_reload(db):
+    record_id = db.add_record(make_checkin(fotos=['a']))
+    db.update_record(record_id, {'sync_status': 'concluido'})
+
+    recarregado = Database(db.db_path)
+    registro = recarregado.get_record_by_id(record_id)
+
+    assert registro['sync_status'] == 'concluido'
+    assert registro['fotos'] == ['a']
+    assert 'updated_at' in registro
+
+
+def test_query_records_pages_newest_first(db):
+    ids = [db.add_record(make_checkin(hora=f"{hora:02d}:00:00")) for hora in range(8, 18)]
+
+    vistos = []
+    cursor = None
+    while True:
+        pagina, cursor = db.query_records(limit=3, before=cursor)
+        vistos.extend(r['id'] for r in pagina)
+        if cursor is None:
+            break
+
+    assert vistos == ids[::-1]
+
+
+def test_iter_records_crosses_chunks_while_records_change(db, monkeypatch):
+    monkeypatch.setattr(database, '_ITER_CHUNK', 4)
+    ids = [db.add_record(make_checkin(hora=f"{hora:02d}:00:00")) for hora in range(8, 20)]
+
+    vistos = []
+    for record in db.iter_records():
+        vistos.append(record['id'])
+        if len(vistos) == 2:
+            # Alterações durante a leitura não repetem nem pulam os anteriores
+            db.add_record(make_checkin(hora='23:00:00'))
+            db.delete_record(ids[2])
+
+    assert vistos == [i for i in ids[::-1] if i != ids[2]]
+
+
+def test_delete_record_out_of_order(db):
+    ids = [db.add_record(make_checkin(hora=hora)) for hora in ('12:00:00', '08:00:00', '10:00:00')]
+
+    assert db.delete_record(ids[2])
+    assert not db.delete_record(ids[2])
+    assert [r['hora'] for r in db.records] == ['08:00:00', '12:00:00']
+
+
+def test_legacy_ids_are_migrated(tmp_path):
+    antigos = [
+        dict(make_checkin(data='2026-03-03', hora='09:00:00'), id='2026-03-03_09-00-00_Maria_Silva'),
+        dict(make_checkin(data='2026-03-01', hora='11:00:00'), id='2026-03-01_11-00-00_Maria_Silva'),
+        make_checkin(data='2026-03-02', hora='08:00:00')
+    ]
+    db_path = tmp_path / 'local_backup.json'
+    db_path.write_text(json.dumps(antigos, indent=2), encoding='utf-8')
+
+    db = Database(db_path)
+
+    assert all(is_record_id(r['id']) for r in db.records)
+    assert [r['data'] for r in db.records] == ['2026-03-01', '2026-03-02', '2026-03-03']
+    assert db.records[0]['legacy_id'] == '2026-03-01_11-00-00_Maria_Silva'
+    assert 'legacy_id' not in db.records[1]
+    assert list((tmp_path / 'backups').iterdir())
+
+    # IDs antigos continuam aceitos
+    assert db.get_record_by_id('2026-03-03_09-00-00_Maria_Silva') is db.records[2]
+    assert db.update_record('2026-03-01_11-00-00_Maria_Silva', {'observacoes': 'ok'})
+    assert db.records[0]['observacoes'] == 'ok'
+    assert db.delete_record('2026-03-03_09-00-00_Maria_Silva')
+    assert db.get_record_by_id('2026-03-03_09-00-00_Maria_Silva') is None
+
+    # A conversão é gravada: a próxima carga já encontra os IDs novos
+    recarregado = Database(db_path)
+    assert [r['id'] for r in recarregado.records] == [r['id'] for r in db.records]
+    assert recarregado.get_record_by_id('2026-03-01_11-00-00_Maria_Silva') is not None
+
+
+# Record
+
+DRIVE = 'https://drive.google.com/file/d/{}/view?usp=drivesdk'
+
+
+def test_record_photos_round_trip_without_loss():
+    fotos = [DRIVE.format('1AbC_d-9'), 'local:' + 'f' * 64, 'a', '', DRIVE.format('id com espaço')]
+    record = Record(make_checkin(fotos=fotos))
+
+    assert record.photo_count() == 5
+    assert photo_list(record) == fotos
+    assert record.to_dict()['fotos'] == fotos
+    assert record['fotos'] == fotos
+
+
+def test_record_keeps_photos_it_cannot_pack():
+    fotos = ['linha\nquebrada']
+    assert Record(make_checkin(fotos=fotos))['fotos'] is fotos
+    assert Record(make_checkin(fotos=[]))['fotos'] == []
+
+
+def test_record_photo_list_changes_are_kept():
+    record = Record(make_checkin(fotos=[DRIVE.format('abc')]))
+
+    record['fotos'].append('local:xyz')
+    record.get('fotos')[0] = 'local:abc'
+
+    assert record.photo_count() == 2
+    assert record.to_dict()['fotos'] == ['local:abc', 'local:xyz']
+
+
+def test_record_set_and_delete_share_layouts():
+    a = Record(make_checkin(id='a'))
+    b = Record(make_checkin(id='b'))
+    a['sync_status'] = 'ok'
+    b['sync_status'] = 'ok'
+    del a['observacoes']
+    del b['observacoes']
+
+    assert a._layout is b._layout
+    assert 'observacoes' not in a and a['sync_status'] == 'ok'
+    a['id'] = 'c'
+    assert a.id == 'c'
+
+
+# IDs
+
+def test_record_ids_follow_checkin_time():
+    cedo = new_record_id(make_checkin(hora='08:00:00'))
+    tarde = new_record_id(make_checkin(hora='17:30:00'))
+
+    assert is_record_id(cedo) and is_record_id(tarde)
+    assert cedo < tarde
+    assert record_id_time(tarde) == checkin_ms(make_checkin(hora='17:30:00'))
+
+
+def test_record_ids_in_same_millisecond_are_increasing():
+    registro = make_checkin()
+    ids = [new_record_id(registro) for _ in range(50)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 50
+    assert all_record_ids(ids)
+    assert not all_record_ids(ids + ['2026-03-02_10-00-00_Maria'])
+
+
+# Formato dos arquivos
+
+@pytest.mark.parametrize('compression, magic', [
+    ('none', b'['),
+    ('gzip', storage.GZIP_MAGIC),
+    pytest.param('zstd', storage.ZSTD_MAGIC, marks=pytest.mark.skipif(
+        storage.zstandard is None, reason='zstandard não instalado'
+    )),
+])
+def test_storage_detects_format(tmp_path, compression, magic):
+    path = tmp_path / 'dados.json'
+    storage.write_json(path, [{'a': 'ç'}], compression=compression)
+
+    assert path.read_bytes().startswith(magic)
+    assert storage.read_json(path) == [{'a': 'ç'}]
+
+
+def test_storage_reads_indented_json(tmp_path):
+    path = tmp_path / 'dados.json'
+    path.write_text(json.dumps([{'a': 1}], indent=2), encoding='utf-8')
+
+    assert storage.read_json(path) == [{'a': 1}]
+
+
+def test_database_loads_compressed_file(tmp_path):
+    db_path = tmp_path / 'local_backup.json'
+    db_path.write_bytes(gzip.compress(json.dumps([make_checkin()]).encode('utf-8')))
+
+    assert Database(db_path).count_records() == 1
+
+
+def test_corrupt_database_is_reported_and_kept(tmp_path):
+    db_path = tmp_path / 'local_backup.json'
+    storage.write_json(db_path, [make_checkin()] * 50, compression='gzip')
+    truncado = db_path.read_bytes()[:-20]
+    db_path.write_bytes(truncado)
+
+    with pytest.raises(DatabaseLoadError, match='Restaure um backup'):
+        Database(db_path)
+    assert db_path.read_bytes() == truncado
+
+
+def test_zstd_database_without_package_is_reported(tmp_path, monkeypatch):
+    db_path = tmp_path / 'local_backup.json'
+    db_path.write_bytes(storage.ZSTD_MAGIC + b'\x00' * 16)
+    monkeypatch.setattr(storage, 'zstandard', None)
+
+    with pytest.raises(DatabaseLoadError, match='zstandard'):
+        Database(db_path)
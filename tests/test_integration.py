@@ -0,0 +1,381 @@
+"""
+Testes de integração: importação de históricos, armazenamento local de
+fotos e sincronização em segundo plano
+"""
+
+import csv
+import http.client
+import json
+import threading
+
+import pytest
+
+import ingestion_api
+import sync_worker as sync_module
+from conftest import make_checkin
+from importer import import_file
+from ingestion_api import IngestionService, create_server
+from photo_store import PhotoStore, has_local_photos
+from sync_worker import SyncWorker, STATUS_CONCLUIDO, STATUS_ERRO, STATUS_OFFLINE, STATUS_PENDENTE
+
+
+# Importação
+
+def write_jsonl(path, linhas):
+    path.write_text('\n'.join(linhas) + '\n', encoding='utf-8')
+    return path
+
+
+def test_import_jsonl_counts_malformed_lines(db, tmp_path):
+    linhas = [json.dumps(make_checkin(hora=f"0{i}:00:00")) for i in range(1, 6)]
+    linhas[3] = '{"data": "2026-03-02", '
+    arquivo = write_jsonl(tmp_path / 'historico.jsonl', linhas)
+
+    resultado = import_file(db, arquivo, chunk_size=2)
+
+    assert resultado['lidos'] == 5
+    assert resultado['importados'] == 4
+    assert resultado['invalidos'] == 1
+    assert resultado['erros'][0].startswith('Linha 4:')
+    assert db.count_records() == 4
+
+
+def test_import_jsonl_rejects_non_object_lines(db, tmp_path):
+    arquivo = write_jsonl(tmp_path / 'historico.jsonl', [json.dumps(make_checkin()), '[1, 2]'])
+
+    resultado = import_file(db, arquivo)
+
+    assert resultado['importados'] == 1
+    assert resultado['erros'] == ['Linha 2: registro não é um objeto JSON']
+
+
+def test_import_jsonl_uses_defaults_for_null_numbers(db, tmp_path):
+    linha = dict(make_checkin(), valor_deslocamento=None, num_entradas=None)
+    arquivo = write_jsonl(tmp_path / 'historico.jsonl', [json.dumps(linha)])
+
+    resultado = import_file(db, arquivo)
+
+    assert resultado['importados'] == 1
+    assert db.records[0]['num_entradas'] == 1
+
+
+def test_import_csv_skips_invalid_rows_and_duplicates(db, tmp_path):
+    db.add_record(make_checkin(hora='08:00:00'))
+    arquivo = tmp_path / 'historico.csv'
+    with open(arquivo, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Data', 'Hora', 'Promotor', 'PDV', 'Valor Deslocamento', 'Nº Entradas', 'Fotos'])
+        writer.writerow(['2026-03-02', '08:00:00', 'Maria Silva', 'Mercado Central', '10', '1', ''])
+        writer.writerow(['2026-03-02', '09:00:00', 'Maria Silva', 'Mercado Central', 'nan', '1', ''])
+        writer.writerow(['2026-03-02', '10:00:00', 'Maria Silva', 'Mercado Central', '10', '1', 'a\nb'])
+
+    resultado = import_file(db, arquivo)
+
+    assert (resultado['importados'], resultado['duplicados'], resultado['invalidos']) == (1, 1, 1)
+    assert resultado['erros'][0].startswith('Linha 2: valor_deslocamento')
+    assert db.records[-1]['fotos'] == ['a', 'b']
+
+
+def test_import_finds_duplicates_across_chunks_and_saves_once(db, tmp_path, monkeypatch):
+    db.add_record(make_checkin(hora='08:00:00', promotor='Ana'))
+    linhas = [
+        make_checkin(hora='08:00:00', promotor='Ana'),      # já no banco
+        make_checkin(hora='08:00:00', promotor='Bruno'),    # mesmo horário, outro promotor
+        make_checkin(hora='09:00:00'),
+        make_checkin(hora='09:00:00'),                      # repetido no mesmo bloco
+        make_checkin(hora='07:00:00'),
+        make_checkin(hora='09:00:00'),                      # repetido em outro bloco
+    ]
+    arquivo = write_jsonl(tmp_path / 'historico.jsonl', [json.dumps(linha) for linha in linhas])
+    gravacoes = []
+    save_data = db._save_data
+    monkeypatch.setattr(db, '_save_data', lambda data: gravacoes.append(len(data)) or save_data(data))
+
+    resultado = import_file(db, arquivo, chunk_size=4)
+
+    assert (resultado['importados'], resultado['duplicados']) == (3, 3)
+    assert gravacoes == [4]
+    assert db.count_records() == 4
+
+
+# Armazenamento local de fotos
+
+def test_photo_store_keeps_shared_photo_until_every_record_is_sent(tmp_path):
+    store = PhotoStore(tmp_path / 'fotos', max_bytes=15)
+    primeira = store.put(b'X' * 10)
+    segunda = store.put(b'X' * 10)
+    assert primeira == segunda
+
+    store.mark_synced(primeira)
+    store.put(b'Y' * 10)
+    assert store.get(segunda) == b'X' * 10
+
+    store.mark_synced(segunda)
+    store.put(b'Z' * 10)
+    assert store.get(segunda) is None
+    assert store.usage() == {'pendentes': 2, 'enviadas': 0, 'bytes': 20}
+
+
+def test_photo_store_evicts_oldest_synced_photos(tmp_path):
+    store = PhotoStore(tmp_path / 'fotos', max_bytes=25)
+    refs = [store.put(bytes([i]) * 10) for i in range(2)]
+    for ref in refs:
+        store.mark_synced(ref)
+    pendente = store.put(b'P' * 10)
+
+    assert store.get(refs[0]) is None
+    assert store.get(refs[1]) is not None
+    assert store.get(pendente) is not None
+
+
+def test_photo_store_rejects_invalid_refs(tmp_path):
+    with pytest.raises(ValueError):
+        PhotoStore(tmp_path).get('local:../../etc/passwd')
+
+
+# Sincronização
+
+class StubGoogle:
+    """GoogleIntegration em memória que falha no envio das fotos indicadas"""
+
+    def __init__(self, falhas=()):
+        self.falhas = set(falhas)
+        self.linhas = []
+        self.enviadas = 0
+
+    def upload_file(self, file, folder_path, file_name):
+        if file.read() in self.falhas:
+            raise OSError('sem conexão')
+        self.enviadas += 1
+        return f"https://drive.google.com/file/d/stub{self.enviadas}/view?usp=drivesdk"
+
+    def append_row(self, registro):
+        self.linhas.append(dict(registro))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = PhotoStore(tmp_path / 'fotos')
+    monkeypatch.setattr(sync_module, 'photo_store', store)
+    return store
+
+
+def submit_online(db, store, google, conteudos):
+    """Grava e envia um check-in como o novo_checkin com conexão"""
+    refs = [store.put(conteudo) for conteudo in conteudos]
+    record_id = db.add_record(make_checkin(fotos=refs, sync_status=STATUS_PENDENTE))
+    worker = SyncWorker(max_workers=1)
+    job_id = worker.submit(
+        db, google, record_id,
+        [(f"{i}.jpg", conteudo) for i, conteudo in enumerate(conteudos, 1)],
+        'Maria/2026-03-02',
+        local_refs=list(refs)
+    )
+    worker.shutdown(wait=True)
+    return record_id, worker.get_job(job_id)
+
+
+def run_offline(db, google):
+    worker = SyncWorker(max_workers=1)
+    job_ids = worker.submit_offline(db, google)
+    worker.shutdown(wait=True)
+    return worker.get_jobs(job_ids)
+
+
+def test_online_checkin_replaces_local_photos_with_links(db, store):
+    google = StubGoogle()
+    record_id, job = submit_online(db, store, google, [b'foto-1', b'foto-2'])
+
+    registro = db.get_record_by_id(record_id)
+    assert job['status'] == STATUS_CONCLUIDO
+    assert registro['sync_status'] == STATUS_CONCLUIDO
+    assert all(foto.startswith('https://') for foto in registro['fotos'])
+    assert store.usage()['pendentes'] == 0
+    assert len(google.linhas) == 1
+
+
+def test_online_upload_failure_keeps_photo_locally(db, store):
+    google = StubGoogle(falhas={b'foto-2'})
+    record_id, job = submit_online(db, store, google, [b'foto-1', b'foto-2'])
+
+    registro = db.get_record_by_id(record_id)
+    assert job['status'] == STATUS_ERRO
+    assert registro['sync_status'] == STATUS_OFFLINE
+    assert registro['fotos'][0].startswith('https://')
+    assert store.get(registro['fotos'][1]) == b'foto-2'
+    assert google.linhas == []
+
+
+def test_offline_checkin_retries_failed_photos_without_duplicate_rows(db, store):
+    fotos = [store.put(b'foto-1'), store.put(b'foto-2')]
+    record_id = db.add_record(make_checkin(fotos=fotos, sync_status=STATUS_OFFLINE))
+    google = StubGoogle(falhas={b'foto-2'})
+
+    jobs = run_offline(db, google)
+    registro = db.get_record_by_id(record_id)
+
+    assert jobs[0]['status'] == STATUS_ERRO
+    assert registro['sync_status'] == STATUS_OFFLINE
+    assert registro['fotos'][0].startswith('https://') and registro['fotos'][1] == fotos[1]
+    assert google.linhas == []
+
+    google.falhas.clear()
+    jobs = run_offline(db, google)
+    registro = db.get_record_by_id(record_id)
+
+    assert jobs[0]['status'] == STATUS_CONCLUIDO
+    assert registro['sync_status'] == STATUS_CONCLUIDO
+    assert not has_local_photos(registro)
+    assert len(google.linhas) == 1
+    assert store.usage()['pendentes'] == 0
+
+
+def test_interrupted_checkins_are_requeued(db, store):
+    # Check-in com conexão cujo processo terminou antes do envio
+    com_fotos = db.add_record(make_checkin(fotos=[store.put(b'foto')], sync_status=STATUS_PENDENTE))
+    sem_fotos = db.add_record(make_checkin(hora='11:00:00', sync_status=STATUS_PENDENTE))
+    worker = SyncWorker(max_workers=1)
+
+    assert [r['id'] for r in worker.offline_records(db)] == [com_fotos]
+    assert sorted(worker.flag_interrupted(db)) == sorted([com_fotos, sem_fotos])
+    assert db.get_record_by_id(com_fotos)['sync_status'] == STATUS_OFFLINE
+    assert db.get_record_by_id(sem_fotos)['sync_status'] == STATUS_ERRO
+    assert worker.flag_interrupted(db) == []
+
+    google = StubGoogle()
+    worker.submit_offline(db, google)
+    worker.shutdown(wait=True)
+    assert db.get_record_by_id(com_fotos)['sync_status'] == STATUS_CONCLUIDO
+    assert len(google.linhas) == 1
+
+
+# Análises
+
+def test_analytics_follow_record_updates(db):
+    ids = [db.add_record(make_checkin(hora=f"{hora:02d}:00:00")) for hora in range(8, 12)]
+    assert db.summarize_records()['total_deslocamento'] == 100.0
+
+    db.update_record(ids[1], {'valor_deslocamento': 5.0, 'fotos': ['a', 'b']})
+    totais = db.summarize_records()
+
+    assert totais['total_deslocamento'] == 80.0
+    assert totais['total_fotos'] == 2
+
+
+def test_analytics_appends_in_blocks(db):
+    analytics = db.get_analytics()
+    assert analytics.totals()['total_registros'] == 0
+
+    for i in range(37):
+        db.add_record(make_checkin(hora=f"{8 + i // 60:02d}:{i % 60:02d}:00", promotor=f"Promotor {i % 3}"))
+        assert analytics.totals()['total_registros'] == i + 1
+
+    # Poucos blocos, com as mesmas categorias
+    assert len(analytics._chunks) <= 6
+    db.update_record(db.records[0]['id'], {'promotor': 'Novo Promotor'})
+    assert analytics.totals(promotor='Novo Promotor')['total_registros'] == 1
+    assert analytics.group_by('promotor')['visitas'].sum() == 37
+    assert len(analytics.frame) == 37
+    assert len(analytics._chunks) == 1
+
+
+def test_analytics_accept_missing_numbers(db):
+    db.add_record(make_checkin(valor_deslocamento=None, num_entradas=None))
+
+    totais = db.summarize_records()
+    assert totais['total_deslocamento'] == 0.0
+    assert totais['total_entradas'] == 1
+
+
+# Relatórios
+
+def test_reports_follow_adds_updates_and_deletes(db):
+    engine = db.get_reports()
+    a = db.add_record(make_checkin(data='2026-03-02', promotor='Ana', pdv='Loja 1', fotos=['x']))
+    db.add_record(make_checkin(data='2026-03-03', promotor='Bruno', pdv='Loja 1', valor_deslocamento=10.0))
+    db.add_record(make_checkin(data='2026-03-10', promotor='Ana', pdv='Loja 2'))
+
+    semana = engine.summarize('2026-03-02', '2026-03-08')
+    assert semana['totais'] == {
+        'visitas': 2, 'total_deslocamento': 35.0, 'total_entradas': 2, 'total_fotos': 1
+    }
+    assert list(semana['por_promotor']) == ['Ana', 'Bruno']
+    assert semana['por_pdv']['Loja 1']['visitas'] == 2
+
+    db.update_record(a, {'promotor': 'Bruno', 'valor_deslocamento': 5.0})
+    semana = engine.summarize('2026-03-02', '2026-03-08')
+    assert list(semana['por_promotor']) == ['Bruno']
+    assert semana['por_promotor']['Bruno']['total_deslocamento'] == 15.0
+
+    db.delete_record(a)
+    assert engine.summarize('2026-03-02', '2026-03-08')['totais']['visitas'] == 1
+
+
+def test_travel_cost_payroll_for_custom_period(db):
+    db.add_record(make_checkin(data='2026-03-02', promotor='Ana'))
+    db.add_record(make_checkin(data='2026-03-05', hora='11:00:00', promotor='Ana', valor_deslocamento=12.5))
+    db.add_record(make_checkin(data='2026-04-01', promotor='Ana'))
+
+    folha = db.get_reports().travel_cost_payroll('Customizado', '2026-03-01', '2026-03-31')
+
+    assert folha == [{'promotor': 'Ana', 'visitas': 2, 'total_deslocamento': 37.5}]
+
+
+# API de ingestão
+
+@pytest.fixture
+def server(db):
+    server = create_server(db, host='127.0.0.1', port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post_checkins(server, body, content_length):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    conn.putrequest('POST', '/checkins')
+    conn.putheader('Content-Type', 'application/json')
+    conn.putheader('Content-Length', content_length)
+    conn.endheaders()
+    conn.send(body)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-5'])
+def test_ingestion_rejects_invalid_content_length(server, content_length):
+    status, payload = post_checkins(server, b'{}', content_length)
+
+    assert status == 400
+    assert 'Content-Length' in payload['erro']
+
+
+def test_ingestion_accepts_checkin(server, db, store, monkeypatch):
+    monkeypatch.setattr(ingestion_api, 'photo_store', store)
+    body = json.dumps(make_checkin()).encode('utf-8')
+
+    status, payload = post_checkins(server, body, str(len(body)))
+
+    assert status == 201
+    assert db.get_record_by_id(payload['aceitos'][0]['id']) is not None
+
+
+def test_failed_commit_releases_stored_photos(db, store, monkeypatch):
+    monkeypatch.setattr(ingestion_api, 'photo_store', store)
+    compartilhada = store.put(b'foto-antiga')
+
+    def falha(registros):
+        raise OSError('disco cheio')
+    monkeypatch.setattr(db, 'add_records', falha)
+
+    service = IngestionService(db)
+    with pytest.raises(OSError):
+        service.ingest([(make_checkin(), [b'foto-nova', b'foto-antiga'])])
+
+    assert store.usage()['pendentes'] == 1
+    store.mark_synced(compartilhada)
+    assert store.usage()['pendentes'] == 0
@@ -0,0 +1,414 @@
+"""
+Testes das validações e utilitários
+"""
+
+import json
+import os
+import random
+import statistics
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import rate_limiter
+from metrics import LatencyHistogram, MetricsRegistry
+from config import VALOR_DESLOCAMENTO_PADRAO
+from config_registry import ConfigRegistry
+from conftest import make_checkin
+from credential_manager import CredentialHolder
+from formatters import (
+    format_currency,
+    format_currency_column,
+    format_date,
+    format_date_column,
+    format_datetime,
+    format_time
+)
+from rate_limiter import AdaptiveRateLimiter, execute_with_backoff
+from utils import (
+    RunningStats,
+    calculate_statistics,
+    parse_date_string,
+    parse_dates,
+    validate_checkin,
+    validate_checkin_batch,
+    validate_valor_deslocamento
+)
+
+
+# Validações
+
+def test_validate_checkin_normalizes_fields():
+    registro, erros = validate_checkin(make_checkin(valor_deslocamento='12.5', num_entradas='2'))
+
+    assert erros == []
+    assert registro['valor_deslocamento'] == 12.5
+    assert registro['num_entradas'] == 2
+
+
+@pytest.mark.parametrize('valor', ['nan', 'inf', '-inf', float('nan'), float('inf')])
+def test_validate_valor_deslocamento_rejects_non_finite(valor):
+    valido, _ = validate_valor_deslocamento(valor)
+    assert not valido
+
+
+@pytest.mark.parametrize('campos', [
+    {'valor_deslocamento': 'nan'},
+    {'valor_deslocamento': float('nan')},
+    {'valor_deslocamento': -1},
+    {'num_entradas': 0},
+    {'num_entradas': 2.5},
+    {'num_entradas': '1.5'},
+    {'promotor': ''},
+    {'data': '02/03/2026'},
+    {'hora': '25:00:00'},
+])
+def test_single_and_batch_validation_reject_the_same_rows(campos):
+    dados = make_checkin(**campos)
+    registro, erros = validate_checkin(dados)
+    mascara, mensagens = validate_checkin_batch([dados])
+
+    assert registro is None and erros
+    assert mascara[0] and mensagens[0]
+
+
+def test_null_numbers_take_the_defaults_in_both_validations():
+    dados = make_checkin(valor_deslocamento=None, num_entradas=None)
+    registro, erros = validate_checkin(dados)
+    mascara, _ = validate_checkin_batch([dados])
+
+    assert erros == [] and not mascara[0]
+    assert registro['valor_deslocamento'] == VALOR_DESLOCAMENTO_PADRAO
+    assert registro['num_entradas'] == 1
+
+
+def test_validate_checkin_batch_marks_only_invalid_rows():
+    linhas = [make_checkin(), make_checkin(valor_deslocamento='abc'), make_checkin(num_entradas=2.0)]
+    mascara, mensagens = validate_checkin_batch(linhas)
+
+    assert mascara.tolist() == [False, True, False]
+    assert mensagens[0] == [] and mensagens[2] == []
+    assert mensagens[1][0].startswith('valor_deslocamento:')
+
+
+# Controle de taxa
+
+class FakeResponse(dict):
+    def __init__(self, status, retry_after=None):
+        super().__init__({'retry-after': retry_after} if retry_after is not None else {})
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status, retry_after=None, content=b''):
+        super().__init__(f"HTTP {status}")
+        self.resp = FakeResponse(status, retry_after)
+        self.content = content
+
+
+class FakeRequest:
+    """Request que falha com os erros informados antes de responder"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Registra as pausas em vez de dormir"""
+    registro = []
+    monkeypatch.setattr(rate_limiter.time, 'sleep', registro.append)
+    monkeypatch.setitem(rate_limiter._LIMITERS, 'drive', AdaptiveRateLimiter(1000))
+    return registro
+
+
+def test_backoff_makes_at_most_max_retry_attempts(sleeps):
+    request = FakeRequest(*[FakeHttpError(503) for _ in range(10)])
+
+    with pytest.raises(FakeHttpError):
+        execute_with_backoff('drive', request)
+
+    assert request.calls == rate_limiter.MAX_RETRY_ATTEMPTS
+    assert len(sleeps) == rate_limiter.MAX_RETRY_ATTEMPTS - 1
+
+
+def test_rate_limited_call_waits_retry_after_once(sleeps):
+    request = FakeRequest(FakeHttpError(429, retry_after='2'))
+
+    assert execute_with_backoff('drive', request) == 'ok'
+    assert request.calls == 2
+    assert sum(sleeps) == pytest.approx(2, abs=0.1)
+    assert rate_limiter.get_rate_limiter('drive').rate < 1000
+
+
+def test_permission_errors_are_not_retried(sleeps):
+    request = FakeRequest(FakeHttpError(403, content=b'insufficientPermissions'))
+
+    with pytest.raises(FakeHttpError):
+        execute_with_backoff('drive', request)
+    assert request.calls == 1
+    assert sleeps == []
+
+
+# Credenciais compartilhadas
+
+class FakeCredentials:
+    """Credencial com a mesma interface usada de google.oauth2"""
+
+    def __init__(self, expires_in_minutes, fail=False):
+        self.expiry = datetime.utcnow() + timedelta(minutes=expires_in_minutes)
+        self.refresh_token = 'refresh'
+        self.refreshes = 0
+        self.fail = fail
+
+    @property
+    def valid(self):
+        return self.expiry > datetime.utcnow()
+
+    def refresh(self, request):
+        self.refreshes += 1
+        if self.fail:
+            raise RuntimeError('token revogado')
+        self.expiry = datetime.utcnow() + timedelta(minutes=60)
+
+
+def test_credentials_are_refreshed_once_near_expiry():
+    holder = CredentialHolder(refresh_margin_minutes=5)
+    creds = FakeCredentials(expires_in_minutes=2)
+    holder.set(creds)
+
+    threads = [threading.Thread(target=holder.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert creds.refreshes == 1
+    assert holder.get() is creds
+    assert holder.last_refresh is not None
+    holder.clear()
+    assert holder.get() is None
+
+
+def test_valid_credentials_are_not_refreshed():
+    holder = CredentialHolder(refresh_margin_minutes=5)
+    creds = FakeCredentials(expires_in_minutes=60)
+    holder.set(creds)
+
+    assert holder.get() is creds
+    assert creds.refreshes == 0
+    holder.clear()
+
+
+def test_failed_refresh_is_recorded():
+    holder = CredentialHolder(refresh_margin_minutes=5)
+    holder.set(FakeCredentials(expires_in_minutes=-1, fail=True))
+
+    with pytest.raises(RuntimeError):
+        holder.get()
+    assert holder.last_error == 'token revogado'
+    holder.clear()
+
+
+# Configurações editáveis
+
+def write_config(path, data):
+    """Grava o arquivo e avança o mtime (alterações no mesmo instante)"""
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data, encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_config_registry_reloads_changed_file(tmp_path):
+    path = tmp_path / 'config_data.json'
+    registry = ConfigRegistry(path, promotores=['Ana'], pdvs=['Loja 1'])
+    assert registry.promotores == ['Ana']
+
+    write_config(path, {'promotores': ['Bruno', 'Ana'], 'pdvs': ['Loja 2'],
+                        'pdv_locations': {'Loja 2': [-23.5, -46.6]}})
+
+    assert registry.promotores == ['Ana', 'Bruno']
+    assert registry.pdv_locations == {'Loja 2': (-23.5, -46.6)}
+
+
+@pytest.mark.parametrize('conteudo', [
+    '[1, 2]',
+    '{"promotores": ["Ana"], "pdvs": ["Loja 1"], "pdv_locations": {"Loja 1": [1]}}',
+    '{"promotores": ["Ana"], "pdvs": ["Loja 1"], "pdv_locations": {"Loja 1": ["a", "b"]}}',
+    '{"promotores": 5}',
+    '{"promotores": [',
+])
+def test_config_registry_keeps_last_good_config(tmp_path, conteudo):
+    path = tmp_path / 'config_data.json'
+    registry = ConfigRegistry(path, promotores=['Ana'], pdvs=['Loja 1'])
+    registry.set_pdv_location('Loja 1', -23.5, -46.6)
+
+    write_config(path, conteudo)
+
+    assert registry.promotores == ['Ana']
+    assert registry.pdv_locations == {'Loja 1': (-23.5, -46.6)}
+    assert registry.has_pdv('Loja 1')
+
+
+# Estatísticas
+
+def test_running_stats_match_exact_values():
+    rng = random.Random(7)
+    valores = [rng.lognormvariate(3, 1) for _ in range(5000)]
+    stats = RunningStats()
+    for valor in valores:
+        stats.add(valor)
+
+    assert stats.count == 5000
+    assert stats.mean == pytest.approx(statistics.fmean(valores))
+    assert stats.variance == pytest.approx(statistics.variance(valores))
+    ordenados = sorted(valores)
+    for q in (0.5, 0.9, 0.99):
+        exato = ordenados[int(q * (len(valores) - 1))]
+        assert stats.percentile(q) == pytest.approx(exato, rel=0.02)
+
+
+def test_running_stats_merge_equals_single_pass():
+    valores = [0, 0, 1.5, 10, 25, 40, 99, 150, 310]
+    junto = RunningStats()
+    for valor in valores:
+        junto.add(valor)
+    a, b = RunningStats(), RunningStats()
+    for valor in valores[:4]:
+        a.add(valor)
+    for valor in valores[4:]:
+        b.add(valor)
+
+    a.merge(b).merge(RunningStats())
+
+    assert a.count == junto.count and a.total == junto.total
+    assert (a.min, a.max) == (0, 310)
+    assert a.mean == pytest.approx(junto.mean)
+    assert a.variance == pytest.approx(junto.variance)
+    assert a.percentile(0.5) == junto.percentile(0.5)
+    assert RunningStats().percentile(0.5) is None
+
+
+def test_calculate_statistics_accepts_generators():
+    registros = (make_checkin(valor_deslocamento=v, fotos=['x'] * (i % 3)) for i, v in enumerate([10, 60, 120, 200]))
+
+    resultado = calculate_statistics(registros)
+
+    assert resultado['total_registros'] == 4
+    assert resultado['total_deslocamento'] == 390
+    assert resultado['total_fotos'] == 3
+    assert list(resultado['faixas_valor'].values()) == [1, 1, 1, 1]
+    assert resultado['distribuicoes']['deslocamento']['maximo'] == 200
+
+
+# Datas
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('2026-03-02', datetime(2026, 3, 2)),
+    ('02/03/2026', datetime(2026, 3, 2)),
+    ('2026/3/2', datetime(2026, 3, 2)),
+    ('2-3-2026', datetime(2026, 3, 2)),
+    ('29/02/2024', datetime(2024, 2, 29)),
+    ('29/02/2026', None),
+    ('2026-13-01', None),
+    ('ontem', None),
+    (None, None),
+])
+def test_parse_date_string_formats(texto, esperado):
+    assert parse_date_string(texto) == esperado
+
+
+def test_parse_dates_same_format_is_vectorized():
+    datas = parse_dates(['2026-03-02', '2026-03-31', '', None, '2026-02-30'])
+
+    assert datas.iloc[0] == datetime(2026, 3, 2)
+    assert datas.iloc[1] == datetime(2026, 3, 31)
+    assert datas.iloc[2:].isna().all()
+
+
+def test_parse_dates_mixed_formats():
+    datas = parse_dates(['02/03/2026', '2026-03-05', 'x'])
+
+    assert datas.tolist()[:2] == [datetime(2026, 3, 2), datetime(2026, 3, 5)]
+    assert datas.isna().tolist() == [False, False, True]
+
+
+# Formatação
+
+@pytest.mark.parametrize('valor, esperado', [
+    (0, 'R$ 0,00'),
+    (25.5, 'R$ 25,50'),
+    ('1234.567', 'R$ 1.234,57'),
+    (-1500, 'R$ -1.500,00'),
+])
+def test_format_currency_uses_brazilian_separators(valor, esperado):
+    assert format_currency(valor) == esperado
+
+
+def test_format_date_and_time():
+    momento = datetime(2026, 3, 2, 9, 5, 7)
+
+    assert format_date(momento) == format_date('2026-03-02T09:05:07') == '02/03/2026'
+    assert format_time(momento) == format_time('2026-03-02T09:05:07') == '09:05:07'
+    assert format_time('09:05:07') == '09:05:07'
+    assert format_datetime('2026-03-02T09:05:07') == '02/03/2026 09:05:07'
+
+
+def test_column_formatters_match_single_values():
+    valores = [10, 2.5, 10, 1000]
+
+    assert format_currency_column(valores) == [format_currency(v) for v in valores]
+    assert format_currency_column([]) == []
+    assert format_date_column(['2026-03-02', 'x', None]) == ['02/03/2026', '', '']
+
+
+# Métricas
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram(bounds=(0.01, 0.1, 1.0))
+    for segundos in [0.005] * 90 + [0.05] * 9 + [2.0]:
+        histogram.observe(segundos)
+
+    assert histogram.counts == [90, 9, 0, 1]
+    assert 0 < histogram.percentile(50) <= 0.01
+    assert 0.01 < histogram.percentile(95) <= 0.1
+    assert histogram.percentile(100) == 2.0
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_metrics_timed_records_calls_and_errors():
+    registry = MetricsRegistry(enabled=True, bounds=(0.5, 5.0))
+
+    @registry.timed('operacao.falha')
+    def falha():
+        raise ValueError('erro')
+
+    with registry.timed('operacao.ok'):
+        pass
+    with pytest.raises(ValueError):
+        falha()
+
+    resumo = {item['operacao']: item for item in registry.snapshot()}
+    assert resumo['operacao.ok']['chamadas'] == 1
+    assert resumo['operacao.falha']['erros'] == 1
+
+    texto = registry.to_prometheus()
+    assert 'pdv_operation_duration_seconds_bucket{operation="operacao.ok",le="+Inf"} 1' in texto
+    assert 'pdv_operation_errors_total{operation="operacao.falha"} 1' in texto
+
+
+def test_disabled_metrics_record_nothing():
+    registry = MetricsRegistry(enabled=False)
+
+    with registry.timed('operacao'):
+        pass
+    assert registry.timed('operacao')(lambda: 42)() == 42
+    assert registry.snapshot() == []
@@ -3,66 +3,19 @@ Módulo de funções utilitárias
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
+import calendar
+import math
 import re
+import numpy as np
+import pandas as pd
 from config import *
+from formatters import format_currency
+from record import photo_count
 
-def format_currency(value):
-    """
-    Formata valor monetário
-    
-    Args:
-        value: Valor numérico
-        
-    Returns:
-        String formatada
-    """
-    return f"{MOEDA} {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def format_date(date_obj):
-    """
-    Formata data para exibição
-    
-    Args:
-        date_obj: Objeto datetime ou string ISO
-        
-    Returns:
-        String formatada
-    """
-    if isinstance(date_obj, str):
-        date_obj = datetime.fromisoformat(date_obj)
-    return date_obj.strftime(DATE_FORMAT)
-
-def format_time(time_obj):
-    """
-    Formata hora para exibição
-    
-    Args:
-        time_obj: Objeto datetime ou string
-        
-    Returns:
-        String formatada
-    """
-    if isinstance(time_obj, str):
-        if 'T' in time_obj:
-            time_obj = datetime.fromisoformat(time_obj)
-        else:
-            return time_obj
-    return time_obj.strftime(TIME_FORMAT)
-
-def format_datetime(datetime_obj):
-    """
-    Formata data/hora completo
-    
-    Args:
-        datetime_obj: Objeto datetime ou string ISO
-        
-    Returns:
-        String formatada
-    """
-    if isinstance(datetime_obj, str):
-        datetime_obj = datetime.fromisoformat(datetime_obj)
-    return datetime_obj.strftime(DATETIME_FORMAT)
+# Nome do promotor: apenas letras, espaços e caracteres acentuados
+_NOME_PATTERN = re.compile(r'^[a-zA-ZÀ-ÿ\s]+$')
 
 def validate_promotor_name(name):
     """
@@ -84,7 +37,7 @@ def validate_promotor_name(name):
         return False, f"Nome deve ter no máximo {MAX_NAME_LENGTH} caracteres"
     
     # Verifica se contém apenas letras, espaços e caracteres acentuados
-    if not re.match(r'^[a-zA-ZÀ-ÿ\s]+$', name):
+    if not _NOME_PATTERN.match(name):
         return False, "Nome deve conter apenas letras"
     
     return True, ""
@@ -125,6 +78,10 @@ def validate_valor_deslocamento(valor):
     except (ValueError, TypeError):
         return False, "Valor inválido"
     
+    # NaN passa pelas comparações de faixa abaixo
+    if not math.isfinite(valor):
+        return False, "Valor inválido"
+    
     if valor < MIN_DESLOCAMENTO_VALUE:
         return False, f"Valor mínimo é {format_currency(MIN_DESLOCAMENTO_VALUE)}"
     
@@ -144,10 +101,14 @@ def validate_num_entradas(num):
         Tupla (válido, mensagem_erro)
     """
     try:
-        num = int(num)
+        num = float(num)
     except (ValueError, TypeError):
         return False, "Número inválido"
     
+    # Mesma regra da validação em lote: 2.5 é inválido, 2.0 vale 2
+    if not num.is_integer():
+        return False, "Número inválido"
+    
     if num < MIN_ENTRADAS:
         return False, f"Mínimo de {MIN_ENTRADAS} entrada(s)"
     
@@ -156,6 +117,240 @@ def validate_num_entradas(num):
     
     return True, ""
 
+def _value_or_default(dados, campo, padrao):
+    """Valor do campo; ausente ou nulo (None) assume o padrão"""
+    valor = dados.get(campo)
+    return padrao if valor is None else valor
+
+def validate_checkin(dados):
+    """
+    Valida e normaliza um check-in recebido fora do formulário
+    (API de ingestão e importação de históricos)
+    
+    Args:
+        dados: Dicionário com promotor, pdv, valor_deslocamento,
+            num_entradas, observacoes e opcionalmente data/hora
+        
+    Returns:
+        Tupla (registro, lista_de_erros)
+    """
+    erros = []
+    agora = datetime.now()
+    
+    promotor = str(dados.get('promotor') or '').strip()
+    pdv = str(dados.get('pdv') or '').strip()
+    valor = _value_or_default(dados, 'valor_deslocamento', VALOR_DESLOCAMENTO_PADRAO)
+    num_entradas = _value_or_default(dados, 'num_entradas', 1)
+    data = str(dados.get('data') or agora.strftime("%Y-%m-%d"))
+    hora = str(dados.get('hora') or agora.strftime("%H:%M:%S"))
+    
+    for campo, (valido, mensagem) in (
+        ('promotor', validate_promotor_name(promotor)),
+        ('pdv', validate_pdv_name(pdv)),
+        ('valor_deslocamento', validate_valor_deslocamento(valor)),
+        ('num_entradas', validate_num_entradas(num_entradas))
+    ):
+        if not valido:
+            erros.append(f"{campo}: {mensagem}")
+    
+    try:
+        datetime.strptime(data, "%Y-%m-%d")
+    except ValueError:
+        erros.append("data: Use o formato AAAA-MM-DD")
+    
+    try:
+        datetime.strptime(hora, "%H:%M:%S")
+    except ValueError:
+        erros.append("hora: Use o formato HH:MM:SS")
+    
+    if erros:
+        return None, erros
+    
+    return build_checkin_record(dict(dados, data=data, hora=hora)), []
+
+def build_checkin_record(dados):
+    """
+    Monta o registro normalizado a partir de dados já validados
+    
+    Args:
+        dados: Dicionário com os campos do check-in
+        
+    Returns:
+        Dicionário do registro
+    """
+    return {
+        'data': str(dados['data']),
+        'hora': str(dados['hora']),
+        'promotor': str(dados['promotor']).strip(),
+        'pdv': str(dados['pdv']).strip(),
+        'valor_deslocamento': float(_value_or_default(dados, 'valor_deslocamento', VALOR_DESLOCAMENTO_PADRAO)),
+        'num_entradas': int(float(_value_or_default(dados, 'num_entradas', 1))),
+        'observacoes': str(dados.get('observacoes') or ''),
+        'fotos': list(dados.get('fotos') or [])
+    }
+
+def _as_series(values):
+    """Converte lista (ou Series) em Series com índice 0..n-1"""
+    if isinstance(values, pd.Series):
+        return values.reset_index(drop=True)
+    return pd.Series(list(values), dtype=object)
+
+def _name_errors(values, empty_message, check_letters):
+    """Validação vetorizada de nomes (vazio, tamanho e letras)"""
+    series = _as_series(values)
+    texto = series.where(series.notna(), '').astype(str)
+    tamanho = texto.str.len().to_numpy()
+    
+    conditions = [
+        (texto.str.strip() == '').to_numpy(),
+        tamanho < MIN_NAME_LENGTH,
+        tamanho > MAX_NAME_LENGTH
+    ]
+    messages = [
+        empty_message,
+        f"Nome deve ter no mínimo {MIN_NAME_LENGTH} caracteres",
+        f"Nome deve ter no máximo {MAX_NAME_LENGTH} caracteres"
+    ]
+    
+    if check_letters:
+        conditions.append(~texto.str.match(_NOME_PATTERN).to_numpy(dtype=bool))
+        messages.append("Nome deve conter apenas letras")
+    
+    mensagens = np.select(conditions, messages, default='')
+    return mensagens != '', mensagens.tolist()
+
+def validate_promotor_names(names):
+    """
+    Valida uma coluna de nomes de promotor de uma vez
+    
+    Args:
+        names: Lista ou pandas Series de nomes
+        
+    Returns:
+        Tupla (máscara numpy de erros, lista de mensagens; '' nas linhas válidas)
+    """
+    return _name_errors(names, "Nome não pode estar vazio", check_letters=True)
+
+def validate_pdv_names(names):
+    """
+    Valida uma coluna de nomes de PDV de uma vez
+    
+    Args:
+        names: Lista ou pandas Series de nomes
+        
+    Returns:
+        Tupla (máscara numpy de erros, lista de mensagens; '' nas linhas válidas)
+    """
+    return _name_errors(names, "Nome do PDV não pode estar vazio", check_letters=False)
+
+def validate_valores_deslocamento(valores):
+    """
+    Valida uma coluna de valores de deslocamento de uma vez
+    
+    Args:
+        valores: Lista ou pandas Series de valores
+        
+    Returns:
+        Tupla (máscara numpy de erros, lista de mensagens; '' nas linhas válidas)
+    """
+    numeros = pd.to_numeric(_as_series(valores), errors='coerce').to_numpy(dtype=float)
+    
+    mensagens = np.select(
+        [np.isnan(numeros), numeros < MIN_DESLOCAMENTO_VALUE, numeros > MAX_DESLOCAMENTO_VALUE],
+        [
+            "Valor inválido",
+            f"Valor mínimo é {format_currency(MIN_DESLOCAMENTO_VALUE)}",
+            f"Valor máximo é {format_currency(MAX_DESLOCAMENTO_VALUE)}"
+        ],
+        default=''
+    )
+    return mensagens != '', mensagens.tolist()
+
+def validate_nums_entradas(nums):
+    """
+    Valida uma coluna de números de entradas de uma vez
+    
+    Args:
+        nums: Lista ou pandas Series de números
+        
+    Returns:
+        Tupla (máscara numpy de erros, lista de mensagens; '' nas linhas válidas)
+    """
+    numeros = pd.to_numeric(_as_series(nums), errors='coerce').to_numpy(dtype=float)
+    
+    with np.errstate(invalid='ignore'):
+        invalido = np.isnan(numeros) | (numeros != np.floor(numeros))
+    
+    mensagens = np.select(
+        [invalido, numeros < MIN_ENTRADAS, numeros > MAX_ENTRADAS],
+        [
+            "Número inválido",
+            f"Mínimo de {MIN_ENTRADAS} entrada(s)",
+            f"Máximo de {MAX_ENTRADAS} entradas"
+        ],
+        default=''
+    )
+    return mensagens != '', mensagens.tolist()
+
+def _format_errors(values, fmt, message):
+    """Validação vetorizada de datas/horas obrigatórias em um formato"""
+    series = _as_series(values)
+    vazio = (series.isna() | (series.astype(str).str.strip() == '')).to_numpy()
+    invalido = pd.to_datetime(series.astype(str), format=fmt, errors='coerce').isna().to_numpy()
+    mensagens = np.select([vazio, invalido], ["obrigatório", message], default='')
+    return mensagens != '', mensagens.tolist()
+
+def validate_checkin_batch(linhas):
+    """
+    Valida várias linhas de check-in de uma vez (importação de históricos)
+    
+    Diferente de validate_checkin, data e hora são obrigatórias.
+    
+    Args:
+        linhas: Lista de dicionários com os campos do check-in
+        
+    Returns:
+        Tupla (máscara numpy de erros, lista de mensagens por linha;
+        lista vazia nas linhas válidas)
+    """
+    frame = pd.DataFrame.from_records(
+        linhas,
+        columns=['data', 'hora', 'promotor', 'pdv', 'valor_deslocamento', 'num_entradas']
+    )
+    # Mesmos padrões de build_checkin_record: só valores ausentes ou nulos
+    # (um NaN explícito continua inválido)
+    frame['valor_deslocamento'] = pd.Series(
+        [_value_or_default(linha, 'valor_deslocamento', VALOR_DESLOCAMENTO_PADRAO) for linha in linhas],
+        dtype=object
+    )
+    frame['num_entradas'] = pd.Series(
+        [_value_or_default(linha, 'num_entradas', 1) for linha in linhas],
+        dtype=object
+    )
+    
+    checks = [
+        ('promotor', validate_promotor_names(frame['promotor'])),
+        ('pdv', validate_pdv_names(frame['pdv'])),
+        ('valor_deslocamento', validate_valores_deslocamento(frame['valor_deslocamento'])),
+        ('num_entradas', validate_nums_entradas(frame['num_entradas'])),
+        ('data', _format_errors(frame['data'], "%Y-%m-%d", "Use o formato AAAA-MM-DD")),
+        ('hora', _format_errors(frame['hora'], "%H:%M:%S", "Use o formato HH:MM:SS"))
+    ]
+    
+    mascara = np.zeros(len(frame), dtype=bool)
+    for _, (erros, _) in checks:
+        mascara |= erros
+    
+    mensagens = [[] for _ in range(len(frame))]
+    for i in np.flatnonzero(mascara):
+        mensagens[i] = [
+            f"{campo}: {textos[i]}"
+            for campo, (erros, textos) in checks
+            if erros[i]
+        ]
+    
+    return mascara, mensagens
+
 def validate_image_file(file, max_size_mb=MAX_FILE_SIZE_MB):
     """
     Valida arquivo de imagem
@@ -222,41 +417,195 @@ def get_date_range(period_type, custom_start=None, custom_end=None):
     
     return today, today
 
+class RunningStats:
+    """
+    Estatísticas de uma variável calculadas em uma única passada
+    
+    Média e variância pelo método de Welford; percentis aproximados por
+    buckets logarítmicos (erro relativo de PERCENTILE_RELATIVE_ACCURACY).
+    Duas instâncias podem ser combinadas com merge().
+    """
+    
+    def __init__(self, relative_accuracy=PERCENTILE_RELATIVE_ACCURACY):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._zero_count = 0
+        self._buckets = {}
+    
+    def add(self, value):
+        """Inclui um valor"""
+        value = float(value)
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+    
+    def merge(self, other):
+        """
+        Combina com outra instância (ex.: partição processada em outra thread)
+        
+        Args:
+            other: RunningStats com a mesma precisão
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.mean, self._m2 = other.mean, other._m2
+        else:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+            self.mean += delta * other.count / count
+        
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._zero_count += other._zero_count
+        for key, n in other._buckets.items():
+            self._buckets[key] = self._buckets.get(key, 0) + n
+        return self
+    
+    @property
+    def variance(self):
+        """Variância amostral"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    def percentile(self, q):
+        """
+        Percentil aproximado
+        
+        Args:
+            q: Quantil entre 0 e 1 (ex.: 0.95)
+            
+        Returns:
+            Valor aproximado ou None se não houver dados
+        """
+        if self.count == 0:
+            return None
+        
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if rank < seen:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+    
+    def to_dict(self):
+        """Resumo com contagem, soma, média, variância, extremos e percentis"""
+        return {
+            'contagem': self.count,
+            'soma': self.total,
+            'media': self.mean,
+            'variancia': self.variance,
+            'desvio_padrao': math.sqrt(self.variance),
+            'minimo': self.min,
+            'maximo': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+class StatisticsAccumulator:
+    """
+    Acumula estatísticas de registros em uma única passada
+    
+    Aceita geradores (não materializa listas) e pode ser combinado
+    entre partições com merge().
+    """
+    
+    def __init__(self):
+        self.deslocamento = RunningStats()
+        self.entradas = RunningStats()
+        self.fotos = RunningStats()
+        self.faixas_valor = [0] * len(FAIXAS_VALOR)
+    
+    def add(self, registro):
+        """Inclui um registro"""
+        valor = registro.get('valor_deslocamento', 0)
+        self.deslocamento.add(valor)
+        self.entradas.add(registro.get('num_entradas', 1))
+        self.fotos.add(photo_count(registro))
+        
+        for i, (minimo, maximo, _) in enumerate(FAIXAS_VALOR):
+            if minimo <= valor < maximo:
+                self.faixas_valor[i] += 1
+                break
+    
+    def update(self, registros):
+        """Inclui vários registros (lista ou gerador)"""
+        for registro in registros:
+            self.add(registro)
+        return self
+    
+    def merge(self, other):
+        """Combina com outro acumulador"""
+        self.deslocamento.merge(other.deslocamento)
+        self.entradas.merge(other.entradas)
+        self.fotos.merge(other.fotos)
+        self.faixas_valor = [a + b for a, b in zip(self.faixas_valor, other.faixas_valor)]
+        return self
+    
+    def result(self):
+        """
+        Monta o dicionário de estatísticas
+        
+        Returns:
+            Totais e médias (mesmas chaves de sempre), mais
+            'distribuicoes' por variável e 'faixas_valor'
+        """
+        total_registros = self.deslocamento.count
+        return {
+            'total_registros': total_registros,
+            'total_deslocamento': self.deslocamento.total,
+            'total_entradas': int(self.entradas.total),
+            'total_fotos': int(self.fotos.total),
+            'media_deslocamento': self.deslocamento.mean,
+            'media_entradas': self.entradas.mean,
+            'media_fotos': self.fotos.mean,
+            'distribuicoes': {
+                'deslocamento': self.deslocamento.to_dict(),
+                'entradas': self.entradas.to_dict(),
+                'fotos': self.fotos.to_dict()
+            },
+            'faixas_valor': {
+                rotulo: contagem
+                for (_, _, rotulo), contagem in zip(FAIXAS_VALOR, self.faixas_valor)
+            }
+        }
+
 def calculate_statistics(registros):
     """
-    Calcula estatísticas dos registros
+    Calcula estatísticas dos registros em uma única passada
     
     Args:
-        registros: Lista de registros
+        registros: Lista ou gerador de registros
         
     Returns:
         Dicionário com estatísticas
     """
-    if not registros:
-        return {
-            'total_registros': 0,
-            'total_deslocamento': 0,
-            'total_entradas': 0,
-            'total_fotos': 0,
-            'media_deslocamento': 0,
-            'media_entradas': 0,
-            'media_fotos': 0
-        }
-    
-    total_registros = len(registros)
-    total_deslocamento = sum(r.get('valor_deslocamento', 0) for r in registros)
-    total_entradas = sum(r.get('num_entradas', 1) for r in registros)
-    total_fotos = sum(len(r.get('fotos', [])) for r in registros)
-    
-    return {
-        'total_registros': total_registros,
-        'total_deslocamento': total_deslocamento,
-        'total_entradas': total_entradas,
-        'total_fotos': total_fotos,
-        'media_deslocamento': total_deslocamento / total_registros if total_registros > 0 else 0,
-        'media_entradas': total_entradas / total_registros if total_registros > 0 else 0,
-        'media_fotos': total_fotos / total_registros if total_registros > 0 else 0
-    }
+    return StatisticsAccumulator().update(registros).result()
 
 def generate_photo_filename(pdv, index):
     """
@@ -294,6 +643,49 @@ def generate_folder_path(promotor, date):
     
     return f"{promotor_clean}/{date_str}"
 
+# Formatos de data aceitos, identificados pelo formato da string
+_DATE_PATTERNS = {
+    "%Y-%m-%d": re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$'),
+    "%d/%m/%Y": re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$'),
+    "%Y/%m/%d": re.compile(r'^(\d{4})/(\d{1,2})/(\d{1,2})$'),
+    "%d-%m-%Y": re.compile(r'^(\d{1,2})-(\d{1,2})-(\d{4})$')
+}
+
+def detect_date_format(date_str):
+    """
+    Identifica o formato de uma data pelo formato da string
+    
+    Args:
+        date_str: String da data
+        
+    Returns:
+        Formato strptime (ex.: "%d/%m/%Y") ou None
+    """
+    for fmt, pattern in _DATE_PATTERNS.items():
+        if pattern.match(date_str):
+            return fmt
+    return None
+
+@lru_cache(maxsize=DATE_PARSE_CACHE_SIZE)
+def _parse_date_cached(date_str):
+    """Converte a string sem usar exceções para testar formatos"""
+    fmt = detect_date_format(date_str)
+    if fmt is None:
+        return None
+    
+    parts = [int(p) for p in _DATE_PATTERNS[fmt].match(date_str).groups()]
+    if fmt.startswith("%Y"):
+        year, month, day = parts
+    else:
+        day, month, year = parts
+    
+    if not (1 <= year and 1 <= month <= 12):
+        return None
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    
+    return datetime(year, month, day)
+
 def parse_date_string(date_str):
     """
     Converte string de data para objeto datetime
@@ -304,20 +696,33 @@ def parse_date_string(date_str):
     Returns:
         Objeto datetime ou None
     """
-    formats = [
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%Y/%m/%d",
-        "%d-%m-%Y"
-    ]
+    if not isinstance(date_str, str):
+        return None
+    return _parse_date_cached(date_str)
+
+def parse_dates(values):
+    """
+    Converte várias datas de uma vez
     
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
+    Quando todas têm o mesmo formato a conversão é vetorizada pelo
+    pandas; caso contrário cada valor passa por parse_date_string.
     
-    return None
+    Args:
+        values: Iterável (ou pandas Series) de strings de data
+        
+    Returns:
+        pandas Series datetime64 (NaT nas datas inválidas)
+    """
+    series = values.reset_index(drop=True) if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    texto = series.where(series.notna(), '').astype(str)
+    
+    primeira = next((v for v in texto if v), None)
+    fmt = detect_date_format(primeira) if primeira else None
+    
+    if fmt and texto.str.match(_DATE_PATTERNS[fmt]).all():
+        return pd.to_datetime(texto, format=fmt, errors='coerce')
+    
+    return pd.to_datetime(pd.Series([parse_date_string(v) for v in texto], dtype=object))
 
 def get_week_number(date):
     """